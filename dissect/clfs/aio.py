@@ -0,0 +1,331 @@
+"""Asynchronous parsing of BLF and container files over asynchronous random-access byte sources.
+
+The log blocks are read through an :class:`AsyncReader`, in aligned chunks that are cached and read ahead in the
+direction of the walk, so several reads are in flight while the blocks that already arrived are decoded. Decoding is
+done by the same code as the synchronous :class:`~dissect.clfs.blf.BLF` and
+:class:`~dissect.clfs.container.Container`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, BinaryIO, Protocol
+
+from dissect.clfs.blf import BLF, ControlRecord
+from dissect.clfs.c_clfs import LOG_BLOCK_HEADER_SIZE, SECTOR_SIZE, BlockHeader, LogBlockHeader
+from dissect.clfs.chain import ChainGuard, ChainPolicy
+from dissect.clfs.container import _scan_block, _walk_block
+from dissect.clfs.exceptions import InvalidRecordBlockError
+from dissect.clfs.mapped import BufferFile
+from dissect.clfs.verify import ChecksumPolicy, check_block
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+    from dissect.clfs.c_clfs import RecordHeader
+    from dissect.clfs.container import Record
+
+DEFAULT_READ_SIZE = 64 * 1024
+DEFAULT_READAHEAD = 4
+
+
+class AsyncReader(Protocol):
+    """Protocol of an asynchronous random-access byte source, such as a file on a remote agent."""
+
+    async def read_at(self, offset: int, size: int) -> bytes:
+        """Read ``size`` bytes at the given offset, fewer at the end of the source."""
+        ...
+
+
+class AsyncFileReader:
+    """An :class:`AsyncReader` over a regular file-like object, of which the reads run in a worker thread.
+
+    Args:
+        fh: A file-like object.
+    """
+
+    def __init__(self, fh: BinaryIO):
+        self.fh = fh
+        self._lock = threading.Lock()
+
+    async def read_at(self, offset: int, size: int) -> bytes:
+        return await asyncio.to_thread(self._read_at, offset, size)
+
+    def _read_at(self, offset: int, size: int) -> bytes:
+        with self._lock:
+            self.fh.seek(offset)
+            return self.fh.read(size)
+
+
+class ChunkCache:
+    """Cache of the aligned chunks of an :class:`AsyncReader`, of which the reads may still be in flight.
+
+    Every chunk is read only once as long as it stays in the cache, also when it's requested again while its read is
+    still in flight. Chunks of which the read is still in flight are never evicted, so :meth:`close` can cancel every
+    read. The cache can hold more than ``max_chunks`` chunks while their reads are in flight.
+
+    Args:
+        reader: The reader to read the chunks from.
+        read_size: The size of the chunks, a multiple of the sector size.
+        max_chunks: The maximum number of chunks to keep in the cache.
+    """
+
+    def __init__(self, reader: AsyncReader, read_size: int = DEFAULT_READ_SIZE, max_chunks: int = 64):
+        if not read_size or read_size % SECTOR_SIZE:
+            raise ValueError(f"Read size must be a multiple of {SECTOR_SIZE}")
+
+        self.reader = reader
+        self.read_size = read_size
+        self.max_chunks = max_chunks
+
+        self._chunks: OrderedDict[int, asyncio.Future[bytes]] = OrderedDict()
+        self._loop = None
+
+    def chunk(self, index: int) -> asyncio.Future[bytes]:
+        """Return the (pending) read of the chunk with the given index, starting the read if needed."""
+        # Reads are bound to the event loop they were started in
+        if (loop := asyncio.get_running_loop()) is not self._loop:
+            self._chunks.clear()
+            self._loop = loop
+
+        if (future := self._chunks.get(index)) is not None:
+            self._chunks.move_to_end(index)
+            return future
+
+        future = asyncio.ensure_future(self.reader.read_at(index * self.read_size, self.read_size))
+        self._chunks[index] = future
+        self._evict()
+
+        return future
+
+    def _evict(self) -> None:
+        """Evict the least recently used chunks beyond ``max_chunks``, of which the read has completed."""
+        excess = len(self._chunks) - self.max_chunks
+        for index, future in list(self._chunks.items()):
+            if excess <= 0:
+                break
+            if not future.done():
+                continue
+
+            del self._chunks[index]
+            if not future.cancelled():
+                # Retrieve the error of a read ahead that was never awaited, so it isn't reported as unhandled
+                future.exception()
+            excess -= 1
+
+    def prefetch(self, offset: int, count: int, backward: bool = False) -> None:
+        """Start reading the chunks following (or preceding) the chunk of the given offset."""
+        index = offset // self.read_size
+        step = -1 if backward else 1
+        for idx in range(index + step, index + step * (count + 1), step):
+            if idx < 0:
+                break
+            self.chunk(idx)
+
+    async def read(self, offset: int, size: int) -> bytearray:
+        """Read ``size`` bytes at the given offset, fewer at the end of the source."""
+        if size <= 0:
+            return bytearray()
+
+        first = offset // self.read_size
+        last = (offset + size - 1) // self.read_size
+        chunks = await asyncio.gather(*(self.chunk(idx) for idx in range(first, last + 1)))
+
+        start = offset - first * self.read_size
+        if len(chunks) == 1:
+            return bytearray(chunks[0][start : start + size])
+        return bytearray(b"".join(chunks)[start : start + size])
+
+    def close(self) -> None:
+        """Cancel the reads that are still in flight and clear the cache."""
+        for future in self._chunks.values():
+            future.cancel()
+        self._chunks.clear()
+
+
+async def read_blf(reader: AsyncReader, **kwargs) -> BLF:
+    """Read the metadata blocks of a BLF file and parse them with :class:`~dissect.clfs.blf.BLF`.
+
+    The control record is read first, after which all metadata blocks it lists are read at once.
+
+    Args:
+        reader: The reader of the BLF file.
+        **kwargs: The keyword arguments of :class:`~dissect.clfs.blf.BLF`.
+    """
+    cache = ChunkCache(reader)
+    try:
+        try:
+            header = LogBlockHeader.from_buffer(await cache.read(0, LOG_BLOCK_HEADER_SIZE))
+        except EOFError:
+            raise InvalidRecordBlockError("Invalid control record block header, possibly corrupt/empty")
+
+        buf = await cache.read(0, header.TotalSectors * SECTOR_SIZE)
+        control_record = ControlRecord(BufferFile(buf), offset=0)
+
+        end = max(
+            (metablock.Offset + metablock.ImageSize for metablock in control_record.record.RgBlocks),
+            default=len(buf),
+        )
+        buf = await cache.read(0, max(end, len(buf)))
+    finally:
+        cache.close()
+
+    return BLF(BufferFile(buf), **kwargs)
+
+
+class AsyncContainer:
+    """Asynchronous counterpart of :class:`~dissect.clfs.container.Container`.
+
+    The container is read through an :class:`AsyncReader` in aligned chunks of ``read_size`` bytes. While a log block
+    is awaited, the reads of the next ``readahead`` chunks in the direction of the walk are already in flight: towards
+    the start of the container for :meth:`records`, towards the end for :meth:`blocks` and :meth:`scan`.
+
+    Args:
+        reader: The reader of the container file.
+        offset: The offset to start parsing the container records.
+        read_size: The size of every read, a multiple of the sector size.
+        readahead: The number of chunks to read ahead.
+        strict: Whether log blocks with invalid sector signatures are rejected.
+        checksum: What to do with log blocks that have an invalid checksum (see
+                  :class:`~dissect.clfs.verify.ChecksumPolicy`), ``None`` to not verify the checksums.
+        max_records: The maximum number of records a single walk over the ``LsnPrevious`` chain may visit.
+        max_bytes: The maximum number of bytes of log blocks a single walk over the ``LsnPrevious`` chain may visit.
+        chain_policy: What to do when a walk over the ``LsnPrevious`` chain hits a corrupt link or one of its limits,
+                      see :class:`~dissect.clfs.chain.ChainPolicy`. The size of the container is unknown, so jumps are
+                      only checked against the largest possible offset.
+    """
+
+    def __init__(
+        self,
+        reader: AsyncReader,
+        offset: int,
+        read_size: int = DEFAULT_READ_SIZE,
+        readahead: int = DEFAULT_READAHEAD,
+        strict: bool = False,
+        checksum: ChecksumPolicy | str | None = None,
+        max_records: int | None = None,
+        max_bytes: int | None = None,
+        chain_policy: ChainPolicy | str = ChainPolicy.WARN,
+    ):
+        self.reader = reader
+        self.offset = offset
+        self.readahead = readahead
+        self.strict = strict
+        self.checksum = ChecksumPolicy(checksum) if checksum is not None else None
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.chain_policy = ChainPolicy(chain_policy)
+
+        self.cache = ChunkCache(reader, read_size, max_chunks=max(64, 4 * readahead))
+
+    async def block(self, offset: int) -> BlockHeader:
+        """Return the decoded log block at the given offset.
+
+        Raises:
+            InvalidRecordBlockError: If the log block is invalid, has invalid sectors in strict mode or an invalid
+                                     checksum with the ``skip`` checksum policy.
+            ChecksumError: If the log block has an invalid checksum with the ``raise`` checksum policy.
+        """
+        try:
+            header = LogBlockHeader.from_buffer(await self.cache.read(offset, LOG_BLOCK_HEADER_SIZE))
+            buf = await self.cache.read(offset, header.TotalSectors * SECTOR_SIZE)
+            log_block = BlockHeader.from_buffer(buf, offset, strict=self.strict)
+        except EOFError:
+            raise InvalidRecordBlockError("Invalid container block header, possibly corrupt/empty")
+
+        if self.checksum is not None and not check_block(log_block, self.checksum):
+            raise InvalidRecordBlockError(f"Invalid checksum of container block at offset {offset:#x}")
+
+        return log_block
+
+    async def _walk(
+        self, zero_copy: bool = False
+    ) -> AsyncIterator[tuple[int, RecordHeader, RecordHeader, bytes | memoryview, bytes | memoryview]]:
+        """Walk the chain of records backwards through ``LsnPrevious``, see :meth:`Container._walk`."""
+        log_block_offset = self.offset
+        if log_block_offset < 0 or log_block_offset % SECTOR_SIZE:
+            raise InvalidRecordBlockError("Invalid container block header, possibly corrupt/empty")
+
+        guard = ChainGuard(None, self.chain_policy, self.max_records, self.max_bytes)
+        while log_block_offset is not None and guard.visit(log_block_offset):
+            self.cache.prefetch(log_block_offset, self.readahead, backward=True)
+            log_block = await self.block(log_block_offset)
+            entry, log_block_offset = _walk_block(log_block, zero_copy=zero_copy)
+
+            _, start_header, next_header, _, _ = entry
+            if not guard.record(log_block, start_header):
+                break
+
+            yield entry
+
+            if log_block_offset is not None and not guard.jump(start_header, next_header):
+                break
+
+    async def records(
+        self, start_lsn: int | None = None, end_lsn: int | None = None, zero_copy: bool = False
+    ) -> AsyncIterator[tuple[int, bytes | memoryview, bytes | memoryview]]:
+        """Parse the records that are present within the log block, see :meth:`Container.records`.
+
+        Args:
+            start_lsn: The lowest LSN to yield (inclusive).
+            end_lsn: The highest LSN to yield (inclusive).
+            zero_copy: Whether to yield memoryview slices of the log blocks instead of copies of the data.
+        """
+        async for offset, start_header, _, record_data, block_data in self._walk(zero_copy):
+            if end_lsn is not None and start_header.LsnVirtual > end_lsn:
+                continue
+            if start_lsn is not None and start_header.LsnVirtual < start_lsn:
+                break
+            yield offset, record_data, block_data
+
+    async def chain(self) -> set[int]:
+        """Return the LSNs of all records that are reachable through the ``LsnPrevious`` chain."""
+        lsns = set()
+        async for _, start_header, next_header, _, _ in self._walk(zero_copy=True):
+            lsns.add(start_header.LsnVirtual)
+            lsns.add(next_header.LsnVirtual)
+        return lsns
+
+    async def blocks(self) -> AsyncIterator[BlockHeader]:
+        """Yield every log block in the container, from front to back, see :meth:`Container.blocks`."""
+        offset = 0
+        while True:
+            self.cache.prefetch(offset, self.readahead)
+
+            try:
+                header = LogBlockHeader.from_buffer(await self.cache.read(offset, LOG_BLOCK_HEADER_SIZE))
+            except EOFError:
+                # End of the container
+                break
+
+            size = header.TotalSectors * SECTOR_SIZE
+            if not size or len(await self.cache.read(offset, size)) < size:
+                offset += SECTOR_SIZE
+                continue
+
+            try:
+                log_block = await self.block(offset)
+            except InvalidRecordBlockError:
+                pass
+            else:
+                yield log_block
+
+            offset += size
+
+    async def scan(self, chain: bool = True) -> AsyncIterator[Record]:
+        """Scan all records in the container from front to back, see :meth:`Container.scan`.
+
+        Args:
+            chain: Whether to resolve the ``LsnPrevious`` chain first, to determine which records are live.
+        """
+        live = await self.chain() if chain else None
+
+        async for log_block in self.blocks():
+            for record in _scan_block(log_block, live):
+                yield record
+
+    def close(self) -> None:
+        """Cancel the reads that are still in flight."""
+        self.cache.close()
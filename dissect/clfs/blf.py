@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import cached_property
 from typing import TYPE_CHECKING, BinaryIO, NamedTuple
 
 from dissect.clfs.c_clfs import CLFS_CONTROL_RECORD_MAGIC_VALUE, BlockHeader, c_clfs
@@ -7,11 +8,34 @@ from dissect.clfs.exceptions import (
     InvalidBLFError,
     InvalidContextError,
     InvalidRecordBlockError,
+    InvalidSymbolTableError,
 )
+from dissect.clfs.mapped import BufferFile, MappedFile
+from dissect.clfs.metrics import MeteredReader, timer
+from dissect.clfs.pread import positional
+from dissect.clfs.verify import DEFAULT_CHUNK_SIZE, ChecksumPolicy, check_block, verify_blocks
 
 if TYPE_CHECKING:
+    import os
     from collections.abc import Iterator
 
+    from dissect.clfs.metrics import Metrics
+    from dissect.clfs.pread import Positional
+    from dissect.clfs.verify import VerifyResult
+
+
+def _utf16z(buf: bytes, offset: int) -> str:
+    """Decode the null-terminated UTF-16 string at the given offset of a buffer."""
+    end = buf.find(b"\x00\x00", offset)
+    # The terminator must be on a character boundary, skip matches spanning two characters
+    while end != -1 and (end - offset) % 2:
+        end = buf.find(b"\x00\x00", end + 1)
+
+    if end == -1:
+        raise InvalidSymbolTableError(f"Unterminated symbol name at offset {offset:#x}")
+
+    return buf[offset:end].decode("utf-16-le")
+
 
 class Context(NamedTuple):
     symbol_table: list
@@ -58,11 +82,12 @@ class ControlRecord:
     Args:
         fh: A file-like object to a BLF file.
         offset: Offset to start reading the control records.
+        metrics: Optional :class:`~dissect.clfs.metrics.Metrics` to count and time the reading and parsing.
     """
 
-    def __init__(self, fh: BinaryIO, offset: int):
+    def __init__(self, fh: BinaryIO, offset: int, metrics: Metrics | None = None):
         try:
-            self.logblock = BlockHeader(fh=fh, offset=offset)
+            self.logblock = BlockHeader(fh=fh, offset=offset, metrics=metrics)
         except (EOFError, AttributeError):
             raise InvalidRecordBlockError("Invalid control record block header, possibly corrupt/empty")
 
@@ -71,7 +96,8 @@ class ControlRecord:
         logblock_fh.seek(record_offest)
 
         try:
-            self.record = c_clfs.CLFS_CONTROL_RECORD(logblock_fh)
+            with timer(metrics, "parse"):
+                self.record = c_clfs.CLFS_CONTROL_RECORD(logblock_fh)
         except (EOFError, AttributeError):
             raise InvalidRecordBlockError("Invalid control record, possibly corrupt/empty")
 
@@ -97,16 +123,17 @@ class BaseRecord:
         fh: A file-like object to a BLF file.
         offset: Offset to start reading the base records.
         block_type: Type of CLFS block to parse.
+        metrics: Optional :class:`~dissect.clfs.metrics.Metrics` to count and time the reading and parsing.
     """
 
-    def __init__(self, fh: BinaryIO, offset: int, block_type: int):
+    def __init__(self, fh: BinaryIO, offset: int, block_type: int, metrics: Metrics | None = None):
         self.block_type = block_type
 
         self.containers = []
         self.streams = []
 
         try:
-            self.logblock = BlockHeader(fh=fh, offset=offset)
+            self.logblock = BlockHeader(fh=fh, offset=offset, metrics=metrics)
         except EOFError:
             raise InvalidRecordBlockError("Invalid base record block header, possibly corrupt/empty")
 
@@ -114,7 +141,8 @@ class BaseRecord:
         logblock_fh = self.logblock.open()
         logblock_fh.seek(record_offset)
 
-        self.record = c_clfs.CLFS_BASE_RECORD_HEADER(logblock_fh)
+        with timer(metrics, "parse"):
+            self.record = c_clfs.CLFS_BASE_RECORD_HEADER(logblock_fh)
 
         # Create the 3 contexts as a named tuple for more descriptive parsing
         contexts = [
@@ -132,13 +160,26 @@ class BaseRecord:
             ),
         ]
 
-        for ctx in contexts:
-            self._symbol_table(
-                sym_table=ctx.symbol_table, ctx_type=ctx.type, logblock_fh=logblock_fh, offset=record_offset
-            )
+        # The symbol names are decoded from a single copy of the (fixed up) block
+        block_data = self.logblock.data
+
+        with timer(metrics, "symbols"):
+            for ctx in contexts:
+                self._symbol_table(
+                    sym_table=ctx.symbol_table,
+                    ctx_type=ctx.type,
+                    logblock_fh=logblock_fh,
+                    offset=record_offset,
+                    block_data=block_data,
+                )
 
     def _symbol_table(
-        self, sym_table: list, ctx_type: c_clfs.CLFS_NODE_TYPE, logblock_fh: BinaryIO, offset: int
+        self,
+        sym_table: list,
+        ctx_type: c_clfs.CLFS_NODE_TYPE,
+        logblock_fh: BinaryIO,
+        offset: int,
+        block_data: bytes,
     ) -> None:
         """Function to parse the symbol tables.
 
@@ -148,6 +189,10 @@ class BaseRecord:
         The key takeaways from this structure are the symbol name which is the actualy container name the context is
         related to. This is also the name of the file on disk that is being used to write the log transaction to.
 
+        Every bucket of the symbol table is the root of a binary tree of symbols with the same hash bucket, linked
+        through the ``Below`` and ``Above`` offsets of the ClfsHashSym structure. All trees are walked completely, and
+        every symbol is only visited once, to protect against cyclic links in corrupt logs.
+
         For every stored context there is an offset noted in this structure that should be parsed seperately.
 
         Args:
@@ -155,23 +200,34 @@ class BaseRecord:
             ctx_type: Description of the type of context (CLIENT_CONTEXT, CONTAINER_CONTEXT, SHARED_SECURITY_CONTEXT).
             logblock_fh: A file-like object of the log block in which the symbol table resides.
             offset: Offset with start of the record.
+            block_data: The data of the log block in which the symbol table resides.
         """
-        for sym_tbl_offset in sym_table:
-            if sym_tbl_offset == 0:
+        # Walk the trees depth-first, in bucket order, visiting the nodes below a symbol before the nodes above it
+        stack = [sym_tbl_offset for sym_tbl_offset in reversed(sym_table) if sym_tbl_offset != 0]
+        visited = set()
+
+        while stack:
+            sym_tbl_offset = stack.pop()
+            if sym_tbl_offset in visited:
                 continue
+            visited.add(sym_tbl_offset)
 
             # Seek towards the start of the symbol table
             logblock_fh.seek(offset + sym_tbl_offset)
 
-            sym_tbl = c_clfs.CLFS_HASH_SYM(logblock_fh)
+            try:
+                sym_tbl = c_clfs.CLFS_HASH_SYM(logblock_fh)
+            except EOFError:
+                raise InvalidSymbolTableError(f"Symbol at offset {sym_tbl_offset:#x} is outside of the log block")
 
             if sym_tbl.NodeId.Type != c_clfs.CLFS_NODE_TYPE.SYMBOL:
                 raise InvalidContextError(f"Invalid NodeId type: {sym_tbl.NodeId.Type}")
 
+            stack.extend(link for link in (sym_tbl.Above, sym_tbl.Below) if link != 0)
+
             # It looks like the size of the symbol names is not stored anywhere and
             # simply read until a null-terminator is found...
-            logblock_fh.seek(offset + sym_tbl.SymbolName)
-            symbol_name = b"".join(iter(lambda: logblock_fh.read(2), b"\x00\x00")).decode("utf-16")
+            symbol_name = _utf16z(block_data, offset + sym_tbl.SymbolName)
 
             ctx_offset = offset + sym_tbl.Offset
 
@@ -281,11 +337,12 @@ class TruncateRecord:
     Args:
         fh: A file-like object to a BLF file.
         offset: Offset to start reading the truncate records.
+        metrics: Optional :class:`~dissect.clfs.metrics.Metrics` to count and time the reading and parsing.
     """
 
-    def __init__(self, fh: BinaryIO, offset: int):
+    def __init__(self, fh: BinaryIO, offset: int, metrics: Metrics | None = None):
         try:
-            self.logblock = BlockHeader(fh=fh, offset=offset)
+            self.logblock = BlockHeader(fh=fh, offset=offset, metrics=metrics)
         except EOFError:
             raise InvalidRecordBlockError("Invalid truncate record block header, possibly corrupt/empty")
 
@@ -293,7 +350,8 @@ class TruncateRecord:
         logblock_fh = self.logblock.open()
         logblock_fh.seek(record_offset)
 
-        self.record = c_clfs.CLFS_TRUNCATE_RECORD_HEADER(logblock_fh)
+        with timer(metrics, "parse"):
+            self.record = c_clfs.CLFS_TRUNCATE_RECORD_HEADER(logblock_fh)
 
         if self.record.ClientChangeOffset == 0:
             # CLFS_TRUNCATE_RECORD_HEADER = 16 bytes
@@ -305,49 +363,180 @@ class TruncateRecord:
 class BLF:
     """Main class of dissect.clfs. Parsing of BLF and information regarding the associated containers starts here.
 
+    Only the control record is parsed on construction. The other metadata blocks are read in a single coalesced read
+    and parsed on first access, after which they are memoized.
+
     Args:
         fh: A file-like object to a BLF file.
+        checksum: What to do with metadata blocks that have an invalid checksum (see
+                  :class:`~dissect.clfs.verify.ChecksumPolicy`), ``None`` to not verify the checksums. Skipped metadata
+                  blocks are left out of the control, base and truncate records.
+        metrics: Optional :class:`~dissect.clfs.metrics.Metrics` to count and time the reads, the decoding of the
+                 metadata blocks, the parsing of the metadata records and the walk over the symbol tables.
     """
 
-    def __init__(self, fh: BinaryIO):
+    def __init__(self, fh: BinaryIO, checksum: ChecksumPolicy | str | None = None, metrics: Metrics | None = None):
         self.fh = fh
+        self.checksum = ChecksumPolicy(checksum) if checksum is not None else None
+        self.metrics = metrics
 
-        self.c_record = ControlRecord(fh=self.fh, offset=0)
+        self.c_record = ControlRecord(fh=self.fh, offset=0, metrics=metrics)
 
         if not self.c_record.valid:
             raise InvalidBLFError("Invalid BLF file, possibly corrupt/empty")
 
+        if self.checksum is not None and not check_block(self.c_record.logblock, self.checksum):
+            raise InvalidBLFError("Invalid BLF file, invalid control record checksum")
+
         self.metablocks = self.c_record.record.RgBlocks
 
+        # Parsed records by the offset and type of their metadata block, so bounded by the entries of the control record
+        self._metablock_records_cache: dict[tuple[int, int], ControlRecord | BaseRecord | TruncateRecord | None] = {}
+        # Whether the file handle was opened by this BLF, see mmap()
+        self._owns_fh = False
+
+    @classmethod
+    def mmap(cls, path: str | os.PathLike | int, **kwargs) -> BLF:
+        """Open a BLF file through a copy-on-write memory mapping instead of regular file reads.
+
+        Args:
+            path: A path or an open file descriptor of the BLF file.
+        """
+        blf = cls(MappedFile(path), **kwargs)
+        blf._owns_fh = True
+        return blf
+
+    def close(self) -> None:
+        """Release the parsed metadata records, and close the memory mapping of a BLF opened with :meth:`mmap`.
+
+        Other file handles are left open, they're owned by the caller. The BLF can't be used after closing it.
+        """
+        self._metablock_records_cache.clear()
+        self.__dict__.pop("_metadata_fh", None)
+        self.__dict__.pop("base_record", None)
+        self.c_record = None
+        if self._owns_fh:
+            self.fh.close()
+
+    @cached_property
+    def _metadata_fh(self) -> BufferFile:
+        """A file-like object of all metadata blocks listed in the control record, read in a single coalesced read."""
+        if isinstance(self.fh, BufferFile):
+            return self.fh
+
+        end = max((metablock.Offset + metablock.ImageSize for metablock in self.metablocks), default=0)
+        end = min(end, self._reader.size)
+
+        buf = bytearray(end)
+        del buf[self._reader.readinto_at(buf, 0) :]
+
+        return BufferFile(buf)
+
+    @cached_property
+    def _reader(self) -> Positional:
+        """The positional reader of the BLF file, which counts and times the reads if there are metrics."""
+        reader = positional(self.fh)
+        # Blocks in a shared buffer aren't read, they're slices of the buffer
+        if self.metrics is not None and not isinstance(reader, BufferFile):
+            reader = MeteredReader(reader, self.metrics)
+        return reader
+
+    def _metablock_record(self, offset: int, block_type: int) -> ControlRecord | BaseRecord | TruncateRecord | None:
+        """Parse the record of the metadata block at the given offset, memoized per metadata block.
+
+        Returns ``None`` if the metadata block is skipped because of an invalid checksum.
+        """
+        key = (offset, block_type)
+        if key in self._metablock_records_cache:
+            return self._metablock_records_cache[key]
+
+        record = self._parse_metablock_record(offset, block_type)
+        if self.checksum is not None and not check_block(record.logblock, self.checksum):
+            record = None
+
+        self._metablock_records_cache[key] = record
+        return record
+
+    def _parse_metablock_record(self, offset: int, block_type: int) -> ControlRecord | BaseRecord | TruncateRecord:
+        if block_type in (
+            c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockControl,
+            c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockControlShadow,
+        ):
+            if offset == self.c_record.logblock.offset:
+                return self.c_record
+            return ControlRecord(fh=self._metadata_fh, offset=offset, metrics=self.metrics)
+
+        if block_type in (
+            c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockGeneral,
+            c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockGeneralShadow,
+        ):
+            return BaseRecord(fh=self._metadata_fh, offset=offset, block_type=block_type, metrics=self.metrics)
+
+        return TruncateRecord(fh=self._metadata_fh, offset=offset, metrics=self.metrics)
+
+    def _metablock_records(self, *block_types: int) -> Iterator[ControlRecord | BaseRecord | TruncateRecord]:
+        for metablock in self.metablocks:
+            if metablock.Type not in block_types:
+                continue
+
+            if (record := self._metablock_record(metablock.Offset, metablock.Type)) is not None:
+                yield record
+
     def control_records(self) -> Iterator[ControlRecord]:
         """Yield the associated control records."""
-        for metablock in self.metablocks:
-            if metablock.Type in (
-                c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockControl,
-                c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockControlShadow,
-            ):
-                yield ControlRecord(fh=self.fh, offset=metablock.Offset)
+        yield from self._metablock_records(
+            c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockControl,
+            c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockControlShadow,
+        )
 
     def base_records(self) -> Iterator[BaseRecord]:
         """Yield the associated base records.
 
         The base records hold most of the information regarding the parsing of the associated containers.
         """
-        for metablock in self.metablocks:
-            if metablock.Type in (
-                c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockGeneral,
-                c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockGeneralShadow,
-            ):
-                yield BaseRecord(fh=self.fh, offset=metablock.Offset, block_type=metablock.Type)
+        yield from self._metablock_records(
+            c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockGeneral,
+            c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockGeneralShadow,
+        )
 
     def truncate_records(self) -> Iterator[TruncateRecord]:
         """Yield the truncate records.
 
         This has not been encountered yet.
         """
-        for metablock in self.metablocks:
-            if metablock.Type in (
-                c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockScratch,
-                c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockScratchShadow,
-            ):
-                yield TruncateRecord(fh=self.fh, offset=metablock.Offset)
+        yield from self._metablock_records(
+            c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockScratch,
+            c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockScratchShadow,
+        )
+
+    @cached_property
+    def base_record(self) -> BaseRecord:
+        """The active base record, which is the most recently written one of the base record and its shadow."""
+        if not (base_records := list(self.base_records())):
+            raise InvalidBLFError("Invalid BLF file, no valid base record")
+        return max(base_records, key=lambda record: record.record.RecordHeader.DumpCount)
+
+    @property
+    def containers(self) -> list[Container]:
+        """The containers of the active base record."""
+        return self.base_record.containers
+
+    @property
+    def streams(self) -> list[Stream]:
+        """The streams of the active base record."""
+        return self.base_record.streams
+
+    def verify_all(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        policy: ChecksumPolicy | str = ChecksumPolicy.SKIP,
+    ) -> VerifyResult:
+        """Verify the checksums of all metadata blocks in the BLF file, without decoding them.
+
+        See :func:`~dissect.clfs.verify.verify_blocks`.
+
+        Args:
+            chunk_size: The number of bytes to read at once.
+            policy: What to do with metadata blocks that have an invalid checksum.
+        """
+        return verify_blocks(self._reader, chunk_size, policy)
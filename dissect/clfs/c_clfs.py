@@ -1,11 +1,24 @@
 from __future__ import annotations
 
 import io
-from typing import BinaryIO
+import struct
+import threading
+import zlib
+from functools import cached_property
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
 
 # External dependencies
 from dissect.cstruct import cstruct
 
+from dissect.clfs.exceptions import ChecksumError, TornBlockError
+from dissect.clfs.mapped import BufferFile
+from dissect.clfs.metrics import MeteredReader, timer
+from dissect.clfs.pread import positional
+
+if TYPE_CHECKING:
+    from dissect.clfs.metrics import Metrics
+    from dissect.clfs.pread import Positional
+
 clfs_def = """
 /* ======== Generic Windows ======== */
 flag FILE_ATTRIBUTES : USHORT {
@@ -303,36 +316,408 @@ c_clfs = cstruct().load(clfs_def)
 
 SECTOR_SIZE = 512
 CLFS_CONTROL_RECORD_MAGIC_VALUE = 0xC1F5C1F500005F1C
+# The MajorVersion of every log block header
+CLFS_LOG_BLOCK_MAJOR_VERSION = 0x15
+
+# Flags in the sector signature, the second to last byte of every sector of a log block
+SECTOR_BLOCK_BEGIN = 0x40
+SECTOR_BLOCK_END = 0x20
+
+# Translation table that keeps only the BEGIN and END flags of a sector signature
+_SECTOR_BLOCK_BOUNDS = bytes(flags & (SECTOR_BLOCK_BEGIN | SECTOR_BLOCK_END) for flags in range(256))
+
+
+# Precompiled decoders for the fixed-layout structures that are parsed for every block and every record. These return
+# lightweight objects with the same field names as their cstruct counterparts, which remain the reference definitions.
+_CLFS_LOG_BLOCK_HEADER = struct.Struct("<4B2H4I2Q16II")
+_RECORD_HEADER = struct.Struct("<3Q2I2HI")
+
+LOG_BLOCK_HEADER_SIZE = _CLFS_LOG_BLOCK_HEADER.size
+RECORD_HEADER_SIZE = _RECORD_HEADER.size
+
+# Offset of the Checksum field in CLFS_LOG_BLOCK_HEADER
+_CHECKSUM_OFFSET = 0x0C
+
+
+class LsnOffset(NamedTuple):
+    RecordIndex: int
+    ContainerId: int
+
+
+class Lsn(NamedTuple):
+    """Lightweight counterpart of ``CLFS_LSN``."""
+
+    PhysicalOffset: int
+
+    @property
+    def Offset(self) -> LsnOffset:
+        return LsnOffset(self.PhysicalOffset & 0xFFFFFFFF, self.PhysicalOffset >> 32)
+
+
+class LogBlockHeader(NamedTuple):
+    """Lightweight counterpart of ``CLFS_LOG_BLOCK_HEADER``, decoded with a precompiled ``struct.Struct``."""
+
+    MajorVersion: int
+    MinorVersion: int
+    Fixup: int
+    ClientId: int
+    TotalSectors: int
+    ValidSectors: int
+    Reserved1: int
+    Checksum: int
+    Flags: int
+    Reserved2: int
+    CurrentLsn: Lsn
+    NextLsn: Lsn
+    RecordOffsets: tuple[int, ...]
+    FixupOffset: int
+
+    @classmethod
+    def from_buffer(cls, buf: bytes | bytearray | memoryview, offset: int = 0) -> LogBlockHeader:
+        """Decode a log block header from ``buf`` at ``offset``."""
+        try:
+            fields = _CLFS_LOG_BLOCK_HEADER.unpack_from(buf, offset)
+        except struct.error:
+            raise EOFError("Not enough data for CLFS_LOG_BLOCK_HEADER")
+
+        return cls(*fields[:10], Lsn(fields[10]), Lsn(fields[11]), fields[12:28], fields[28])
+
+    @classmethod
+    def read(cls, fh: BinaryIO) -> LogBlockHeader:
+        """Decode a log block header from the current position of ``fh``."""
+        return cls.from_buffer(fh.read(_CLFS_LOG_BLOCK_HEADER.size))
+
+    def dumps(self) -> bytes:
+        """Encode the log block header."""
+        return _CLFS_LOG_BLOCK_HEADER.pack(
+            *self[:10],
+            self.CurrentLsn.PhysicalOffset,
+            self.NextLsn.PhysicalOffset,
+            *self.RecordOffsets,
+            self.FixupOffset,
+        )
+
+
+class RecordHeader(NamedTuple):
+    """Lightweight counterpart of ``RECORD_HEADER``, decoded with a precompiled ``struct.Struct``."""
+
+    LsnVirtual: int
+    LsnUndoNext: int
+    LsnPrevious: int
+    DataSize: int
+    Unknown: int
+    RecordFlags: int
+    Offset: int
+    Type: int
+
+    @classmethod
+    def from_buffer(cls, buf: bytes | bytearray | memoryview, offset: int = 0) -> RecordHeader:
+        """Decode a record header from ``buf`` at ``offset``."""
+        try:
+            return cls._make(_RECORD_HEADER.unpack_from(buf, offset))
+        except struct.error:
+            raise EOFError("Not enough data for RECORD_HEADER")
+
+    @classmethod
+    def read(cls, fh: BinaryIO) -> RecordHeader:
+        """Decode a record header from the current position of ``fh``."""
+        return cls.from_buffer(fh.read(_RECORD_HEADER.size))
+
+    def dumps(self) -> bytes:
+        """Encode the record header."""
+        return _RECORD_HEADER.pack(*self)
+
+
+class SectorError(NamedTuple):
+    """A sector of a log block with an invalid signature.
+
+    Attributes:
+        sector: The index of the sector in the log block.
+        flags: The flags byte of the sector signature.
+        usn: The update sequence number of the sector signature.
+        reason: Why the sector is invalid: ``"unwritten"`` if the signature is empty, ``"torn"`` if the update sequence
+                number doesn't match the one of the log block, or ``"bounds"`` if the BEGIN/END flags are incorrect.
+    """
 
+    sector: int
+    flags: int
+    usn: int
+    reason: str
 
-class BlockHeader:
-    """Main class to parse the block headers.
+
+def block_checksum(buf: bytes | bytearray | memoryview) -> int:
+    """Return the checksum of a raw log block, as it's stored on disk before the sector fixups are applied.
+
+    The checksum is the CRC32 of the entire block, with the ``Checksum`` field of the block header set to zero.
+    """
+    view = memoryview(buf)
+    crc = zlib.crc32(view[:_CHECKSUM_OFFSET])
+    crc = zlib.crc32(b"\x00\x00\x00\x00", crc)
+    return zlib.crc32(view[_CHECKSUM_OFFSET + 4 :], crc)
+
+
+def _expected_bounds(count: int) -> bytes:
+    """Return the expected BEGIN/END flags of the sector signatures of a log block with ``count`` sectors."""
+    if count == 1:
+        return bytes([SECTOR_BLOCK_BEGIN | SECTOR_BLOCK_END])
+    return bytes([SECTOR_BLOCK_BEGIN]) + bytes(count - 2) + bytes([SECTOR_BLOCK_END])
+
+
+class BlockReader:
+    """Cursor-based file-like reader over a memoryview of a log block.
+
+    Contrary to ``io.BytesIO`` this does not copy the underlying buffer. Small reads (used for structure parsing)
+    return ``bytes``, :meth:`read_view` returns a ``memoryview`` slice of the block without copying.
 
     Args:
-        fh: A file-like object.
-        offset: Offset to start reading the block header from.
+        view: The memoryview to read from.
     """
 
-    def __init__(self, fh: BinaryIO, offset: int):
-        self.offset = offset
+    def __init__(self, view: memoryview):
+        self.view = view
+        self.pos = 0
 
-        fh.seek(self.offset)
-        self.header = c_clfs.CLFS_LOG_BLOCK_HEADER(fh)
+    def read(self, size: int = -1) -> bytes:
+        return bytes(self.read_view(size))
 
-        fh.seek(self.offset)
-        data = bytearray(fh.read(self.header.TotalSectors * SECTOR_SIZE))
-        view = memoryview(data)
+    def read_view(self, size: int = -1) -> memoryview:
+        """Read ``size`` bytes from the current position as a memoryview slice of the block."""
+        end = len(self.view) if size is None or size < 0 else min(self.pos + size, len(self.view))
+        view = self.view[self.pos : end]
+        self.pos = max(self.pos, end)
+        return view
 
-        fixup = view[self.header.FixupOffset :]
-        ptr = view[SECTOR_SIZE - 2 :]
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += len(self.view)
 
-        for _ in range(self.header.TotalSectors):
-            ptr[:2] = fixup[:2]
-            fixup = fixup[2:]
-            ptr = ptr[SECTOR_SIZE:]
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
 
-        self.data = bytes(data)
+        self.pos = offset
+        return self.pos
 
-    def open(self) -> io.BytesIO:
+    def tell(self) -> int:
+        return self.pos
+
+
+class BlockHeader:
+    """Main class to parse the block headers.
+
+    The block is read once into a single buffer. The sector fixups are applied in place, lazily, the first time the
+    block data is accessed, so parsing only the header never touches the rest of the block.
+
+    Before the fixups are applied, the signature at the end of every sector is checked: the update sequence number must
+    match the ``Fixup`` of the block header, and only the first and last sector carry the BEGIN and END flags. Invalid
+    sectors, e.g. from a torn write, are listed in :attr:`sector_errors`. In strict mode they raise a
+    :class:`~dissect.clfs.exceptions.TornBlockError` instead.
+
+    The ``Checksum`` in the block header is not verified by default, see :attr:`checksum_valid`.
+
+    If ``fh`` is a :class:`~dissect.clfs.mapped.BufferFile`, such as a copy-on-write
+    :class:`~dissect.clfs.mapped.MappedFile`, nothing is read at all: the block is a slice of the buffer and the fixups
+    are applied to the buffer itself, once per block. Otherwise the block is read with a positional read (see
+    :mod:`dissect.clfs.pread`), so the file position of ``fh`` is never used. A block can be shared by many threads.
+
+    Args:
+        fh: A file-like object.
+        offset: Offset to start reading the block header from.
+        strict: Whether to raise an exception for sectors with an invalid signature.
+        verify_checksum: Whether to raise an exception if the checksum of the block is invalid.
+        metrics: Optional :class:`~dissect.clfs.metrics.Metrics` to count and time the reads, decoding and fixups.
+    """
+
+    def __init__(
+        self,
+        fh: BinaryIO | BufferFile | Positional,
+        offset: int,
+        strict: bool = False,
+        verify_checksum: bool = False,
+        metrics: Metrics | None = None,
+    ):
+        self.offset = offset
+        self._buffer = fh if isinstance(fh, BufferFile) else None
+        self._lock = fh.lock if self._buffer is not None else threading.Lock()
+        self._metrics = metrics
+
+        if self._buffer is not None:
+            self.header = LogBlockHeader.from_buffer(fh.view, offset)
+
+            size = self.header.TotalSectors * SECTOR_SIZE
+            if offset + size > fh.size:
+                raise EOFError(f"Log block at offset {offset:#x} extends beyond the end of the file")
+
+            self.buf = fh.view[offset : offset + size]
+            self._view = self.buf
+        else:
+            reader = positional(fh)
+            if metrics is not None and not isinstance(reader, MeteredReader):
+                reader = MeteredReader(reader, metrics)
+
+            raw_header = reader.read_at(offset, _CLFS_LOG_BLOCK_HEADER.size)
+            self.header = LogBlockHeader.from_buffer(raw_header)
+
+            size = self.header.TotalSectors * SECTOR_SIZE
+            self.buf = bytearray(size)
+            self._view = memoryview(self.buf)
+
+            header_size = min(len(raw_header), size)
+            self._view[:header_size] = raw_header[:header_size]
+            if reader.readinto_at(self._view[header_size:], offset + header_size) != size - header_size:
+                raise EOFError(f"Log block at offset {offset:#x} extends beyond the end of the file")
+
+        self._decode(strict, verify_checksum)
+
+    @classmethod
+    def from_buffer(
+        cls,
+        buf: bytearray | memoryview,
+        offset: int,
+        strict: bool = False,
+        verify_checksum: bool = False,
+        metrics: Metrics | None = None,
+    ) -> BlockHeader:
+        """Decode a log block that was read by the caller, e.g. through an asynchronous read.
+
+        Args:
+            buf: A writable buffer starting with the log block, the fixups are applied to it in place.
+            offset: The offset of the log block in the file.
+            strict: Whether to raise an exception for sectors with an invalid signature.
+            verify_checksum: Whether to raise an exception if the checksum of the block is invalid.
+            metrics: Optional :class:`~dissect.clfs.metrics.Metrics` to count and time the decoding and fixups.
+        """
+        self = cls.__new__(cls)
+        self.offset = offset
+        self._buffer = None
+        self._lock = threading.Lock()
+        self._metrics = metrics
+        self.header = LogBlockHeader.from_buffer(buf)
+
+        size = self.header.TotalSectors * SECTOR_SIZE
+        if len(buf) < size:
+            raise EOFError(f"Log block at offset {offset:#x} extends beyond the end of the file")
+
+        self.buf = self._view = memoryview(buf)[:size]
+        self._decode(strict, verify_checksum)
+        return self
+
+    def _decode(self, strict: bool, verify_checksum: bool) -> None:
+        """Check the fixup offset and the sector signatures of the block, and optionally its checksum."""
+        offset = self.offset
+        if self.header.TotalSectors and self.header.FixupOffset + 2 * self.header.TotalSectors > len(self._view):
+            raise EOFError(f"Invalid fixup offset in log block at offset {offset:#x}")
+
+        if self._metrics is not None:
+            self._metrics.add("blocks_decoded")
+
+        with timer(self._metrics, "decode"), self._lock:
+            # The sector signatures of a block in a shared buffer are gone once it's fixed up, so use the earlier result
+            if self._buffer is not None and offset in self._buffer.fixed_up:
+                self._signatures, self.sector_errors = self._buffer.fixed_up[offset]
+                self._fixed_up = True
+            else:
+                self._signatures = (
+                    bytes(self._view[SECTOR_SIZE - 2 :: SECTOR_SIZE]),
+                    bytes(self._view[SECTOR_SIZE - 1 :: SECTOR_SIZE]),
+                )
+                self.sector_errors = self._check_sectors()
+                self._fixed_up = False
+
+        if strict and self.sector_errors:
+            sectors = ", ".join(f"{error.sector} ({error.reason})" for error in self.sector_errors)
+            raise TornBlockError(f"Log block at offset {offset:#x} has invalid sectors: {sectors}")
+
+        if verify_checksum and not self.checksum_valid:
+            raise ChecksumError(
+                f"Log block at offset {offset:#x} has an invalid checksum: "
+                f"{self.header.Checksum:#010x} != {self.checksum:#010x}"
+            )
+
+    def _check_sectors(self) -> tuple[SectorError, ...]:
+        """Check the signatures at the end of every sector, before the fixups are applied."""
+        count = self.header.TotalSectors
+        if not count:
+            return ()
+
+        flags, usns = self._signatures
+        bounds = flags.translate(_SECTOR_BLOCK_BOUNDS)
+        expected_bounds = _expected_bounds(count)
+
+        if usns.count(self.header.Fixup) == count and bounds == expected_bounds:
+            return ()
+
+        errors = []
+        for sector in range(count):
+            if flags[sector] == usns[sector] == 0:
+                reason = "unwritten"
+            elif usns[sector] != self.header.Fixup:
+                reason = "torn"
+            elif bounds[sector] != expected_bounds[sector]:
+                reason = "bounds"
+            else:
+                continue
+
+            errors.append(SectorError(sector, flags[sector], usns[sector], reason))
+
+        return tuple(errors)
+
+    def _is_fixed_up(self) -> bool:
+        return self._fixed_up or (self._buffer is not None and self.offset in self._buffer.fixed_up)
+
+    def _fixup(self) -> None:
+        """Restore the last two bytes of every sector from the fixup array."""
+        with timer(self._metrics, "fixup"), self._lock:
+            if not self._is_fixed_up():
+                if self._metrics is not None:
+                    self._metrics.add("fixups")
+
+                fixup = self.header.FixupOffset
+                fixups = bytes(self._view[fixup : fixup + 2 * self.header.TotalSectors])
+
+                self._view[SECTOR_SIZE - 2 :: SECTOR_SIZE] = fixups[0::2]
+                self._view[SECTOR_SIZE - 1 :: SECTOR_SIZE] = fixups[1::2]
+
+                if self._buffer is not None:
+                    self._buffer.fixed_up[self.offset] = (self._signatures, self.sector_errors)
+
+            self._fixed_up = True
+
+    @cached_property
+    def checksum(self) -> int:
+        """The checksum of the raw block data, to compare with the ``Checksum`` in the block header."""
+        with timer(self._metrics, "checksum"):
+            return self._checksum()
+
+    def _checksum(self) -> int:
+        # The fixups may be applied by another thread, or by another block of the same shared buffer
+        with self._lock:
+            if not self._is_fixed_up():
+                return block_checksum(self._view)
+
+        # Undo the fixups on a copy of the block
+        raw = bytearray(self._view)
+        raw[SECTOR_SIZE - 2 :: SECTOR_SIZE], raw[SECTOR_SIZE - 1 :: SECTOR_SIZE] = self._signatures
+        return block_checksum(raw)
+
+    @property
+    def checksum_valid(self) -> bool:
+        """Whether the checksum of the block matches the block header, blocks without a checksum are valid."""
+        return not self.header.Checksum or self.checksum == self.header.Checksum
+
+    @property
+    def view(self) -> memoryview:
+        """Return a memoryview of the fixed up block data."""
+        if not self._fixed_up:
+            self._fixup()
+        return self._view
+
+    @property
+    def data(self) -> bytes:
+        """Return a copy of the fixed up block data."""
+        return bytes(self.view)
+
+    def open(self) -> BlockReader:
         """Return a file-like object of the block header."""
-        return io.BytesIO(self.data)
+        return BlockReader(self.view)
@@ -0,0 +1,136 @@
+"""Bounds on walks over the ``LsnPrevious`` chain of a container, so corrupt or crafted chains can't stall a walk.
+
+A walk follows the ``LsnPrevious`` of every start record to the previous log block. Every step of a walk is checked by
+a :class:`ChainGuard`:
+
+- a jump must land on a sector within the container, and must go back to a lower LSN;
+- every log block is visited only once, which is tracked in a bitmap with a bit per sector of the container;
+- the start records must have strictly decreasing LSNs;
+- the number of records and the number of bytes of log blocks visited can be limited.
+
+This makes the worst-case cost of a walk linear in the size of the container.
+
+In a circular log, the oldest record on the chain links to a log block that has since been overwritten by a newer one.
+That is recognized by the container id part of the LSN of the linked start record: it is incremented every time the log
+wraps around, so an overwritten log block has a higher one than the record that links to it. Such a link is the normal
+end of the chain and ends the walk silently. Any other link back to a log block that is not older, or that was already
+visited, is a loop in the chain. Loops, links out of the container and exceeded limits are handled by the
+:class:`ChainPolicy`.
+
+Only the jumps are checked against the policy. An invalid offset to start a walk at is an invalid log block, which is
+checked before the walk starts.
+"""
+
+from __future__ import annotations
+
+import logging
+from enum import Enum
+from typing import TYPE_CHECKING
+
+from dissect.clfs.c_clfs import SECTOR_SIZE
+from dissect.clfs.exceptions import ChainError, TraversalLimitError
+
+if TYPE_CHECKING:
+    from dissect.clfs.c_clfs import BlockHeader, RecordHeader
+
+log = logging.getLogger(__name__)
+
+# The offset part of an LSN is 32 bits, which bounds the containers of unknown size
+MAX_OFFSET = 1 << 32
+
+
+class ChainPolicy(Enum):
+    """What to do when a walk over the ``LsnPrevious`` chain hits a corrupt link or one of its limits."""
+
+    STOP = "stop"
+    """End the walk after the last valid record, without any further notice."""
+    WARN = "warn"
+    """Log a warning and end the walk after the last valid record."""
+    RAISE = "raise"
+    """Raise a :class:`~dissect.clfs.exceptions.ChainError` or :class:`~dissect.clfs.exceptions.TraversalLimitError`."""
+
+
+class ChainGuard:
+    """The checks and limits of a single walk over the ``LsnPrevious`` chain.
+
+    Args:
+        size: The size of the container, ``None`` if unknown, in which case jumps are only checked against the largest
+              possible offset.
+        policy: What to do with a corrupt link or an exceeded limit.
+        max_records: The maximum number of records to walk.
+        max_bytes: The maximum number of bytes of log blocks to walk.
+    """
+
+    def __init__(
+        self,
+        size: int | None,
+        policy: ChainPolicy | str = ChainPolicy.WARN,
+        max_records: int | None = None,
+        max_bytes: int | None = None,
+    ):
+        self.size = size if size is not None else MAX_OFFSET
+        self.policy = ChainPolicy(policy)
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+
+        # A bit per sector, grown on demand if the size is unknown
+        self.visited = bytearray((size or 0) // SECTOR_SIZE // 8 + 1)
+        self.records = 0
+        self.bytes = 0
+        self.lsn = None
+
+    def _fail(self, error: type[ChainError | TraversalLimitError], message: str) -> bool:
+        if self.policy is ChainPolicy.RAISE:
+            raise error(message)
+
+        if self.policy is ChainPolicy.WARN:
+            log.warning(message)
+
+        return False
+
+    def visit(self, offset: int) -> bool:
+        """Check the offset of the next log block on the chain, return whether the walk may continue there."""
+        if offset < 0 or offset % SECTOR_SIZE or offset >= self.size:
+            return self._fail(ChainError, f"Chain links to invalid log block offset {offset:#x}")
+        return True
+
+    def record(self, log_block: BlockHeader, start_header: RecordHeader) -> bool:
+        """Check the start record of a log block on the chain, return whether it may be used."""
+        lsn = start_header.LsnVirtual
+        if self.lsn is not None and lsn >= self.lsn:
+            if lsn >> 32 > self.lsn >> 32:
+                # The linked log block has been overwritten after the log wrapped around
+                return False
+            return self._fail(
+                ChainError, f"Chain loops back to log block at offset {log_block.offset:#x} with LSN {lsn:#x}"
+            )
+
+        idx, bit = divmod(log_block.offset // SECTOR_SIZE, 8)
+        if idx >= len(self.visited):
+            self.visited.extend(bytes(idx + 1 - len(self.visited)))
+
+        if self.visited[idx] & (1 << bit):
+            return self._fail(ChainError, f"Chain loops back to visited log block at offset {log_block.offset:#x}")
+
+        self.visited[idx] |= 1 << bit
+        self.lsn = lsn
+
+        self.records += 1
+        if self.max_records is not None and self.records > self.max_records:
+            return self._fail(TraversalLimitError, f"Walk exceeds the limit of {self.max_records} records")
+
+        self.bytes += log_block.header.TotalSectors * SECTOR_SIZE
+        if self.max_bytes is not None and self.bytes > self.max_bytes:
+            return self._fail(TraversalLimitError, f"Walk exceeds the limit of {self.max_bytes} bytes")
+
+        return True
+
+    def jump(self, start_header: RecordHeader, next_header: RecordHeader) -> bool:
+        """Check the ``LsnPrevious`` link of a start record, return whether the walk may follow it."""
+        if next_header.LsnPrevious >= start_header.LsnVirtual:
+            return self._fail(
+                ChainError,
+                f"Record with LSN {start_header.LsnVirtual:#x} links to the non-decreasing LSN "
+                f"{next_header.LsnPrevious:#x}",
+            )
+        return True
@@ -1,55 +1,888 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, BinaryIO
+import os
+import struct
+import threading
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
 
-from dissect.clfs.c_clfs import BlockHeader, c_clfs
-from dissect.clfs.exceptions import InvalidRecordBlockError
+from dissect.clfs.c_clfs import (
+    LOG_BLOCK_HEADER_SIZE,
+    RECORD_HEADER_SIZE,
+    SECTOR_SIZE,
+    BlockHeader,
+    BlockReader,
+    LogBlockHeader,
+    RecordHeader,
+    c_clfs,
+)
+from dissect.clfs.chain import ChainGuard, ChainPolicy
+from dissect.clfs.exceptions import InvalidIndexError, InvalidRecordBlockError
+from dissect.clfs.index import BlockDirectory, RecordIndex
+from dissect.clfs.mapped import BufferFile, MappedFile
+from dissect.clfs.metrics import MeteredReader
+from dissect.clfs.pread import positional
+from dissect.clfs.verify import DEFAULT_CHUNK_SIZE, ChecksumPolicy, check_block, verify_blocks
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
+    from collections.abc import Callable, Iterator
+
+    import numpy as np
+
+    from dissect.clfs.metrics import Metrics
+    from dissect.clfs.verify import VerifyResult
+
+# DataSize, Offset and Type of a record header, which is all that's needed to step through the records of a block
+_RECORD_HEADER_STEP = struct.Struct("<24xI6xHI")
+
+# The on-disk layout of CLFS_LOG_RECORD_HEADER, as a NumPy dtype specification
+RECORD_HEADER_FIELDS = [
+    ("LsnVirtual", "<u8"),
+    ("LsnUndoNext", "<u8"),
+    ("LsnPrevious", "<u8"),
+    ("DataSize", "<u4"),
+    ("Unknown", "<u4"),
+    ("RecordFlags", "<u2"),
+    ("Offset", "<u2"),
+    ("Type", "<u4"),
+]
+
+# The columns of Container.header_table(), as a NumPy dtype specification
+HEADER_TABLE_FIELDS = [
+    ("LsnVirtual", "<u8"),
+    ("LsnUndoNext", "<u8"),
+    ("LsnPrevious", "<u8"),
+    ("DataSize", "<u4"),
+    ("RecordFlags", "<u2"),
+    ("Offset", "<u2"),
+    ("Type", "<u4"),
+    ("FileOffset", "<u8"),
+]
+
+
+class Record(NamedTuple):
+    """A single record as found by a sequential scan of a container.
+
+    Attributes:
+        lsn: The LSN of the record.
+        block_offset: The offset of the log block in the container.
+        offset: The offset of the record header in the log block.
+        header: The record header.
+        data: The record data following the header.
+        live: Whether the record is reachable through the ``LsnPrevious`` chain, ``None`` if not resolved.
+    """
+
+    lsn: int
+    block_offset: int
+    offset: int
+    header: RecordHeader
+    data: bytes
+    live: bool | None
+
+
+class RecordHandle(NamedTuple):
+    """A record found by :meth:`Container.select`, of which the data is only read when it's accessed.
+
+    Attributes:
+        container: The container holding the record.
+        block_offset: The offset of the log block in the container.
+        offset: The offset of the record header in the log block.
+        header: The record header.
+    """
+
+    container: Container
+    block_offset: int
+    offset: int
+    header: RecordHeader
+
+    @property
+    def lsn(self) -> int:
+        """The LSN of the record."""
+        return self.header.LsnVirtual
+
+    @property
+    def data(self) -> bytes:
+        """The record data following the header, read on access."""
+        return self.read()
+
+    def read(self, zero_copy: bool = False) -> bytes | memoryview:
+        """Read the record data following the header.
+
+        The log block is read and decoded through the block cache of the container.
+
+        Args:
+            zero_copy: Whether to return a read-only memoryview slice of the log block instead of a copy of the data,
+                       see :meth:`Container.records`.
+        """
+        view = self.container.block(self.block_offset).view
+        data = view[self.offset + self.header.Offset : self.offset + self.header.DataSize]
+        return data.toreadonly() if zero_copy else bytes(data)
+
+    def to_record(self, live: bool | None = None) -> Record:
+        """Read the record data and return it as a :class:`Record`."""
+        return Record(self.lsn, self.block_offset, self.offset, self.header, self.read(), live)
+
+
+class CacheInfo(NamedTuple):
+    """The statistics of the block cache of a container, like those of :func:`functools.lru_cache`.
+
+    Attributes:
+        hits: The number of lookups that were served from the cache.
+        misses: The number of lookups that had to read and decode the log block.
+        maxsize: The maximum number of log blocks in the cache.
+        currsize: The current number of log blocks in the cache.
+    """
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
 
 
 class Container:
     """Main class for parsing the containers that belong to a BLF file parsed in an earlier stage.
 
+    Decoded log blocks are kept in a bounded LRU cache that is shared by every walk over this container, so each
+    block is only read and fixed up once as long as it stays in the cache. The cache statistics (hits, misses, size)
+    are available through :meth:`cache_info`, and :meth:`close` releases the cached blocks.
+
     Args:
         fh: A file handle to a container file.
         offset: The offset to start parsing the container records.
+        block_cache_size: The maximum number of decoded log blocks to keep in the cache.
+        index: An optional :class:`~dissect.clfs.index.RecordIndex` of the container, to speed up LSN lookups.
+        strict: Whether log blocks with invalid sector signatures are rejected, instead of only reported in their
+                :attr:`~dissect.clfs.c_clfs.BlockHeader.sector_errors`.
+        checksum: What to do with log blocks that have an invalid checksum (see
+                  :class:`~dissect.clfs.verify.ChecksumPolicy`), ``None`` to not verify the checksums. Skipped log
+                  blocks are treated as invalid blocks.
+        metrics: Optional :class:`~dissect.clfs.metrics.Metrics` to count the reads, block cache lookups, decoded log
+                 blocks and yielded records, and to time the phases.
+        max_records: The maximum number of records a single walk over the ``LsnPrevious`` chain may visit.
+        max_bytes: The maximum number of bytes of log blocks a single walk over the ``LsnPrevious`` chain may visit.
+        chain_policy: What to do when a walk over the ``LsnPrevious`` chain hits a corrupt link (a jump out of the
+                      container or to a non-decreasing LSN) or one of its limits, see
+                      :class:`~dissect.clfs.chain.ChainPolicy`.
     """
 
-    def __init__(self, fh: BinaryIO, offset: int):
+    def __init__(
+        self,
+        fh: BinaryIO,
+        offset: int,
+        block_cache_size: int = 1024,
+        index: RecordIndex | None = None,
+        strict: bool = False,
+        checksum: ChecksumPolicy | str | None = None,
+        metrics: Metrics | None = None,
+        max_records: int | None = None,
+        max_bytes: int | None = None,
+        chain_policy: ChainPolicy | str = ChainPolicy.WARN,
+    ):
         self.fh = fh
+        self.reader = positional(fh)
         self.offset = offset
+        self.index = index
+        self.strict = strict
+        self.checksum = ChecksumPolicy(checksum) if checksum is not None else None
+        self.metrics = metrics
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.chain_policy = ChainPolicy(chain_policy)
+        self.directory: BlockDirectory | None = None
+
+        # Decoded log blocks by offset, from least to most recently used
+        self.block_cache_size = block_cache_size
+        self._blocks: OrderedDict[int, BlockHeader] = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_lock = threading.Lock()
+        # Whether the file handle was opened by this container, see mmap()
+        self._owns_fh = False
 
-    def _open_block(self, offset: int) -> tuple[BinaryIO, int]:
-        """Open the blockheader of every block that is present within the given container.
+        # Blocks in a shared buffer aren't read, they're slices of the buffer
+        if metrics is not None and not isinstance(self.reader, BufferFile):
+            self.reader = MeteredReader(self.reader, metrics)
 
-        Returns:
-            buf, cur_record_offset: Tuple containing a file-like object of the log block and the current offset.
+    @classmethod
+    def mmap(cls, path: str | os.PathLike | int, offset: int, **kwargs) -> Container:
+        """Open a container through a copy-on-write memory mapping instead of regular file reads.
+
+        Args:
+            path: A path or an open file descriptor of the container file.
+            offset: The offset to start parsing the container records.
         """
+        container = cls(MappedFile(path), offset, **kwargs)
+        container._owns_fh = True
+        return container
+
+    def close(self) -> None:
+        """Release the block cache, and close the memory mapping of a container opened with :meth:`mmap`.
+
+        Other file handles are left open, they're owned by the caller.
+        """
+        self.cache_clear()
+        if self._owns_fh:
+            self.fh.close()
+
+    @property
+    def size(self) -> int:
+        """The size of the container file, which is determined on every access, as the container may still grow."""
+        return self.reader.size
+
+    def block(self, offset: int) -> BlockHeader:
+        """Return the decoded log block at the given offset, from the block cache if it's there.
+
+        Args:
+            offset: Offset of the log block within the container.
+
+        Raises:
+            InvalidRecordBlockError: If the log block is invalid, has invalid sectors in strict mode or an invalid
+                                     checksum with the ``skip`` checksum policy.
+            ChecksumError: If the log block has an invalid checksum with the ``raise`` checksum policy.
+        """
+        if self.metrics is not None:
+            self.metrics.add("cache_lookups")
+
+        with self._cache_lock:
+            if (log_block := self._blocks.get(offset)) is not None:
+                self._blocks.move_to_end(offset)
+                self._cache_hits += 1
+                return log_block
+            self._cache_misses += 1
+
+        log_block = self._read_block(offset)
+
+        if self.block_cache_size > 0:
+            with self._cache_lock:
+                self._blocks[offset] = log_block
+                self._blocks.move_to_end(offset)
+                while len(self._blocks) > self.block_cache_size:
+                    self._blocks.popitem(last=False)
+
+        return log_block
+
+    def cache_info(self) -> CacheInfo:
+        """Return the statistics of the block cache."""
+        with self._cache_lock:
+            return CacheInfo(self._cache_hits, self._cache_misses, self.block_cache_size, len(self._blocks))
+
+    def cache_clear(self) -> None:
+        """Drop all log blocks from the block cache and reset its statistics."""
+        with self._cache_lock:
+            self._blocks.clear()
+            self._cache_hits = self._cache_misses = 0
+
+    def _read_block(self, offset: int) -> BlockHeader:
+        """Read and decode the log block at the given offset, bypassing the block cache."""
+        if self.metrics is not None:
+            self.metrics.add("cache_misses")
+
         try:
-            log_block = BlockHeader(fh=self.fh, offset=offset)
+            log_block = BlockHeader(fh=self.reader, offset=offset, strict=self.strict, metrics=self.metrics)
         except EOFError:
             raise InvalidRecordBlockError("Invalid container block header, possibly corrupt/empty")
 
-        cur_record_offset = log_block.header.RecordOffsets[0]
+        if self.checksum is not None and not check_block(log_block, self.checksum):
+            raise InvalidRecordBlockError(f"Invalid checksum of container block at offset {offset:#x}")
+
+        return log_block
+
+    def _walk(
+        self, block_offset: int | None = None, record_offset: int | None = None, zero_copy: bool = False
+    ) -> Iterator[tuple[int, RecordHeader, RecordHeader, bytes | memoryview, bytes | memoryview]]:
+        """Walk the chain of records backwards through ``LsnPrevious``.
+
+        Every step is checked by a :class:`~dissect.clfs.chain.ChainGuard`, so every log block is visited at most once
+        and the walk ends (or raises, depending on the chain policy) at a corrupt link or at one of the limits.
+
+        Args:
+            block_offset: Offset of the log block to start at, defaults to the container offset.
+            record_offset: Offset of the record to start at, defaults to the first record in the block.
+            zero_copy: Whether to return the record and block data as memoryview slices of the log block.
+
+        Yields:
+            The offset of the start record, the start record header, the record header following it, the record data
+            and the block data.
+
+        Raises:
+            InvalidRecordBlockError: If the log block to start at is invalid.
+        """
+        log_block_offset = self.offset if block_offset is None else block_offset
+        size = self.size
+        if log_block_offset < 0 or log_block_offset % SECTOR_SIZE or log_block_offset >= size:
+            raise InvalidRecordBlockError("Invalid container block header, possibly corrupt/empty")
+
+        guard = ChainGuard(size, self.chain_policy, self.max_records, self.max_bytes)
+        while log_block_offset is not None and guard.visit(log_block_offset):
+            log_block = self.block(log_block_offset)
+            entry, log_block_offset = _walk_block(log_block, record_offset, zero_copy)
+            record_offset = None
+
+            _, start_header, next_header, _, _ = entry
+            if not guard.record(log_block, start_header):
+                break
+
+            yield entry
+
+            if log_block_offset is not None and not guard.jump(start_header, next_header):
+                break
+
+    def records(
+        self, start_lsn: int | None = None, end_lsn: int | None = None, zero_copy: bool = False
+    ) -> Iterator[tuple[int, bytes | memoryview, bytes | memoryview]]:
+        """Parse the records that are present within the log block.
+
+        The records are yielded from the most recent to the oldest. If an LSN range is given, only the records with a
+        (start record) LSN within that range are yielded. With an index loaded, the walk starts straight at the most
+        recent live record within the range instead of at the container offset.
+
+        With ``zero_copy``, the record data and block data are read-only ``memoryview`` slices of the decoded log block
+        instead of copies. A decoded log block is never modified, so the slices stay valid for as long as they're
+        referenced, also after the block is evicted from the block cache; they keep the block buffer alive. The one
+        exception is a container opened with :meth:`mmap`: all slices must be released (or dropped) before the
+        container file is closed, as a memory mapping can't be closed while slices of it exist.
+
+        Args:
+            start_lsn: The lowest LSN to yield (inclusive).
+            end_lsn: The highest LSN to yield (inclusive).
+            zero_copy: Whether to yield memoryview slices of the log blocks instead of copies of the data.
+        """
+        block_offset = record_offset = None
+
+        if end_lsn is not None and self.index is not None:
+            for entry in self.index.range(start_lsn, end_lsn):
+                if entry.live and entry.type & c_clfs.RecordType.ClfsStartRecord:
+                    block_offset, record_offset = entry.block_offset, entry.offset
+
+        for offset, start_header, _, record_data, block_data in self._walk(block_offset, record_offset, zero_copy):
+            if end_lsn is not None and start_header.LsnVirtual > end_lsn:
+                continue
+            if start_lsn is not None and start_header.LsnVirtual < start_lsn:
+                break
+
+            if self.metrics is not None:
+                self.metrics.add("records_yielded")
+            yield offset, record_data, block_data
+
+    def record_at(self, lsn: int) -> Record:
+        """Return the record with the given LSN.
+
+        With an index loaded, the location of the record is looked up in the index. Otherwise the location is derived
+        from the LSN itself, which holds the offset of the log block and the index of the record within that block.
+
+        Args:
+            lsn: The LSN of the record.
+        """
+        if self.index is not None:
+            if (entry := self.index.find(lsn)) is None:
+                raise KeyError(f"Record with LSN {lsn:#x} not found in index")
+            block_offset, live = entry.block_offset, entry.live
+        else:
+            block_offset, live = (lsn & 0xFFFFFFFF) & ~(SECTOR_SIZE - 1), None
+
+        log_block = self.block(block_offset)
+        for record in _scan_block(log_block, None):
+            if record.lsn == lsn:
+                return record._replace(live=live)
+
+        raise KeyError(f"Record with LSN {lsn:#x} not found")
+
+    def build_index(self) -> RecordIndex:
+        """Build an index of all records in this container and use it for subsequent lookups."""
+        self.index = RecordIndex.build(self)
+        return self.index
+
+    def load_index(self, path: str | os.PathLike) -> RecordIndex:
+        """Load a previously saved index of this container and use it for subsequent lookups.
+
+        Args:
+            path: The path of the index file.
+
+        Raises:
+            InvalidIndexError: If the index is invalid or the container changed since the index was built.
+        """
+        index = RecordIndex.load(path)
+        if index.is_stale(self):
+            raise InvalidIndexError(f"Index {path} is stale, the container changed since it was built")
+
+        self.index = index
+        return self.index
+
+    def build_directory(self) -> BlockDirectory:
+        """Build a directory of all log blocks in this container and use it for subsequent LSN range queries.
+
+        Only the block headers are read. The directory isn't updated when the container changes, build it again to pick
+        up blocks written since.
+        """
+        self.directory = BlockDirectory.build(self)
+        return self.directory
+
+    def records_between(self, start_lsn: int, end_lsn: int) -> Iterator[Record]:
+        """Yield the records with an LSN between ``start_lsn`` and ``end_lsn`` (inclusive), in LSN order.
+
+        Contrary to :meth:`records`, this doesn't walk the ``LsnPrevious`` chain down from the most recent record. The
+        log blocks that hold the range are looked up by bisecting the block directory (see :meth:`build_directory`,
+        which is built on first use), also across the point where the container wrapped around, and only those blocks
+        are read. The records aren't resolved against the chain, so records that are no longer live are yielded too.
+
+        Args:
+            start_lsn: The lowest LSN to yield (inclusive).
+            end_lsn: The highest LSN to yield (inclusive).
+        """
+        directory = self.directory if self.directory is not None else self.build_directory()
+
+        for offset in directory.range(start_lsn, end_lsn):
+            if (log_block := self._try_block(offset)) is None:
+                continue
+
+            for record in _scan_block(log_block, None):
+                if not start_lsn <= record.lsn <= end_lsn:
+                    continue
+
+                if self.metrics is not None:
+                    self.metrics.add("records_yielded")
+                yield record
+
+    def chain(self) -> set[int]:
+        """Return the LSNs of all records that are reachable through the ``LsnPrevious`` chain."""
+        lsns = set()
+        for _, start_header, next_header, _, _ in self._walk(zero_copy=True):
+            lsns.add(start_header.LsnVirtual)
+            lsns.add(next_header.LsnVirtual)
+        return lsns
+
+    def _block_headers(self) -> Iterator[tuple[int, LogBlockHeader]]:
+        """Yield the offset and header of every log block in the container, from front to back.
+
+        Only the block headers are read. The container is stepped through sequentially using the ``TotalSectors`` of
+        every block. Unused sectors and blocks that extend beyond the end of the container are skipped one sector at a
+        time.
+        """
+        # The size is determined once per pass, as that may cost a system call
+        size = self.size
+
+        offset = 0
+        while offset < size:
+            if (header := self._block_header(offset, size)) is None:
+                offset += SECTOR_SIZE
+                continue
+
+            yield offset, header
+            offset += header.TotalSectors * SECTOR_SIZE
+
+    def _block_header(self, offset: int, size: int | None = None) -> LogBlockHeader | None:
+        """Read only the header of the log block at the given offset, ``None`` if there's no valid block.
+
+        Args:
+            offset: Offset of the log block within the container.
+            size: The size of the container, determined if not given.
+        """
+        try:
+            header = LogBlockHeader.from_buffer(self.reader.read_at(offset, LOG_BLOCK_HEADER_SIZE))
+        except EOFError:
+            return None
+
+        block_size = header.TotalSectors * SECTOR_SIZE
+        if not block_size or offset + block_size > (self.size if size is None else size):
+            return None
+
+        return header
+
+    def _lsn_ordered_block_headers(self) -> list[tuple[int, LogBlockHeader]]:
+        """Return the offset and header of every log block in the container, ordered by their ``CurrentLsn``."""
+        return sorted(self._block_headers(), key=lambda entry: entry[1].CurrentLsn.PhysicalOffset)
 
-        buf = log_block.open()
-        buf.seek(cur_record_offset)
+    def blocks(self) -> Iterator[BlockHeader]:
+        """Yield every log block in the container, from front to back."""
+        for offset, _ in self._block_headers():
+            if (log_block := self._try_block(offset)) is not None:
+                yield log_block
 
-        return buf, cur_record_offset
+    def _try_block(self, offset: int) -> BlockHeader | None:
+        """Return the decoded log block at the given offset, or ``None`` if it's invalid."""
+        try:
+            return self.block(offset)
+        except InvalidRecordBlockError:
+            return None
+
+    def scan(self, chain: bool = True) -> Iterator[Record]:
+        """Scan all records in the container from front to back.
+
+        Contrary to :meth:`records`, this doesn't follow the ``LsnPrevious`` chain but reads the container sequentially,
+        block by block. This also yields the records that are no longer reachable from the chain.
+
+        Args:
+            chain: Whether to resolve the ``LsnPrevious`` chain first, to determine which records are live.
+        """
+        live = self.chain() if chain else None
+
+        for log_block in self.blocks():
+            if self.metrics is None:
+                yield from _scan_block(log_block, live)
+                continue
+
+            for record in _scan_block(log_block, live):
+                self.metrics.add("records_yielded")
+                yield record
+
+    def select(
+        self,
+        record_type: int | None = None,
+        start_lsn: int | None = None,
+        end_lsn: int | None = None,
+        min_size: int | None = None,
+        max_size: int | None = None,
+        predicate: Callable[[RecordHeader], bool] | None = None,
+    ) -> Iterator[RecordHandle]:
+        """Scan the records in the container from front to back, only reading the headers of the records.
+
+        The filters are evaluated on the record headers, and only the records that pass all of them are yielded, as
+        :class:`RecordHandle` of which the data is read on access. Only the block headers, fixup arrays and record
+        headers are read to evaluate the filters, so a selective query costs little more than the header reads.
+
+        Validating log blocks requires the entire block, so in strict mode or with a checksum policy the log blocks are
+        read and decoded completely, as with :meth:`scan`.
+
+        Args:
+            record_type: The ``RecordType`` flags that the records must all have.
+            start_lsn: The lowest LSN to yield (inclusive).
+            end_lsn: The highest LSN to yield (inclusive).
+            min_size: The lowest ``DataSize`` to yield (inclusive).
+            max_size: The highest ``DataSize`` to yield (inclusive).
+            predicate: A function that's called with the header of every record that passes the other filters, only
+                       records for which it returns ``True`` are yielded.
+        """
+        validate = self.strict or self.checksum is not None
+
+        for offset, header in self._block_headers():
+            if validate:
+                if (log_block := self._try_block(offset)) is None:
+                    continue
+                records = _block_records(log_block)
+            else:
+                records = self._header_records(offset, header)
+
+            for record_offset, record_header in records:
+                if record_type is not None and record_header.Type & record_type != record_type:
+                    continue
+                if start_lsn is not None and record_header.LsnVirtual < start_lsn:
+                    continue
+                if end_lsn is not None and record_header.LsnVirtual > end_lsn:
+                    continue
+                if min_size is not None and record_header.DataSize < min_size:
+                    continue
+                if max_size is not None and record_header.DataSize > max_size:
+                    continue
+                if predicate is not None and not predicate(record_header):
+                    continue
+
+                if self.metrics is not None:
+                    self.metrics.add("records_yielded")
+                yield RecordHandle(self, offset, record_offset, record_header)
+
+    def _header_records(self, offset: int, header: LogBlockHeader) -> Iterator[tuple[int, RecordHeader]]:
+        """Yield the offset and header of every record in a log block, without reading the entire block.
+
+        The last two bytes of every sector are replaced by the sector signature on disk and stored in the fixup array of
+        the block instead. Only the fixup array and the record headers are read, and the fixups that fall within a
+        record header are applied to the header only.
+        """
+        sectors = header.TotalSectors
+        size = sectors * SECTOR_SIZE
+
+        fixups = None
+        # The fixups of blocks in a shared buffer may already have been applied in place
+        if (
+            not (isinstance(self.fh, BufferFile) and offset in self.fh.fixed_up)
+            and len(fixups := self.reader.read_at(offset + header.FixupOffset, 2 * sectors)) != 2 * sectors
+        ):
+            return
+
+        record_offset = header.RecordOffsets[0]
+        while record_offset and record_offset + RECORD_HEADER_SIZE <= size:
+            raw = bytearray(self.reader.read_at(offset + record_offset, RECORD_HEADER_SIZE))
+            if len(raw) != RECORD_HEADER_SIZE:
+                return
+
+            if fixups is not None:
+                end = record_offset + RECORD_HEADER_SIZE
+                for sector in range(record_offset // SECTOR_SIZE, (end - 1) // SECTOR_SIZE + 1):
+                    for idx in range(2):
+                        position = sector * SECTOR_SIZE + SECTOR_SIZE - 2 + idx
+                        if record_offset <= position < end:
+                            raw[position - record_offset] = fixups[2 * sector + idx]
+
+            record_header = RecordHeader.from_buffer(raw)
+            if record_header.Type == c_clfs.RecordType.ClfsNullRecord or record_header.DataSize < record_header.Offset:
+                return
+
+            yield record_offset, record_header
+
+            if record_header.Type & c_clfs.RecordType.ClfsLastRecord or record_header.DataSize < RECORD_HEADER_SIZE:
+                return
+            record_offset += record_header.DataSize
+
+    def header_table(self) -> np.ndarray:
+        """Return the headers of all records in the container as a NumPy structured array.
+
+        The container is scanned sequentially like :meth:`scan`. Only the positions of the record headers are collected
+        during the scan, the headers themselves are decoded in bulk afterwards. The array has the fields of
+        :data:`HEADER_TABLE_FIELDS`, where ``FileOffset`` is the offset of the record header in the container.
 
-    def records(self) -> Iterator[tuple[int, bytes, bytes]]:
-        """Parse the records that are present within the log block."""
-        log_block_offset = self.offset
+        Requires the optional ``numpy`` dependency, which is only imported here.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("Container.header_table() requires numpy, install dissect.clfs[numpy]")
+
+        raw = bytearray()
+        file_offsets = array("Q")
+
+        for log_block in self.blocks():
+            view = log_block.view
+            for record_offset in _record_offsets(log_block):
+                raw += view[record_offset : record_offset + RECORD_HEADER_SIZE]
+                file_offsets.append(log_block.offset + record_offset)
+
+        headers = np.frombuffer(raw, dtype=np.dtype(RECORD_HEADER_FIELDS))
+
+        table = np.empty(len(headers), dtype=np.dtype(HEADER_TABLE_FIELDS))
+        for name, _ in HEADER_TABLE_FIELDS:
+            table[name] = file_offsets if name == "FileOffset" else headers[name]
+
+        return table
+
+    def verify_all(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        policy: ChecksumPolicy | str = ChecksumPolicy.SKIP,
+    ) -> VerifyResult:
+        """Verify the checksums of all log blocks in the container, without decoding them.
+
+        See :func:`~dissect.clfs.verify.verify_blocks`.
+
+        Args:
+            chunk_size: The number of bytes to read at once.
+            policy: What to do with log blocks that have an invalid checksum.
+        """
+        return verify_blocks(self.reader, chunk_size, policy)
+
+    def records_parallel(
+        self,
+        workers: int | None = None,
+        chunk_size: int = 4 * 1024 * 1024,
+        chain: bool = False,
+        path: str | os.PathLike | None = None,
+    ) -> Iterator[Record]:
+        """Scan all records in the container using a pool of worker processes.
+
+        The container is split into ranges of consecutive log blocks, ordered by the ``CurrentLsn`` of the blocks.
+        Every range is decoded in a separate process that reopens the container by path, and the results are yielded
+        in LSN order. At most two ranges per worker are in flight at any time, which bounds the memory usage.
+
+        The reads of the worker processes aren't counted in the metrics of this container, only the reads of the block
+        headers and of the ``LsnPrevious`` chain are.
+
+        Args:
+            workers: The number of worker processes, defaults to the number of CPUs.
+            chunk_size: The approximate number of bytes of log blocks to decode per range.
+            chain: Whether to resolve the ``LsnPrevious`` chain first, to determine which records are live.
+            path: The path of the container file, defaults to the name of the file handle. A file handle that was
+                  opened from a file descriptor has no usable name, so its path must be given.
+        """
+        if path is None and isinstance(name := getattr(self.fh, "name", None), (str, os.PathLike)):
+            path = name
+        if path is None:
+            raise ValueError("Parallel parsing requires the path of the container file")
+
+        directory = self._lsn_ordered_block_headers()
+
+        ranges = []
+        cur_range = []
+        cur_size = 0
+        for offset, header in directory:
+            cur_range.append(offset)
+            cur_size += header.TotalSectors * SECTOR_SIZE
+            if cur_size >= chunk_size:
+                ranges.append(cur_range)
+                cur_range = []
+                cur_size = 0
+        if cur_range:
+            ranges.append(cur_range)
+
+        live = self.chain() if chain else None
+        workers = workers or os.cpu_count() or 1
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            ranges = iter(ranges)
+            pending = deque(
+                executor.submit(_scan_blocks, path, offsets, self.strict, self.checksum)
+                for offsets in islice(ranges, workers * 2)
+            )
+
+            while pending:
+                records = pending.popleft().result()
+                for offsets in islice(ranges, 1):
+                    pending.append(executor.submit(_scan_blocks, path, offsets, self.strict, self.checksum))
+
+                for record in records:
+                    yield record._replace(live=record.lsn in live) if live is not None else record
+        finally:
+            # Don't wait for the ranges in flight if the iteration is stopped early
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def follow(self, checkpoint: Checkpoint | None = None) -> Tail:
+        """Return an iterator over the records appended to the container after the given checkpoint.
+
+        Args:
+            checkpoint: The checkpoint of a previous run, ``None`` to start from the oldest record.
+        """
+        return Tail(self, checkpoint)
 
-        buf, cur_record_offset = self._open_block(log_block_offset)
-        cur_record_header = c_clfs.RECORD_HEADER(buf)
 
+class Checkpoint(NamedTuple):
+    """The position of the last record that was read from a container.
+
+    Attributes:
+        lsn: The LSN of the last record.
+        block_offset: The offset of the log block holding the last record.
+        block_lsn: The ``CurrentLsn`` of the log block holding the last record.
+    """
+
+    lsn: int
+    block_offset: int
+    block_lsn: int
+
+
+class Tail:
+    """Iterator over the records appended to a container after a :class:`Checkpoint`.
+
+    Starting at the block of the checkpoint, the container is read forward for as long as the ``CurrentLsn`` of the
+    blocks keeps increasing. When the end of the container is reached, or the ``CurrentLsn`` stops increasing, reading
+    continues at the start of the container, as the container is circular. This way only the new data is read. A block
+    that's only partly written or can't be decoded ends the iteration, without moving the checkpoint past it, so the
+    next run retries it.
+
+    If the block of the checkpoint has been overwritten since (the log wrapped around past the checkpoint), all records
+    newer than the checkpoint are looked up through the block headers instead and :attr:`overwritten` is set, as
+    records may have been lost in between.
+
+    After iterating, :attr:`checkpoint` holds the checkpoint for the next run.
+
+    Args:
+        container: The container to read from.
+        checkpoint: The checkpoint of a previous run, ``None`` to start from the oldest record.
+    """
+
+    def __init__(self, container: Container, checkpoint: Checkpoint | None = None):
+        self.container = container
+        self.checkpoint = checkpoint
+        self.overwritten = False
+
+    def __iter__(self) -> Iterator[Record]:
+        checkpoint = self.checkpoint
+
+        if checkpoint is None:
+            log_blocks = self._blocks_after(-1)
+        else:
+            header = self.container._block_header(checkpoint.block_offset)
+            if header is not None and header.CurrentLsn.PhysicalOffset == checkpoint.block_lsn:
+                log_blocks = self._blocks_from(checkpoint.block_offset, checkpoint.block_lsn)
+            else:
+                self.overwritten = True
+                log_blocks = self._blocks_after(checkpoint.lsn)
+
+        for offset, header, log_block in log_blocks:
+            for record in _scan_block(log_block, None):
+                if checkpoint is not None and record.lsn <= checkpoint.lsn:
+                    continue
+
+                self.checkpoint = Checkpoint(record.lsn, offset, header.CurrentLsn.PhysicalOffset)
+                yield record
+
+    def _blocks_from(self, offset: int, block_lsn: int) -> Iterator[tuple[int, LogBlockHeader, BlockHeader]]:
+        """Yield the blocks from the given offset onwards, for as long as their ``CurrentLsn`` keeps increasing."""
+        container = self.container
+        # The size is determined once per run, as that may cost a system call
+        size = container.size
+        wrapped = False
+
+        while True:
+            header = None
+            if offset < size:
+                try:
+                    header = LogBlockHeader.from_buffer(container.reader.read_at(offset, LOG_BLOCK_HEADER_SIZE))
+                except EOFError:
+                    # A partly written block header
+                    break
+
+            if header is None or not header.TotalSectors or header.CurrentLsn.PhysicalOffset < block_lsn:
+                # The end of the container, or of the data written since the last time the container wrapped around
+                if wrapped:
+                    break
+                wrapped = True
+                offset = 0
+                continue
+
+            if offset + header.TotalSectors * SECTOR_SIZE > size or (log_block := container._try_block(offset)) is None:
+                # A torn block, which is retried on the next run
+                break
+
+            yield offset, header, log_block
+
+            block_lsn = header.CurrentLsn.PhysicalOffset
+            offset += header.TotalSectors * SECTOR_SIZE
+
+    def _blocks_after(self, lsn: int) -> Iterator[tuple[int, LogBlockHeader, BlockHeader]]:
+        """Yield all valid blocks that may hold records with an LSN higher than the given LSN, in LSN order."""
+        directory = self.container._lsn_ordered_block_headers()
+
+        for idx, (offset, header) in enumerate(directory):
+            next_lsn = directory[idx + 1][1].CurrentLsn.PhysicalOffset if idx + 1 < len(directory) else None
+            if (next_lsn is None or next_lsn > lsn) and (log_block := self.container._try_block(offset)) is not None:
+                yield offset, header, log_block
+
+
+def _walk_block(
+    log_block: BlockHeader, record_offset: int | None = None, zero_copy: bool = False
+) -> tuple[tuple[int, RecordHeader, RecordHeader, bytes | memoryview, bytes | memoryview], int | None]:
+    """Decode the start record of a log block on the ``LsnPrevious`` chain.
+
+    This is the decoding step of every walk over the chain, independent of how the log blocks are read.
+
+    Args:
+        log_block: The log block.
+        record_offset: Offset of the record to start at, defaults to the first record in the block.
+        zero_copy: Whether to return the record and block data as read-only memoryview slices of the log block.
+
+    Returns:
+        The offset of the start record, the start record header, the record header following it, the record data and
+        the block data, and the offset of the previous log block on the chain, ``None`` at the end of the chain.
+
+    Raises:
+        InvalidRecordBlockError: If there's no start record in the log block.
+    """
+    cur_record_offset = log_block.header.RecordOffsets[0] if record_offset is None else record_offset
+
+    buf = BlockReader(log_block.view.toreadonly()) if zero_copy else log_block.open()
+    buf.seek(cur_record_offset)
+    read = buf.read_view if zero_copy else buf.read
+    cur_block_data = b""
+
+    try:
         while True:
+            position = buf.tell()
+            cur_record_header = RecordHeader.read(buf)
+
             # Data block
             if cur_record_header.Type & c_clfs.RecordType.ClfsDataRecord:
-                cur_block_data = buf.read(cur_record_header.DataSize - cur_record_header.Offset)
+                cur_block_data = read(cur_record_header.DataSize - cur_record_header.Offset)
 
             # Start of record header
             if cur_record_header.Type & c_clfs.RecordType.ClfsStartRecord:
@@ -61,24 +894,78 @@ class Container:
                 """
 
                 # Advance to the next RECORD_HEADER
-                next_record_header = c_clfs.RECORD_HEADER(buf)
+                next_record_header = RecordHeader.read(buf)
 
                 # The record data is present right after the record header, subtract the header size (offset field)
                 # from the data size
-                cur_record_data = buf.read(next_record_header.DataSize - next_record_header.Offset)
+                cur_record_data = read(next_record_header.DataSize - next_record_header.Offset)
+                break
 
-                yield log_block_offset + cur_record_offset, cur_record_data, cur_block_data
+            # End of block without a start record
+            if cur_record_header.Type & c_clfs.RecordType.ClfsLastRecord or not cur_record_header.DataSize:
+                raise InvalidRecordBlockError(f"No start record in log block at offset {log_block.offset:#x}")
 
-                # End of log sequence
-                if next_record_header.LsnPrevious == 0:
-                    break
+            buf.seek(position + cur_record_header.DataSize)
+    except EOFError:
+        raise InvalidRecordBlockError(f"No start record in log block at offset {log_block.offset:#x}")
+
+    entry = (
+        log_block.offset + cur_record_offset,
+        cur_record_header,
+        next_record_header,
+        cur_record_data,
+        cur_block_data,
+    )
+
+    # End of log sequence
+    if next_record_header.LsnPrevious == 0:
+        return entry, None
+    return entry, next_record_header.LsnPrevious - 1
+
+
+def _record_offsets(log_block: BlockHeader) -> Iterator[int]:
+    """Yield the offset of every record header in the given log block, without decoding the full headers."""
+    view = log_block.view
+    record_offset = log_block.header.RecordOffsets[0]
+
+    while record_offset and record_offset + RECORD_HEADER_SIZE <= len(view):
+        data_size, header_size, record_type = _RECORD_HEADER_STEP.unpack_from(view, record_offset)
+        if record_type == c_clfs.RecordType.ClfsNullRecord or data_size < header_size:
+            break
+
+        yield record_offset
+
+        if record_type & c_clfs.RecordType.ClfsLastRecord or data_size < RECORD_HEADER_SIZE:
+            break
+        record_offset += data_size
+
+
+def _block_records(log_block: BlockHeader) -> Iterator[tuple[int, RecordHeader]]:
+    """Yield the offset and header of every record in the given log block."""
+    view = log_block.view
+    for record_offset in _record_offsets(log_block):
+        yield record_offset, RecordHeader.from_buffer(view, record_offset)
+
+
+def _scan_block(log_block: BlockHeader, live: set[int] | None) -> Iterator[Record]:
+    """Yield every record in the given log block."""
+    view = log_block.view
+    for record_offset, header in _block_records(log_block):
+        yield Record(
+            lsn=header.LsnVirtual,
+            block_offset=log_block.offset,
+            offset=record_offset,
+            header=header,
+            data=bytes(view[record_offset + header.Offset : record_offset + header.DataSize]),
+            live=header.LsnVirtual in live if live is not None else None,
+        )
 
-                # Set the new block offset
-                log_block_offset = next_record_header.LsnPrevious - 1
-                cur_record_header = next_record_header
-                continue
 
-            # End of block, pointer to new block
-            if cur_record_header.Type & c_clfs.RecordType.ClfsLastRecord:
-                buf, cur_record_offset = self._open_block(log_block_offset)
-                cur_record_header = c_clfs.RECORD_HEADER(buf)
+def _scan_blocks(
+    path: str | os.PathLike, offsets: list[int], strict: bool = False, checksum: ChecksumPolicy | None = None
+) -> list[Record]:
+    """Decode all records of the given log blocks, the worker of :meth:`Container.records_parallel`."""
+    with Path(path).open("rb") as fh:
+        container = Container(fh, offset=0, block_cache_size=0, strict=strict, checksum=checksum)
+        blocks = (container._try_block(offset) for offset in offsets)
+        return [record for log_block in blocks if log_block is not None for record in _scan_block(log_block, None)]
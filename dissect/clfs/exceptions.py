@@ -9,6 +9,14 @@ class InvalidRecordBlockError(Error):
     """Exception raised when the record block contains invalid data."""
 
 
+class TornBlockError(InvalidRecordBlockError):
+    """Exception raised when sectors of a log block have an invalid signature, e.g. because of a torn write."""
+
+
+class ChecksumError(Error):
+    """Exception raised when the checksum of a log block doesn't match the block data."""
+
+
 class InvalidBLFError(Error):
     """Exception raised if the validation of the BLF file fails."""
 
@@ -19,3 +27,15 @@ class InvalidSymbolTableError(Error):
 
 class InvalidContextError(Error):
     """Exception raised when the context type doesn't match the context to be parsed."""
+
+
+class InvalidIndexError(Error):
+    """Exception raised when a record index is invalid or doesn't match its container."""
+
+
+class ChainError(Error):
+    """Exception raised when the ``LsnPrevious`` chain of a container is corrupt, e.g. when it links out of it."""
+
+
+class TraversalLimitError(Error):
+    """Exception raised when a walk over a container exceeds its limit of records or bytes."""
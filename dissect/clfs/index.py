@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
+
+from dissect.clfs.c_clfs import LOG_BLOCK_HEADER_SIZE
+from dissect.clfs.exceptions import InvalidIndexError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from dissect.clfs.container import Container
+
+INDEX_MAGIC = b"CLFSIDX\x00"
+INDEX_VERSION = 1
+
+# magic, version, count, container size, container mtime (ns), head block checksum
+_INDEX_HEADER = struct.Struct("<8sIQQqI")
+
+# name, array typecode of every column in the index file, in order
+_INDEX_COLUMNS = (
+    ("lsns", "Q"),
+    ("block_offsets", "Q"),
+    ("offsets", "I"),
+    ("types", "I"),
+    ("sizes", "I"),
+    ("live", "B"),
+)
+
+
+class IndexEntry(NamedTuple):
+    lsn: int
+    block_offset: int
+    offset: int
+    type: int
+    size: int
+    live: bool
+
+
+class Fingerprint(NamedTuple):
+    """Identifies the state of a container at the time an index was built."""
+
+    size: int
+    mtime: int
+    checksum: int
+
+
+def _mtime(fh: BinaryIO) -> int:
+    try:
+        return os.fstat(fh.fileno()).st_mtime_ns
+    except (AttributeError, OSError):
+        return 0
+
+
+def _block_checksum(container: Container, offset: int) -> int:
+    """Return the CRC32 of the raw header of the log block at the given offset."""
+    return zlib.crc32(container.reader.read_at(offset, LOG_BLOCK_HEADER_SIZE))
+
+
+class RecordIndex:
+    """Compact, array-backed index of all records in a container, sorted by LSN.
+
+    For every record the LSN, the offset of its log block, the offset of the record within that block, the record type,
+    the record size and whether the record is live are stored in separate ``array.array`` columns. The index can be
+    saved to a sidecar file and loaded again, to skip walking the container in later runs.
+
+    To detect stale indexes, the container size, the modification time of the container file (if available) and the
+    checksum of the header of the log block holding the highest LSN are stored with the index.
+    """
+
+    def __init__(self, columns: dict[str, array], fingerprint: Fingerprint):
+        self.fingerprint = fingerprint
+
+        self.lsns = columns["lsns"]
+        self.block_offsets = columns["block_offsets"]
+        self.offsets = columns["offsets"]
+        self.types = columns["types"]
+        self.sizes = columns["sizes"]
+        self.live = columns["live"]
+
+    def __len__(self) -> int:
+        return len(self.lsns)
+
+    def __getitem__(self, idx: int) -> IndexEntry:
+        return IndexEntry(
+            self.lsns[idx],
+            self.block_offsets[idx],
+            self.offsets[idx],
+            self.types[idx],
+            self.sizes[idx],
+            bool(self.live[idx]),
+        )
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    @classmethod
+    def build(cls, container: Container) -> RecordIndex:
+        """Build an index of all records in the given container.
+
+        Args:
+            container: The container to index.
+        """
+        columns = {name: array(typecode) for name, typecode in _INDEX_COLUMNS}
+
+        for record in sorted(container.scan(), key=lambda record: record.lsn):
+            columns["lsns"].append(record.lsn)
+            columns["block_offsets"].append(record.block_offset)
+            columns["offsets"].append(record.offset)
+            columns["types"].append(record.header.Type)
+            columns["sizes"].append(record.header.DataSize)
+            columns["live"].append(record.live)
+
+        index = cls(columns, Fingerprint(0, 0, 0))
+        index.fingerprint = index._fingerprint(container)
+        return index
+
+    def _fingerprint(self, container: Container) -> Fingerprint:
+        checksum = _block_checksum(container, self.block_offsets[-1]) if len(self) else 0
+        return Fingerprint(container.size, _mtime(container.fh), checksum)
+
+    def is_stale(self, container: Container) -> bool:
+        """Return whether the given container changed since this index was built."""
+        return self._fingerprint(container) != self.fingerprint
+
+    def find(self, lsn: int) -> IndexEntry | None:
+        """Return the index entry of the record with the given LSN, or ``None`` if it's not in the index."""
+        idx = bisect_left(self.lsns, lsn)
+        if idx < len(self) and self.lsns[idx] == lsn:
+            return self[idx]
+        return None
+
+    def range(self, start_lsn: int | None = None, end_lsn: int | None = None) -> Iterator[IndexEntry]:
+        """Yield the index entries with an LSN between ``start_lsn`` and ``end_lsn`` (inclusive), in LSN order."""
+        lo = 0 if start_lsn is None else bisect_left(self.lsns, start_lsn)
+        hi = len(self) if end_lsn is None else bisect_right(self.lsns, end_lsn)
+        for idx in range(lo, hi):
+            yield self[idx]
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Write the index to the given file."""
+        with Path(path).open("wb") as fh:
+            fh.write(_INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(self), *self.fingerprint))
+            for name, _ in _INDEX_COLUMNS:
+                column = getattr(self, name)
+                if sys.byteorder == "big":
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(fh)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> RecordIndex:
+        """Read an index from the given file."""
+        with Path(path).open("rb") as fh:
+            try:
+                magic, version, count, *fingerprint = _INDEX_HEADER.unpack(fh.read(_INDEX_HEADER.size))
+            except struct.error:
+                raise InvalidIndexError("Invalid index file, possibly corrupt/empty")
+
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                raise InvalidIndexError(f"Invalid index file magic or version: {magic!r} {version}")
+
+            columns = {}
+            for name, typecode in _INDEX_COLUMNS:
+                column = array(typecode)
+                try:
+                    column.fromfile(fh, count)
+                except EOFError:
+                    raise InvalidIndexError("Invalid index file, possibly truncated")
+
+                if sys.byteorder == "big":
+                    column.byteswap()
+                columns[name] = column
+
+            if fh.read(1) != b"":
+                raise InvalidIndexError("Invalid index file, trailing data")
+
+        return cls(columns, Fingerprint(*fingerprint))
+
+
+class BlockDirectory:
+    """Compact, array-backed directory of the log blocks in a container, to look up blocks by LSN.
+
+    The ``CurrentLsn`` and offset of every log block are stored in ``array.array`` columns in the physical order of the
+    blocks, which is built from the block headers only. A container is circular, so in physical order the LSNs increase
+    up to the point where the log last wrapped around and then increase again from a lower LSN: the blocks before that
+    point are the most recent. Both runs are sorted, so a lookup bisects the run that holds the LSN without
+    reordering the columns. If the blocks don't form two such runs, for example because of stale or corrupt blocks,
+    the columns are sorted by LSN instead.
+
+    A log block holds the records with an LSN from its ``CurrentLsn`` up to the ``CurrentLsn`` of the next block in LSN
+    order.
+    """
+
+    def __init__(self, lsns: array, offsets: array):
+        self.lsns = lsns
+        self.offsets = offsets
+        # The physical index of the block with the lowest LSN, where the oldest run starts
+        self.pivot = 0
+
+        descents = [idx for idx in range(1, len(lsns)) if lsns[idx] < lsns[idx - 1]]
+        if len(descents) == 1 and lsns[-1] < lsns[0]:
+            self.pivot = descents[0]
+        elif descents:
+            order = sorted(range(len(lsns)), key=lsns.__getitem__)
+            self.lsns = array(lsns.typecode, (lsns[idx] for idx in order))
+            self.offsets = array(offsets.typecode, (offsets[idx] for idx in order))
+
+    def __len__(self) -> int:
+        return len(self.lsns)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        """Yield the ``CurrentLsn`` and offset of every log block, in LSN order."""
+        for idx in range(len(self)):
+            physical = self._physical(idx)
+            yield self.lsns[physical], self.offsets[physical]
+
+    @classmethod
+    def build(cls, container: Container) -> BlockDirectory:
+        """Build a directory of all log blocks in the given container, reading only their headers.
+
+        Args:
+            container: The container to build the directory of.
+        """
+        lsns = array("Q")
+        offsets = array("Q")
+
+        for offset, header in container._block_headers():
+            lsns.append(header.CurrentLsn.PhysicalOffset)
+            offsets.append(offset)
+
+        return cls(lsns, offsets)
+
+    def _physical(self, idx: int) -> int:
+        """Return the physical index of the block at the given index in LSN order."""
+        idx += self.pivot
+        return idx - len(self) if idx >= len(self) else idx
+
+    def _logical(self, physical: int) -> int:
+        """Return the index in LSN order of the block at the given physical index."""
+        return physical - self.pivot if physical >= self.pivot else physical + len(self) - self.pivot
+
+    def _bisect(self, lsn: int) -> int:
+        """Return the index in LSN order of the last block with a ``CurrentLsn`` up to ``lsn``, ``-1`` if none."""
+        if self.pivot and lsn >= self.lsns[0]:
+            # The most recent run, at the start of the container
+            return self._logical(bisect_right(self.lsns, lsn, 0, self.pivot) - 1)
+
+        physical = bisect_right(self.lsns, lsn, self.pivot, len(self)) - 1
+        return -1 if physical < self.pivot else self._logical(physical)
+
+    def find(self, lsn: int) -> int | None:
+        """Return the offset of the log block that may hold the record with the given LSN, ``None`` if there's none."""
+        if (idx := self._bisect(lsn)) < 0:
+            return None
+        return self.offsets[self._physical(idx)]
+
+    def range(self, start_lsn: int | None = None, end_lsn: int | None = None) -> Iterator[int]:
+        """Yield the offsets of the log blocks that may hold records within the (inclusive) LSN range, in LSN order."""
+        lo = 0 if start_lsn is None else max(self._bisect(start_lsn), 0)
+        hi = len(self) if end_lsn is None else self._bisect(end_lsn) + 1
+        for idx in range(lo, hi):
+            yield self.offsets[self._physical(idx)]
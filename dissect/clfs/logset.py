@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import heapq
+import io
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
+
+from dissect.clfs.blf import BLF
+from dissect.clfs.container import Container
+from dissect.clfs.exceptions import InvalidContextError
+
+if TYPE_CHECKING:
+    import os
+    from collections.abc import Callable, Iterator
+
+    from dissect.clfs.blf import Stream
+    from dissect.clfs.container import Checkpoint, Tail
+
+
+class LogRecord(NamedTuple):
+    """A record of one of the streams in a log set.
+
+    Attributes:
+        stream: The stream the record belongs to.
+        lsn: The LSN of the record.
+        offset: The offset of the record in its container.
+        record_data: The record data.
+        block_data: The block data.
+    """
+
+    stream: Stream
+    lsn: int
+    offset: int
+    record_data: bytes
+    block_data: bytes
+
+
+def container_filename(name: str) -> str:
+    """Return the filename of a container from its symbol name, e.g. ``%BLF%\\Container00000000000000000001``."""
+    return name.replace("\\", "/").rsplit("/", 1)[-1]
+
+
+class FilePool:
+    """Pool of container file handles that keeps at most ``max_open`` of them open at the same time.
+
+    A file handle can be closed by the pool whenever another one is opened, so it's only safe to use while holding
+    :attr:`lock`.
+
+    Args:
+        opener: Callable that opens a container by its symbol name.
+        max_open: The maximum number of open file handles.
+    """
+
+    def __init__(self, opener: Callable[[str], BinaryIO], max_open: int = 16):
+        self.opener = opener
+        self.max_open = max_open
+        self.handles: OrderedDict[str, BinaryIO] = OrderedDict()
+        self.lock = threading.RLock()
+
+    def get(self, name: str) -> BinaryIO:
+        """Return an open file handle for the given container, closing the least recently used one if needed."""
+        with self.lock:
+            if (fh := self.handles.get(name)) is not None:
+                self.handles.move_to_end(name)
+                return fh
+
+            while len(self.handles) >= self.max_open:
+                _, old_fh = self.handles.popitem(last=False)
+                old_fh.close()
+
+            fh = self.opener(name)
+            self.handles[name] = fh
+            return fh
+
+    def close(self) -> None:
+        with self.lock:
+            while self.handles:
+                _, fh = self.handles.popitem()
+                fh.close()
+
+
+class PooledFile:
+    """File-like object of a single container that borrows its file handle from a :class:`FilePool`.
+
+    The read position is kept here, so the underlying file handle can be closed and reopened by the pool at any time.
+    Every read holds the lock of the pool, so the file handle can't be closed in the middle of it. The positional reads
+    (see :mod:`dissect.clfs.pread`) don't use the read position, so many threads can share this object.
+
+    Args:
+        pool: The pool to borrow the file handle from.
+        name: The symbol name of the container.
+    """
+
+    def __init__(self, pool: FilePool, name: str):
+        self.pool = pool
+        self.name = name
+        self.pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        with self.pool.lock:
+            fh = self.pool.get(self.name)
+            fh.seek(self.pos)
+            data = fh.read(size)
+        self.pos += len(data)
+        return data
+
+    def readinto(self, buf: bytearray | memoryview) -> int:
+        with self.pool.lock:
+            fh = self.pool.get(self.name)
+            fh.seek(self.pos)
+            size = fh.readinto(buf)
+        self.pos += size
+        return size
+
+    @property
+    def size(self) -> int:
+        with self.pool.lock:
+            return self.pool.get(self.name).seek(0, io.SEEK_END)
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        with self.pool.lock:
+            fh = self.pool.get(self.name)
+            fh.seek(offset)
+            return fh.read(size)
+
+    def readinto_at(self, buf: bytearray | memoryview, offset: int) -> int:
+        with self.pool.lock:
+            fh = self.pool.get(self.name)
+            fh.seek(offset)
+            return fh.readinto(buf)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+
+        self.pos = offset
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+
+class LogSet:
+    """A BLF together with all of its containers.
+
+    The containers are resolved by the names in the container contexts of the BLF and are only opened when their
+    records are read. At most ``max_open`` container files are kept open at the same time.
+
+    Every stream is read from the single container of its ``LsnPhysicalBase``. The walk over the ``LsnPrevious`` chain
+    doesn't follow links into other containers, so the older records of a stream that spans multiple containers are not
+    yielded.
+
+    Args:
+        blf: A BLF object or a file-like object of a BLF file.
+        opener: The directory containing the container files, or a callable that opens a container by its symbol name.
+        max_open: The maximum number of container files that are kept open at the same time.
+    """
+
+    def __init__(
+        self,
+        blf: BLF | BinaryIO,
+        opener: str | os.PathLike | Callable[[str], BinaryIO],
+        max_open: int = 16,
+    ):
+        self.blf = blf if isinstance(blf, BLF) else BLF(blf)
+
+        if not callable(opener):
+            directory = Path(opener)
+
+            def opener(name: str) -> BinaryIO:
+                return directory.joinpath(container_filename(name)).open("rb")
+
+        self.pool = FilePool(opener, max_open)
+
+        self.streams = self.blf.streams
+        self.containers = {container.id: container for container in self.blf.containers}
+        self._containers = {}
+        self._blf_fh = None
+
+    @classmethod
+    def open(cls, path: str | os.PathLike, max_open: int = 16) -> LogSet:
+        """Open a BLF file and resolve its containers relative to the directory of the BLF file.
+
+        Args:
+            path: The path of the BLF file.
+            max_open: The maximum number of container files that are kept open at the same time.
+        """
+        path = Path(path)
+        fh = path.open("rb")
+
+        logset = cls(BLF(fh), path.parent, max_open)
+        logset._blf_fh = fh
+        return logset
+
+    def container(self, stream: Stream) -> Container:
+        """Return the container of the ``LsnPhysicalBase`` of the given stream, which holds its records."""
+        container_id = stream.lsn_physical_base.Offset.ContainerId
+
+        if container_id not in self.containers:
+            raise InvalidContextError(f"Stream {stream.name} refers to unknown container id {container_id}")
+
+        key = (container_id, stream.offset)
+        if key not in self._containers:
+            fh = PooledFile(self.pool, self.containers[container_id].name)
+            self._containers[key] = Container(fh, offset=stream.offset)
+
+        return self._containers[key]
+
+    def _stream_records(self, stream: Stream) -> Iterator[LogRecord]:
+        container = self.container(stream)
+        for offset, start_header, _, record_data, block_data in container._walk():
+            yield LogRecord(stream, start_header.LsnVirtual, offset, record_data, block_data)
+
+    def follow(self, stream: Stream, checkpoint: Checkpoint | None = None) -> Tail:
+        """Return an iterator over the records of a stream that were appended after the given checkpoint.
+
+        Args:
+            stream: The stream to read.
+            checkpoint: The checkpoint of a previous run, ``None`` to start from the oldest record.
+        """
+        return self.container(stream).follow(checkpoint)
+
+    def records(self) -> Iterator[LogRecord]:
+        """Yield the records of all streams, merged in LSN order.
+
+        Like :meth:`Container.records`, the records are yielded from the most recent LSN to the oldest.
+        """
+        yield from heapq.merge(
+            *(self._stream_records(stream) for stream in self.streams),
+            key=lambda record: record.lsn,
+            reverse=True,
+        )
+
+    def close(self) -> None:
+        """Close all open container files."""
+        self.pool.close()
+        if self._blf_fh is not None:
+            self._blf_fh.close()
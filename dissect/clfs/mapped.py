@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import io
+import mmap
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import os
+    from types import TracebackType
+
+    from typing_extensions import Self
+
+
+class BufferFile:
+    """File-like object over a writable in-memory buffer holding (a part of) a BLF or container file.
+
+    :class:`~dissect.clfs.c_clfs.BlockHeader` recognizes this type and serves the blocks as slices of the buffer,
+    applying the sector fixups in place, once per block. The positional reads (see :mod:`dissect.clfs.pread`) slice
+    the buffer as well, so many threads can read it at the same time.
+
+    Args:
+        buf: The writable buffer, e.g. a ``bytearray``.
+    """
+
+    def __init__(self, buf: bytearray | memoryview | mmap.mmap):
+        self.name = None
+        self.view = memoryview(buf)
+        self.size = len(self.view)
+        self.pos = 0
+
+        # Offsets of the blocks that have had their sector fixups applied in the buffer, with their original sector
+        # signatures and sector errors
+        self.fixed_up = {}
+        # Guards the in-place sector fixups, which are shared by every reader of the buffer
+        self.lock = threading.Lock()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc_value: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.close()
+
+    def read(self, size: int = -1) -> bytes:
+        end = self.size if size is None or size < 0 else min(self.pos + size, self.size)
+        data = bytes(self.view[self.pos : end])
+        self.pos = max(self.pos, end)
+        return data
+
+    def readinto(self, buf: bytearray | memoryview) -> int:
+        data = self.view[self.pos : self.pos + len(buf)]
+        buf[: len(data)] = data
+        self.pos += len(data)
+        return len(data)
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        return bytes(self.view[offset : offset + size])
+
+    def readinto_at(self, buf: bytearray | memoryview, offset: int) -> int:
+        data = self.view[offset : offset + len(buf)]
+        buf[: len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+
+        self.pos = offset
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def close(self) -> None:
+        self.view.release()
+
+
+class MappedFile(BufferFile):
+    """Read-only, memory-mapped file-like object for BLF and container files.
+
+    The file is mapped copy-on-write (``ACCESS_COPY``), which allows :class:`~dissect.clfs.c_clfs.BlockHeader` to
+    serve block headers, record headers and payloads as slices of the mapping and to apply the sector fixups in
+    place, without ever writing back to the file. The OS page cache takes care of the actual reading.
+
+    Args:
+        path: A path or an open file descriptor of the file to map.
+    """
+
+    def __init__(self, path: str | os.PathLike | int):
+        if isinstance(path, int):
+            self.map = mmap.mmap(path, 0, access=mmap.ACCESS_COPY)
+        else:
+            with Path(path).open("rb") as fh:
+                self.map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        super().__init__(self.map)
+
+        if not isinstance(path, int):
+            self.name = str(path)
+
+    def close(self) -> None:
+        super().close()
+        self.map.close()
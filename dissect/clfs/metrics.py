@@ -0,0 +1,148 @@
+"""Opt-in instrumentation of the I/O, decoding and parsing cost of BLF and container files.
+
+A :class:`Metrics` object is passed to :class:`~dissect.clfs.blf.BLF`, :class:`~dissect.clfs.container.Container` or
+:class:`~dissect.clfs.c_clfs.BlockHeader`, and can be shared by many of them. Without one, which is the default,
+nothing is counted or timed.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from contextlib import AbstractContextManager
+
+    from dissect.clfs.pread import Positional
+
+# The counters of a snapshot, see Metrics
+COUNTERS = (
+    "bytes_read",
+    "read_calls",
+    "seeks",
+    "blocks_decoded",
+    "fixups",
+    "cache_lookups",
+    "cache_misses",
+    "records_yielded",
+)
+
+# The phases that are timed, each is counted in a <phase>_seconds counter
+PHASES = (
+    "read",
+    "decode",
+    "fixup",
+    "checksum",
+    "parse",
+    "symbols",
+)
+
+_NULL_TIMER = nullcontext()
+
+
+class Metrics:
+    """Thread-safe counters and phase timings, with callbacks for exporters such as OpenTelemetry or Prometheus.
+
+    The following counters are kept:
+
+    - ``bytes_read`` and ``read_calls``: the reads through the file-like object. Blocks that are served from a
+      :class:`~dissect.clfs.mapped.BufferFile`, such as a memory mapping, are not read and not counted.
+    - ``seeks``: the reads that don't continue where the previous read ended.
+    - ``blocks_decoded`` and ``fixups``: the log blocks that were decoded and had their sector fixups applied.
+    - ``cache_lookups`` and ``cache_misses``: the lookups in the block cache of a container, the snapshot also holds
+      the resulting ``cache_hits``.
+    - ``records_yielded``: the records yielded by a container.
+    - ``<phase>_seconds``: the time spent per phase: ``read`` (I/O), ``decode`` (block headers and sector signatures),
+      ``fixup`` (sector fixups), ``checksum``, ``parse`` (metadata records) and ``symbols`` (symbol tables).
+
+    Args:
+        callbacks: Functions that are called with the name and the increment of every counter update.
+    """
+
+    def __init__(self, callbacks: Iterable[Callable[[str, float], None]] = ()):
+        self.callbacks = list(callbacks)
+
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, value: float = 1) -> None:
+        """Increment a counter and pass the increment on to the callbacks."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+        for callback in self.callbacks:
+            callback(name, value)
+
+    @contextmanager
+    def timed(self, phase: str) -> Iterator[None]:
+        """Time a phase, the time is added to the ``<phase>_seconds`` counter."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(f"{phase}_seconds", time.perf_counter() - start)
+
+    def snapshot(self) -> dict[str, float]:
+        """Return a copy of all counters."""
+        snapshot = dict.fromkeys(COUNTERS, 0) | {f"{phase}_seconds": 0.0 for phase in PHASES}
+        with self._lock:
+            snapshot.update(self._counters)
+
+        snapshot["cache_hits"] = snapshot["cache_lookups"] - snapshot["cache_misses"]
+        return snapshot
+
+    def reset(self) -> None:
+        """Reset all counters to zero."""
+        with self._lock:
+            self._counters.clear()
+
+
+def timer(metrics: Metrics | None, phase: str) -> AbstractContextManager[None]:
+    """Return a context manager that times a phase, which does nothing without metrics."""
+    return _NULL_TIMER if metrics is None else metrics.timed(phase)
+
+
+class MeteredReader:
+    """Positional reader (see :mod:`dissect.clfs.pread`) that counts and times the reads of another one.
+
+    Like the positional reader itself, it can be shared by many threads. A read counts as a seek if it doesn't continue
+    where the previous read of any thread ended.
+
+    Args:
+        reader: The positional reader to read from.
+        metrics: The metrics to update.
+    """
+
+    def __init__(self, reader: Positional, metrics: Metrics):
+        self.reader = reader
+        self.metrics = metrics
+
+        # The end of the previous read, to count the seeks
+        self._end = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self.reader.size
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        buf = bytearray(size)
+        del buf[self.readinto_at(buf, offset) :]
+        return bytes(buf)
+
+    def readinto_at(self, buf: bytearray | memoryview, offset: int) -> int:
+        with self.metrics.timed("read"):
+            count = self.reader.readinto_at(buf, offset)
+
+        with self._lock:
+            seek = offset != self._end
+            self._end = offset + count
+
+        if seek:
+            self.metrics.add("seeks")
+        self.metrics.add("read_calls")
+        self.metrics.add("bytes_read", count)
+        return count
@@ -0,0 +1,159 @@
+"""Positional reads, so many threads can share the file-like object of a BLF or container file.
+
+All reads of log blocks and metadata go through :func:`positional`, which never depends on the file position of the
+shared file-like object. Regular files are read with ``os.pread``, in-memory buffers (see
+:class:`~dissect.clfs.mapped.BufferFile`) are sliced, and other file-like objects fall back to a ``seek`` and
+``readinto`` under a lock that is shared by all readers of that file-like object only.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import threading
+import weakref
+from typing import TYPE_CHECKING, BinaryIO, Protocol
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+HAS_PREAD = hasattr(os, "pread")
+HAS_PREADV = hasattr(os, "preadv")
+
+# The locks of the file-like objects that are read with a seek and a read, shared by every reader of the same object
+_locks: weakref.WeakKeyDictionary[BinaryIO, threading.Lock] = weakref.WeakKeyDictionary()
+_locks_lock = threading.Lock()
+
+
+class Positional(Protocol):
+    """Protocol of a file-like object that supports thread-safe positional reads."""
+
+    @property
+    def size(self) -> int:
+        """The size of the file."""
+        ...
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        """Read ``size`` bytes at the given offset, fewer at the end of the file."""
+        ...
+
+    def readinto_at(self, buf: bytearray | memoryview, offset: int) -> int:
+        """Read into ``buf`` at the given offset and return the number of bytes read."""
+        ...
+
+
+def _lock(fh: BinaryIO) -> threading.Lock:
+    """Return the lock of a file-like object, which is shared by all readers of that object."""
+    with _locks_lock:
+        try:
+            if (lock := _locks.get(fh)) is None:
+                lock = _locks[fh] = threading.Lock()
+        except TypeError:
+            # Not weakly referenceable, so only the reads through this reader are serialized
+            lock = threading.Lock()
+    return lock
+
+
+def _fileno(fh: BinaryIO) -> int | None:
+    """Return the file descriptor to read a file-like object with ``os.pread``, if that reads the same data.
+
+    Only read-only regular files qualify, unbuffered or buffered: other objects that have a ``fileno``, such as a
+    ``GzipFile``, return data that differs from the contents of their file descriptor, and writable files may hold
+    buffered writes that haven't reached their file descriptor yet. Those are read with a seek and a read instead.
+    """
+    if not HAS_PREAD:
+        return None
+
+    raw = fh.raw if isinstance(fh, io.BufferedReader) else fh
+    if not isinstance(raw, io.FileIO):
+        return None
+
+    try:
+        if fh.writable() or raw.writable():
+            return None
+        return raw.fileno()
+    except (OSError, ValueError):
+        return None
+
+
+class PositionalReader:
+    """Thread-safe positional reads from a file-like object, without using its file position.
+
+    File-like objects that can't be read with ``os.pread`` are read with a seek and a read under a lock, after which
+    their file position is restored, so the caller's position isn't disturbed.
+
+    Args:
+        fh: A seekable file-like object.
+    """
+
+    def __init__(self, fh: BinaryIO):
+        self.fh = fh
+        self.fd = _fileno(fh)
+        self.lock = _lock(fh) if self.fd is None else None
+
+    @property
+    def size(self) -> int:
+        """The size of the file, which is determined on every access, as the file may still grow."""
+        if self.fd is not None:
+            return os.fstat(self.fd).st_size
+
+        with self.lock:
+            pos = self.fh.tell()
+            try:
+                return self.fh.seek(0, io.SEEK_END)
+            finally:
+                self.fh.seek(pos)
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        """Read ``size`` bytes at the given offset, fewer at the end of the file."""
+        buf = bytearray(size)
+        del buf[self.readinto_at(buf, offset) :]
+        return bytes(buf)
+
+    def readinto_at(self, buf: bytearray | memoryview, offset: int) -> int:
+        """Read into ``buf`` at the given offset and return the number of bytes read, fewer at the end of the file."""
+        view = memoryview(buf).cast("B")
+
+        if self.fd is None:
+            with self.lock:
+                pos = self.fh.tell()
+                try:
+                    self.fh.seek(offset)
+                    return _fill(lambda count: self.fh.readinto(view[count:]), len(view))
+                finally:
+                    self.fh.seek(pos)
+
+        return _fill(lambda pos: _preadinto(self.fd, view[pos:], offset + pos), len(view))
+
+
+def _preadinto(fd: int, view: memoryview, offset: int) -> int:
+    if HAS_PREADV:
+        return os.preadv(fd, [view], offset)
+
+    data = os.pread(fd, len(view), offset)
+    view[: len(data)] = data
+    return len(data)
+
+
+def _fill(read: Callable[[int], int | None], size: int) -> int:
+    """Repeat a read until ``size`` bytes are read or the end of the file is reached, as a read may return less."""
+    total = 0
+    while total < size:
+        if not (count := read(total)):
+            break
+        total += count
+    return total
+
+
+def positional(fh: BinaryIO | Positional) -> Positional:
+    """Return an object to read the given file-like object with thread-safe positional reads.
+
+    File-like objects that support positional reads themselves, such as a :class:`~dissect.clfs.mapped.BufferFile`,
+    are returned as-is.
+
+    Args:
+        fh: A seekable file-like object.
+    """
+    if hasattr(fh, "readinto_at"):
+        return fh
+    return PositionalReader(fh)
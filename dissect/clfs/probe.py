@@ -0,0 +1,183 @@
+"""Cheap validation of BLF files, to sweep many files (e.g. all files of a disk image) for BLF files.
+
+Contrary to :class:`~dissect.clfs.blf.BLF`, a probe only reads the control record block, typically the first two
+sectors of the file, and decodes the few fields it needs with precompiled structures instead of cstruct.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
+
+from dissect.clfs.blf import BLF
+from dissect.clfs.c_clfs import (
+    CLFS_CONTROL_RECORD_MAGIC_VALUE,
+    CLFS_LOG_BLOCK_MAJOR_VERSION,
+    LOG_BLOCK_HEADER_SIZE,
+    SECTOR_SIZE,
+    BlockHeader,
+    LogBlockHeader,
+)
+from dissect.clfs.exceptions import Error
+from dissect.clfs.pread import positional
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+# The control record block of a BLF written by Windows is two sectors, larger ones are not expected
+PROBE_SIZE = 2 * SECTOR_SIZE
+MAX_CONTROL_SECTORS = 16
+
+# DumpCount, Magic and Version of CLFS_CONTROL_RECORD
+_CONTROL_RECORD = struct.Struct("<2QB")
+# Blocks of CLFS_CONTROL_RECORD, which is followed by the RgBlocks array
+_CONTROL_RECORD_BLOCKS = struct.Struct("<72xI4x")
+# ImageSize, Offset and Type of CLFS_METADATA_BLOCK
+_METADATA_BLOCK = struct.Struct("<8x3I4x")
+
+
+class MetadataBlock(NamedTuple):
+    """A metadata block listed in the control record.
+
+    Attributes:
+        type: The ``CLFS_METADATA_BLOCK_TYPE`` of the block.
+        offset: The offset of the block in the BLF file.
+        size: The size of the block.
+    """
+
+    type: int
+    offset: int
+    size: int
+
+
+class ProbeResult(NamedTuple):
+    """The summary of a probed file.
+
+    Attributes:
+        path: The path of the file, if known.
+        valid: Whether the file has a valid control record block.
+        reason: Why the file is invalid, or why the container names couldn't be read.
+        block_count: The number of metadata blocks according to the control record.
+        metadata: The metadata blocks listed in the control record.
+        containers: The names of the containers in the active base record, if requested and readable.
+    """
+
+    path: str | None
+    valid: bool
+    reason: str | None = None
+    block_count: int = 0
+    metadata: tuple[MetadataBlock, ...] = ()
+    containers: tuple[str, ...] | None = None
+
+
+def probe(fh: BinaryIO, containers: bool = False) -> ProbeResult:
+    """Check whether a file is a BLF file, reading only its control record block.
+
+    The version of the block header, the fixup array and sector signatures of the block and the magic of the control
+    record are checked. Files that aren't BLF files don't raise an exception, but return an invalid result.
+
+    Args:
+        fh: A file-like object of the file to probe.
+        containers: Whether to also parse the base record to read the container names, which reads the rest of the
+                    metadata blocks.
+    """
+    name = getattr(fh, "name", None)
+    result = ProbeResult(path=name if isinstance(name, str) else None, valid=False)
+
+    reader = positional(fh)
+    buf = bytearray(PROBE_SIZE)
+    del buf[reader.readinto_at(buf, 0) :]
+
+    try:
+        header = LogBlockHeader.from_buffer(buf)
+    except EOFError:
+        return result._replace(reason="File is too small")
+
+    if header.MajorVersion != CLFS_LOG_BLOCK_MAJOR_VERSION:
+        return result._replace(reason=f"Unsupported log block version {header.MajorVersion}.{header.MinorVersion}")
+
+    if not 0 < header.TotalSectors <= MAX_CONTROL_SECTORS:
+        return result._replace(reason=f"Invalid control record block size of {header.TotalSectors} sectors")
+
+    if (size := header.TotalSectors * SECTOR_SIZE) > len(buf):
+        buf += reader.read_at(len(buf), size - len(buf))
+
+    try:
+        block = BlockHeader.from_buffer(buf, 0)
+    except EOFError as e:
+        return result._replace(reason=str(e))
+
+    if block.sector_errors:
+        return result._replace(reason="Invalid sector signatures in control record block")
+
+    record_offset = header.RecordOffsets[0]
+    table_offset = record_offset + _CONTROL_RECORD_BLOCKS.size
+    if record_offset < LOG_BLOCK_HEADER_SIZE or table_offset > header.FixupOffset:
+        return result._replace(reason=f"Invalid control record offset {record_offset:#x}")
+
+    view = block.view
+    _, magic, _ = _CONTROL_RECORD.unpack_from(view, record_offset)
+    if magic != CLFS_CONTROL_RECORD_MAGIC_VALUE:
+        return result._replace(reason=f"Invalid control record magic {magic:#x}")
+
+    (block_count,) = _CONTROL_RECORD_BLOCKS.unpack_from(view, record_offset)
+    if table_offset + block_count * _METADATA_BLOCK.size > header.FixupOffset:
+        return result._replace(reason=f"Invalid number of metadata blocks {block_count}")
+
+    metadata = tuple(
+        MetadataBlock(block_type, offset, image_size)
+        for image_size, offset, block_type in _METADATA_BLOCK.iter_unpack(
+            view[table_offset : table_offset + block_count * _METADATA_BLOCK.size]
+        )
+    )
+    result = result._replace(valid=True, block_count=block_count, metadata=metadata)
+
+    if containers:
+        try:
+            return result._replace(containers=tuple(container.name for container in BLF(fh).containers))
+        except (Error, EOFError) as e:
+            return result._replace(reason=f"Invalid base record: {e}")
+
+    return result
+
+
+def _probe_path(path: str | os.PathLike, containers: bool) -> ProbeResult:
+    try:
+        # Unbuffered, as only a few sectors are read
+        with Path(path).open("rb", buffering=0) as fh:
+            return probe(fh, containers)._replace(path=str(path))
+    except OSError as e:
+        return ProbeResult(path=str(path), valid=False, reason=str(e))
+
+
+def probe_paths(
+    paths: Iterable[str | os.PathLike], workers: int | None = None, containers: bool = False
+) -> Iterator[ProbeResult]:
+    """Probe many files with a pool of threads, see :func:`probe`.
+
+    The probes are I/O-bound, so the files are read by many threads at the same time. The results are yielded in the
+    order of ``paths``, and at most four probes per thread are in flight at any time, so ``paths`` can be a lazy
+    iterator over a large file system. Files that can't be read result in an invalid result.
+
+    Args:
+        paths: The paths of the files to probe.
+        workers: The number of threads, defaults to the default of ``ThreadPoolExecutor``.
+        containers: Whether to also read the container names, see :func:`probe`.
+    """
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    paths = iter(paths)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(_probe_path, path, containers) for path in islice(paths, workers * 4))
+
+        while pending:
+            result = pending.popleft().result()
+            for path in islice(paths, 1):
+                pending.append(executor.submit(_probe_path, path, containers))
+
+            yield result
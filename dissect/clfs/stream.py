@@ -0,0 +1,223 @@
+"""Forward-only parsing of containers from non-seekable sources, such as pipes, decompressors and tar members."""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
+
+from dissect.clfs.c_clfs import LOG_BLOCK_HEADER_SIZE, SECTOR_SIZE, BlockHeader, LogBlockHeader
+from dissect.clfs.container import _scan_block, _walk_block
+from dissect.clfs.exceptions import InvalidRecordBlockError
+from dissect.clfs.verify import ChecksumPolicy, check_block
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from dissect.clfs.container import Record
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+class ChainEntry(NamedTuple):
+    """A record on the ``LsnPrevious`` chain of a streamed container.
+
+    Attributes:
+        offset: The offset of the start record in the container, like the offsets yielded by
+                :meth:`~dissect.clfs.container.Container.records`.
+        block_offset: The offset of the log block holding the record.
+        lsn: The LSN of the start record.
+        next_lsn: The LSN of the record following the start record.
+    """
+
+    offset: int
+    block_offset: int
+    lsn: int
+    next_lsn: int
+
+
+class ForwardReader:
+    """Bounded window over a forward-only file-like object, of which only ``read`` is used.
+
+    Data is read in chunks of ``buffer_size`` bytes. The window only grows beyond that size to hold a single log block
+    that's larger than the buffer.
+
+    Args:
+        fh: A file-like object, which doesn't have to be seekable.
+        buffer_size: The size of the reads and of the window.
+    """
+
+    def __init__(self, fh: BinaryIO, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.fh = fh
+        self.buffer_size = buffer_size
+
+        self.buf = bytearray()
+        self.start = 0
+        # The offset in the file of the start of the window
+        self.offset = 0
+        self.eof = False
+
+    def peek(self, size: int) -> bytearray:
+        """Return a copy of the next ``size`` bytes without consuming them, fewer at the end of the file."""
+        if len(self.buf) - self.start < size and not self.eof:
+            del self.buf[: self.start]
+            self.start = 0
+
+            while len(self.buf) < size and not self.eof:
+                chunk = self.fh.read(max(self.buffer_size - len(self.buf), size - len(self.buf)))
+                if not chunk:
+                    self.eof = True
+                self.buf += chunk
+
+        return self.buf[self.start : self.start + size]
+
+    def skip(self, size: int) -> None:
+        """Consume ``size`` bytes."""
+        self.peek(size)
+        size = min(size, len(self.buf) - self.start)
+        self.start += size
+        self.offset += size
+
+
+class ContainerStream:
+    """Forward-only counterpart of :class:`~dissect.clfs.container.Container`, for non-seekable sources.
+
+    The container is read strictly front to back through a bounded buffer and the log blocks are decoded in order.
+    Since the ``LsnPrevious`` chain runs backwards, it can't be followed while reading. Instead, the location and links
+    of the start record of every log block are kept in a compact map, from which the chain is resolved afterwards by
+    :meth:`chain`.
+
+    The stream can only be read once: every call to :meth:`blocks` or :meth:`scan` continues where the previous one
+    stopped, and :meth:`chain` reads the remainder of the stream.
+
+    Args:
+        fh: A file-like object of the container file, which doesn't have to be seekable.
+        offset: The offset of the most recent log block, where the ``LsnPrevious`` chain starts.
+        buffer_size: The size of the reads and of the buffer.
+        strict: Whether log blocks with invalid sector signatures are rejected.
+        checksum: What to do with log blocks that have an invalid checksum (see
+                  :class:`~dissect.clfs.verify.ChecksumPolicy`), ``None`` to not verify the checksums.
+    """
+
+    def __init__(
+        self,
+        fh: BinaryIO,
+        offset: int,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        strict: bool = False,
+        checksum: ChecksumPolicy | str | None = None,
+    ):
+        self.reader = ForwardReader(fh, buffer_size)
+        self.offset = offset
+        self.strict = strict
+        self.checksum = ChecksumPolicy(checksum) if checksum is not None else None
+
+        # The map of start records, ordered by the offset of their log block
+        self._block_offsets = array("Q")
+        self._record_offsets = array("I")
+        self._lsns = array("Q")
+        self._next_lsns = array("Q")
+        self._previous = array("Q")
+
+        self._blocks = self._read_blocks()
+
+    @property
+    def size(self) -> int:
+        """The number of bytes of the container that have been read."""
+        return self.reader.offset
+
+    def _read_blocks(self) -> Iterator[BlockHeader]:
+        reader = self.reader
+
+        while True:
+            offset = reader.offset
+            raw_header = reader.peek(LOG_BLOCK_HEADER_SIZE)
+            if len(raw_header) < LOG_BLOCK_HEADER_SIZE:
+                break
+
+            # Unused sectors and blocks that extend beyond the end of the container are skipped one sector at a time
+            size = LogBlockHeader.from_buffer(raw_header).TotalSectors * SECTOR_SIZE
+            if not size or len(buf := reader.peek(size)) < size:
+                reader.skip(SECTOR_SIZE)
+                continue
+
+            reader.skip(size)
+
+            try:
+                log_block = BlockHeader.from_buffer(buf, offset, strict=self.strict)
+            except (EOFError, InvalidRecordBlockError):
+                continue
+
+            if self.checksum is not None and not check_block(log_block, self.checksum):
+                continue
+
+            self._add(log_block)
+            yield log_block
+
+    def _add(self, log_block: BlockHeader) -> None:
+        """Add the start record of a log block to the map."""
+        try:
+            (offset, start_header, next_header, _, _), _ = _walk_block(log_block, zero_copy=True)
+        except InvalidRecordBlockError:
+            return
+
+        self._block_offsets.append(log_block.offset)
+        self._record_offsets.append(offset - log_block.offset)
+        self._lsns.append(start_header.LsnVirtual)
+        self._next_lsns.append(next_header.LsnVirtual)
+        self._previous.append(next_header.LsnPrevious)
+
+    def blocks(self) -> Iterator[BlockHeader]:
+        """Return an iterator over the log blocks that haven't been read yet, from front to back."""
+        # Not a generator of its own, as closing that would close the underlying one as well
+        return self._blocks
+
+    def scan(self) -> Iterator[Record]:
+        """Yield the records of the log blocks that haven't been read yet, from front to back.
+
+        Whether the records are live isn't known until the whole stream is read, see :meth:`live`.
+        """
+        for log_block in self._blocks:
+            yield from _scan_block(log_block, None)
+
+    def chain(self) -> list[ChainEntry]:
+        """Return the records on the ``LsnPrevious`` chain, from the most recent to the oldest.
+
+        The remainder of the stream is read first. The chain ends at a record without ``LsnPrevious``, or at a link to a
+        log block that wasn't read or is already on the chain.
+        """
+        for _ in self._blocks:
+            pass
+
+        entries = []
+        visited = set()
+        block_offset = self.offset
+
+        while block_offset not in visited:
+            idx = bisect_left(self._block_offsets, block_offset)
+            if idx == len(self._block_offsets) or self._block_offsets[idx] != block_offset:
+                break
+
+            visited.add(block_offset)
+            entries.append(
+                ChainEntry(
+                    offset=block_offset + self._record_offsets[idx],
+                    block_offset=block_offset,
+                    lsn=self._lsns[idx],
+                    next_lsn=self._next_lsns[idx],
+                )
+            )
+
+            if not (previous := self._previous[idx]):
+                break
+            block_offset = previous - 1
+
+        return entries
+
+    def live(self) -> set[int]:
+        """Return the LSNs of all records that are reachable through the ``LsnPrevious`` chain."""
+        lsns = set()
+        for entry in self.chain():
+            lsns.add(entry.lsn)
+            lsns.add(entry.next_lsn)
+        return lsns
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import logging
+import time
+from enum import Enum
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
+
+from dissect.clfs.c_clfs import LOG_BLOCK_HEADER_SIZE, SECTOR_SIZE, LogBlockHeader, block_checksum
+from dissect.clfs.exceptions import ChecksumError
+from dissect.clfs.pread import positional
+
+if TYPE_CHECKING:
+    from dissect.clfs.c_clfs import BlockHeader
+    from dissect.clfs.pread import Positional
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+class ChecksumPolicy(Enum):
+    """What to do with log blocks that have an invalid checksum."""
+
+    SKIP = "skip"
+    """Leave the block out, without any further notice."""
+    WARN = "warn"
+    """Log a warning and use the block anyway."""
+    RAISE = "raise"
+    """Raise a :class:`~dissect.clfs.exceptions.ChecksumError`."""
+
+
+class BlockChecksum(NamedTuple):
+    """The checksum verification result of a single log block.
+
+    Attributes:
+        offset: The offset of the log block in the file.
+        size: The size of the log block.
+        expected: The checksum in the block header, zero if the block has no checksum.
+        actual: The checksum of the block data.
+    """
+
+    offset: int
+    size: int
+    expected: int
+    actual: int
+
+    @property
+    def valid(self) -> bool:
+        return not self.expected or self.expected == self.actual
+
+
+class VerifyResult(NamedTuple):
+    """The result of verifying the checksums of all log blocks in a file.
+
+    Attributes:
+        blocks: The verification result of every log block, in file order.
+        bytes_read: The number of bytes read from the file.
+        seconds: The time it took to verify the file.
+    """
+
+    blocks: list[BlockChecksum]
+    bytes_read: int
+    seconds: float
+
+    @property
+    def valid(self) -> bool:
+        """Whether all log blocks have a valid checksum."""
+        return all(block.valid for block in self.blocks)
+
+    @property
+    def invalid(self) -> list[BlockChecksum]:
+        """The log blocks with an invalid checksum."""
+        return [block for block in self.blocks if not block.valid]
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_read / self.seconds if self.seconds else 0.0
+
+    @property
+    def blocks_per_second(self) -> float:
+        return len(self.blocks) / self.seconds if self.seconds else 0.0
+
+
+def _apply_policy(policy: ChecksumPolicy, message: str) -> bool:
+    """Apply the policy to an invalid checksum, return whether the log block should still be used."""
+    if policy is ChecksumPolicy.RAISE:
+        raise ChecksumError(message)
+
+    if policy is ChecksumPolicy.WARN:
+        log.warning(message)
+        return True
+
+    return False
+
+
+def check_block(block: BlockHeader, policy: ChecksumPolicy | str) -> bool:
+    """Verify the checksum of a decoded log block according to the given policy.
+
+    Args:
+        block: The log block to verify.
+        policy: What to do if the checksum is invalid.
+
+    Returns:
+        Whether the log block should be used.
+    """
+    if block.checksum_valid:
+        return True
+
+    return _apply_policy(
+        ChecksumPolicy(policy),
+        f"Log block at offset {block.offset:#x} has an invalid checksum: "
+        f"{block.header.Checksum:#010x} != {block.checksum:#010x}",
+    )
+
+
+def _read_chunk(reader: Positional, offset: int, size: int) -> memoryview:
+    buf = bytearray(size)
+    return memoryview(buf)[: reader.readinto_at(buf, offset)]
+
+
+def verify_blocks(
+    fh: BinaryIO | Positional,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    policy: ChecksumPolicy | str = ChecksumPolicy.SKIP,
+) -> VerifyResult:
+    """Verify the checksums of all log blocks in a BLF or container file.
+
+    The file is read sequentially in chunks of ``chunk_size`` bytes, and the log blocks are located in the same way as
+    :meth:`~dissect.clfs.container.Container.blocks` does. The checksums are calculated over the raw chunk data, without
+    decoding or fixing up the log blocks.
+
+    Args:
+        fh: A file-like object or positional reader (see :mod:`dissect.clfs.pread`) of a BLF or container file.
+        chunk_size: The number of bytes to read at once.
+        policy: What to do with log blocks that have an invalid checksum. With ``"skip"`` and ``"warn"`` all log blocks
+                are verified, with ``"raise"`` the verification stops at the first invalid one.
+    """
+    policy = ChecksumPolicy(policy)
+    start = time.perf_counter()
+
+    reader = positional(fh)
+    size = reader.size
+    results = []
+    bytes_read = 0
+
+    chunk = memoryview(b"")
+    chunk_offset = 0
+    offset = 0
+
+    while offset < size:
+        pos = offset - chunk_offset
+        if pos + LOG_BLOCK_HEADER_SIZE > len(chunk):
+            chunk = _read_chunk(reader, offset, chunk_size)
+            chunk_offset, pos = offset, 0
+            bytes_read += len(chunk)
+
+        try:
+            header = LogBlockHeader.from_buffer(chunk, pos)
+        except EOFError:
+            break
+
+        block_size = header.TotalSectors * SECTOR_SIZE
+        if not block_size or offset + block_size > size:
+            offset += SECTOR_SIZE
+            continue
+
+        if pos + block_size > len(chunk):
+            chunk = _read_chunk(reader, offset, max(chunk_size, block_size))
+            chunk_offset, pos = offset, 0
+            bytes_read += len(chunk)
+
+        result = BlockChecksum(offset, block_size, header.Checksum, block_checksum(chunk[pos : pos + block_size]))
+        results.append(result)
+
+        if not result.valid:
+            _apply_policy(
+                policy,
+                f"Log block at offset {offset:#x} has an invalid checksum: "
+                f"{result.expected:#010x} != {result.actual:#010x}",
+            )
+
+        offset += block_size
+
+    return VerifyResult(results, bytes_read, time.perf_counter() - start)
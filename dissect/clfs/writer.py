@@ -0,0 +1,554 @@
+"""Writers of BLF and container files.
+
+The files are laid out like the ones written by Windows. A container starts with a restart area, followed by log blocks
+that each hold a data record with the payload and a restart record that links to the previous log block through its
+``LsnPrevious``. A BLF holds the control, base and truncate metadata blocks and their shadows. All log blocks are
+encoded (sector signatures and fixup array) before they're written, and container blocks are streamed to disk one by
+one, so large containers can be written without holding them in memory.
+"""
+
+from __future__ import annotations
+
+import zlib
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
+
+from dissect.clfs.c_clfs import (
+    CLFS_CONTROL_RECORD_MAGIC_VALUE,
+    CLFS_LOG_BLOCK_MAJOR_VERSION,
+    LOG_BLOCK_HEADER_SIZE,
+    RECORD_HEADER_SIZE,
+    SECTOR_BLOCK_BEGIN,
+    SECTOR_BLOCK_END,
+    SECTOR_SIZE,
+    LogBlockHeader,
+    Lsn,
+    RecordHeader,
+    block_checksum,
+    c_clfs,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Sector signature types of container and metadata blocks, as found in logs written by Windows
+SECTOR_TYPE_CONTAINER = 0x04
+SECTOR_TYPE_METADATA = 0x10
+
+NO_LSN = 0xFFFFFFFF00000000
+# The offset part of an LSN is 32 bits
+MAX_CONTAINER_SIZE = 0xFFFFFFFF
+
+RECORD_OFFSET = 0x70
+RESTART_DATA_SIZE = 32
+
+# The metadata blocks of a BLF: type, offset and number of sectors
+METADATA_BLOCKS = (
+    (c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockControl, 0x0, 2),
+    (c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockControlShadow, 0x400, 2),
+    (c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockGeneral, 0x800, 61),
+    (c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockGeneralShadow, 0x8200, 61),
+    (c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockScratch, 0xFC00, 1),
+    (c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockScratchShadow, 0xFE00, 1),
+)
+
+SYMBOL_TABLE_SIZE = 11
+# Allocation sizes of the symbol table nodes, as found in logs written by Windows
+SYMBOL_NODE_SIZE = 0x30
+CLIENT_CONTEXT_NODE_SIZE = 0x88
+CONTAINER_CONTEXT_NODE_SIZE = 0x30
+
+DATA_RECORD = c_clfs.RecordType.ClfsDataRecord | c_clfs.RecordType.ClfsStartRecord
+RESTART_RECORD = c_clfs.RecordType.ClfsLastRecord | c_clfs.RecordType.ClfsRestartRecord
+UNLINKED_RECORD = DATA_RECORD | c_clfs.RecordType.ClfsLastRecord
+RESTART_AREA = c_clfs.RecordType.ClfsStartRecord | RESTART_RECORD
+
+
+class ContainerInfo(NamedTuple):
+    """A container and the stream that is stored in it, as described by the base record of a BLF.
+
+    Attributes:
+        name: The symbol name of the container.
+        stream: The symbol name of the stream.
+        id: The container id.
+        offset: The offset of the most recent log block of the stream, where the ``LsnPrevious`` chain starts.
+        size: The size of the container file.
+    """
+
+    name: str
+    stream: str
+    id: int
+    offset: int
+    size: int
+
+
+def _align(value: int, alignment: int = 8) -> int:
+    return (value + alignment - 1) & ~(alignment - 1)
+
+
+def _fixup_offset(sectors: int) -> int:
+    """Return the offset of the fixup array in a log block, at the end of the last sector, before its signature."""
+    return (sectors * SECTOR_SIZE - 2 - 2 * sectors) & ~7
+
+
+def block_sectors(data_size: int) -> int:
+    """Return the number of sectors of a log block with ``data_size`` bytes of records."""
+    sectors = max(1, -(-(RECORD_OFFSET + data_size) // SECTOR_SIZE))
+    while _fixup_offset(sectors) < RECORD_OFFSET + data_size:
+        sectors += 1
+    return sectors
+
+
+def encode_block(buf: bytearray, usn: int, sector_type: int, checksum: bool) -> bytearray:
+    """Encode a log block in place: save the sector ends in the fixup array, then write the sector signatures.
+
+    Args:
+        buf: The log block, with its header, records and ``FixupOffset``.
+        usn: The update sequence number, which must match the ``Fixup`` in the block header.
+        sector_type: The type flags of the sector signatures.
+        checksum: Whether to calculate and store the checksum of the encoded block.
+    """
+    sectors = len(buf) // SECTOR_SIZE
+    fixup = LogBlockHeader.from_buffer(buf).FixupOffset
+
+    fixups = bytearray(2 * sectors)
+    fixups[0::2] = buf[SECTOR_SIZE - 2 :: SECTOR_SIZE]
+    fixups[1::2] = buf[SECTOR_SIZE - 1 :: SECTOR_SIZE]
+    buf[fixup : fixup + len(fixups)] = fixups
+
+    flags = bytearray([sector_type]) * sectors
+    flags[0] |= SECTOR_BLOCK_BEGIN
+    flags[-1] |= SECTOR_BLOCK_END
+    buf[SECTOR_SIZE - 2 :: SECTOR_SIZE] = flags
+    buf[SECTOR_SIZE - 1 :: SECTOR_SIZE] = bytes([usn]) * sectors
+
+    if checksum:
+        buf[0x0C:0x10] = block_checksum(buf).to_bytes(4, "little")
+
+    return buf
+
+
+def build_block(
+    data: bytes,
+    *,
+    current_lsn: int = NO_LSN,
+    next_lsn: int = NO_LSN,
+    sectors: int | None = None,
+    sector_type: int = SECTOR_TYPE_CONTAINER,
+    checksum: bool = False,
+    usn: int = 1,
+) -> bytearray:
+    """Build an encoded log block holding the given record data.
+
+    Args:
+        data: The records of the log block.
+        current_lsn: The ``CurrentLsn`` of the block header.
+        next_lsn: The ``NextLsn`` of the block header.
+        sectors: The size of the block in sectors, defaults to the minimum size that fits the data.
+        sector_type: The type flags of the sector signatures.
+        checksum: Whether to calculate the checksum of the block.
+        usn: The update sequence number of the block.
+
+    Raises:
+        ValueError: If the record data doesn't fit in the given number of sectors.
+    """
+    sectors = sectors or block_sectors(len(data))
+    fixup = _fixup_offset(sectors)
+    if RECORD_OFFSET + len(data) > fixup:
+        raise ValueError(f"Record data of {len(data)} bytes doesn't fit in a log block of {sectors} sectors")
+
+    header = LogBlockHeader(
+        MajorVersion=CLFS_LOG_BLOCK_MAJOR_VERSION,
+        MinorVersion=0,
+        Fixup=usn,
+        ClientId=0,
+        TotalSectors=sectors,
+        ValidSectors=sectors,
+        Reserved1=0,
+        Checksum=0,
+        Flags=c_clfs.CLFS_LOG_BLOCK_FLAGS.ENCODED.value,
+        Reserved2=0,
+        CurrentLsn=Lsn(current_lsn),
+        NextLsn=Lsn(next_lsn),
+        RecordOffsets=(RECORD_OFFSET,) + (0,) * 15,
+        FixupOffset=fixup,
+    )
+
+    buf = bytearray(sectors * SECTOR_SIZE)
+    buf[:LOG_BLOCK_HEADER_SIZE] = header.dumps()
+    buf[RECORD_OFFSET : RECORD_OFFSET + len(data)] = data
+    return encode_block(buf, usn, sector_type, checksum)
+
+
+def build_record(
+    lsn: int,
+    record_type: int,
+    data: bytes,
+    lsn_undo_next: int = NO_LSN,
+    lsn_previous: int = NO_LSN,
+) -> bytes:
+    """Build a record header followed by the record data.
+
+    Args:
+        lsn: The ``LsnVirtual`` of the record.
+        record_type: The ``RecordType`` flags of the record.
+        data: The record data.
+        lsn_undo_next: The ``LsnUndoNext`` of the record.
+        lsn_previous: The ``LsnPrevious`` of the record.
+    """
+    header = RecordHeader(
+        LsnVirtual=lsn,
+        LsnUndoNext=lsn_undo_next,
+        LsnPrevious=lsn_previous,
+        DataSize=RECORD_HEADER_SIZE + len(data),
+        Unknown=0,
+        RecordFlags=0,
+        Offset=RECORD_HEADER_SIZE,
+        Type=record_type,
+    )
+    return header.dumps() + data
+
+
+class ContainerWriter:
+    """Streaming writer of a container file.
+
+    Log blocks are encoded and written as they're appended, nothing but the position of the chain is kept in memory.
+    The lower 32 bits of the ``CurrentLsn`` of the log blocks and the LSNs of the records are the physical offset of
+    the log block, like in logs written by Windows. Every time the writer wraps around to the start of the container,
+    the upper 32 bits (the container id part of an LSN) are incremented, so the LSNs keep increasing. The
+    ``LsnPrevious`` of the restart records is the offset of the previous log block plus one, which is how
+    :class:`~dissect.clfs.container.Container` follows the chain.
+
+    Args:
+        fh: A writable file-like object to write the container to.
+        checksum: Whether to calculate the checksums of the log blocks. Windows leaves them empty for containers.
+        usn: The update sequence number of the log blocks.
+    """
+
+    def __init__(self, fh: BinaryIO, checksum: bool = False, usn: int = 1):
+        self.fh = fh
+        self.checksum = checksum
+        self.usn = usn
+
+        # The offset to write the next log block at, and its LSN: the number of wraps in the upper 32 bits and the
+        # offset in the lower 32 bits
+        self.offset = 0
+        self.lsn = 0
+        # The offset of the most recent log block on the chain, zero while the chain is empty
+        self.head = 0
+        self.end = 0
+        self.blocks = 0
+        self.records = 0
+
+    def write_block(self, data: bytes, next_block: bool = True) -> int:
+        """Write an encoded log block holding the given records at the current position.
+
+        Args:
+            data: The records of the log block, see :func:`build_record`.
+            next_block: Whether to point the ``NextLsn`` of the block to the block following it.
+
+        Returns:
+            The offset of the written log block.
+
+        Raises:
+            ValueError: If the LSN of the log block exceeds the maximum size of a container.
+        """
+        sectors = block_sectors(len(data))
+        size = sectors * SECTOR_SIZE
+        if self.offset + size > MAX_CONTAINER_SIZE:
+            raise ValueError("Container exceeds the maximum LSN offset of 4 GiB, use more containers instead")
+
+        offset = self.offset
+        next_lsn = self.lsn + size if next_block else NO_LSN
+        block = build_block(
+            data,
+            current_lsn=self.lsn,
+            next_lsn=next_lsn,
+            sectors=sectors,
+            checksum=self.checksum,
+            usn=self.usn,
+        )
+
+        self.fh.seek(offset)
+        self.fh.write(block)
+
+        self.offset += size
+        self.lsn += size
+        self.end = max(self.end, self.offset)
+        self.blocks += 1
+        return offset
+
+    def write_restart_area(self, data: bytes = bytes(RESTART_DATA_SIZE)) -> int:
+        """Write the restart area of the container, which is the first log block of a new container.
+
+        Returns:
+            The offset of the written log block.
+        """
+        return self.write_block(build_record(self.lsn, RESTART_AREA.value, data, 0, NO_LSN))
+
+    def append(self, data: bytes, restart_data: bytes | None = None) -> int:
+        """Append a record to the chain, in a log block of its own.
+
+        The log block holds a data record with the given data, followed by a restart record that links to the
+        previously appended log block. The record data may span as many sectors as needed.
+
+        Args:
+            data: The data of the data record, the block data of :meth:`~dissect.clfs.container.Container.records`.
+            restart_data: The data of the restart record, the record data of
+                          :meth:`~dissect.clfs.container.Container.records`. Defaults to the index of the record.
+
+        Returns:
+            The LSN of the data record.
+        """
+        if restart_data is None:
+            restart_data = self.records.to_bytes(8, "little").ljust(RESTART_DATA_SIZE, b"\x00")
+
+        lsn = self.lsn
+        previous = self.head | 1 if self.records else 0
+        self.head = self.write_block(
+            build_record(lsn, DATA_RECORD.value, data)
+            + build_record(lsn | 1, RESTART_RECORD.value, restart_data, 0, previous)
+        )
+        self.records += 1
+        return lsn
+
+    def append_unlinked(self, data: bytes) -> int:
+        """Append a record in a log block of its own, that is not on the chain.
+
+        Such log blocks are left behind when records are no longer reachable, for example after a truncation.
+
+        Returns:
+            The LSN of the record.
+        """
+        lsn = self.lsn
+        self.write_block(build_record(lsn, UNLINKED_RECORD.value, data), next_block=False)
+        return lsn
+
+    def wrap(self) -> None:
+        """Continue writing at the start of the container, overwriting the oldest log blocks.
+
+        The offset part of the LSNs starts at zero again and the container id part is incremented, so the LSNs keep
+        increasing and the log blocks written after wrapping around are newer than the ones after them. The log blocks
+        that are overwritten are not unlinked from the chain, so the oldest remaining record on the chain links to an
+        overwritten log block, like in a log whose tail was overwritten. A walk over the chain ends there, see
+        :mod:`dissect.clfs.chain`.
+        """
+        self.offset = 0
+        self.lsn = ((self.lsn >> 32) + 1) << 32
+
+    def finish(self, size: int | None = None) -> int:
+        """Finish the container, optionally padding it to the given size.
+
+        Args:
+            size: The size of the container file, defaults to the size of the written log blocks.
+
+        Returns:
+            The size of the container file.
+
+        Raises:
+            ValueError: If the given size is smaller than the written log blocks.
+        """
+        if size is None:
+            return self.end
+
+        if size < self.end:
+            raise ValueError(f"Container size {size} is too small for {self.end} bytes of log blocks")
+
+        if size > self.end:
+            # Extend the container by writing its last byte, which leaves a sparse file on most file systems
+            self.fh.seek(size - 1)
+            self.fh.write(b"\x00")
+        return size
+
+
+class _Symbol(NamedTuple):
+    name: str
+    context: bytes
+
+
+def _symbol_zone(symbols: list[_Symbol], start: int) -> tuple[bytes, list[int], list[int]]:
+    """Lay out a symbol table: every symbol is a hash symbol node, followed by its context and its name.
+
+    Symbols in the same hash bucket are linked through the ``Below`` field of the previous symbol in the bucket.
+
+    Returns:
+        The symbol zone, the symbol table (bucket heads) and the offsets of the contexts, relative to the record.
+    """
+    table = [0] * SYMBOL_TABLE_SIZE
+    offsets = []
+    below = {}
+    nodes = []
+
+    offset = start
+    for symbol in symbols:
+        name = symbol.name.encode("utf-16-le")
+        ulhash = zlib.crc32(symbol.name.upper().encode("utf-16-le"))
+        context_offset = offset + SYMBOL_NODE_SIZE
+        name_offset = context_offset + _align(len(symbol.context))
+        end = _align(name_offset + len(name) + 2)
+
+        bucket = ulhash % SYMBOL_TABLE_SIZE
+        if table[bucket] == 0:
+            table[bucket] = offset
+        else:
+            node = table[bucket]
+            while below.get(node):
+                node = below[node]
+            below[node] = offset
+
+        nodes.append((offset, ulhash, len(name), name_offset, context_offset, symbol.context, name))
+        offsets.append(context_offset)
+        offset = end
+
+    zone = bytearray(offset - start)
+    for sym_offset, ulhash, name_size, name_offset, context_offset, context, name in nodes:
+        sym = c_clfs.CLFS_HASH_SYM(
+            NodeId=c_clfs.CLFS_NODE_ID(Type=c_clfs.CLFS_NODE_TYPE.SYMBOL, Node=SYMBOL_NODE_SIZE),
+            UlHash=ulhash,
+            CbHash=name_size,
+            Below=below.get(sym_offset, 0),
+            Above=0,
+            SymbolName=name_offset,
+            Offset=context_offset,
+        ).dumps()
+        zone[sym_offset - start : sym_offset - start + len(sym)] = sym
+        zone[context_offset - start : context_offset - start + len(context)] = context
+        zone[name_offset - start : name_offset - start + len(name)] = name
+
+    return bytes(zone), table, offsets
+
+
+def build_control_record(dump_count: int = 1) -> bytes:
+    """Build a control record that lists the metadata blocks of :data:`METADATA_BLOCKS`.
+
+    Args:
+        dump_count: The ``DumpCount`` of the record.
+    """
+    return c_clfs.CLFS_CONTROL_RECORD(
+        RecordHeader=c_clfs.CLFS_METADATA_RECORD_HEADER(DumpCount=dump_count),
+        Magic=CLFS_CONTROL_RECORD_MAGIC_VALUE,
+        Version=1,
+        Blocks=len(METADATA_BLOCKS),
+        RgBlocks=[
+            c_clfs.CLFS_METADATA_BLOCK(ImageSize=sectors * SECTOR_SIZE, Offset=offset, Type=block_type)
+            for block_type, offset, sectors in METADATA_BLOCKS
+        ],
+    ).dumps()
+
+
+def build_base_record(name: str, containers: Iterable[ContainerInfo], dump_count: int = 1) -> bytes:
+    """Build a base record with a client (stream) and container symbol for every container.
+
+    Args:
+        name: The name of the log, from which the log id is derived.
+        containers: The containers and their streams.
+        dump_count: The ``DumpCount`` of the record.
+    """
+    containers = list(containers)
+    client_symbols = []
+    container_symbols = []
+
+    for container in containers:
+        lsn_base = (container.id << 32) | (container.offset + 1)
+        client_symbols.append(
+            _Symbol(
+                container.stream,
+                c_clfs.CLFS_CLIENT_CONTEXT(
+                    NodeId=c_clfs.CLFS_NODE_ID(
+                        Type=c_clfs.CLFS_NODE_TYPE.CLIENT_CONTEXT, Node=CLIENT_CONTEXT_NODE_SIZE
+                    ),
+                    ClientId=container.id,
+                    FileAttributes=c_clfs.FILE_ATTRIBUTES.HIDDEN | c_clfs.FILE_ATTRIBUTES.TEMPORARY,
+                    FlushThreshold=40000,
+                    LsnArchiveTail=c_clfs.CLFS_LSN(PhysicalOffset=NO_LSN),
+                    LsnBase=c_clfs.CLFS_LSN(PhysicalOffset=lsn_base),
+                    LsnFlush=c_clfs.CLFS_LSN(PhysicalOffset=lsn_base),
+                    LsnLast=c_clfs.CLFS_LSN(PhysicalOffset=(container.id << 32) | container.size),
+                    LsnPhysicalBase=c_clfs.CLFS_LSN(PhysicalOffset=lsn_base),
+                    LsnUnused1=c_clfs.CLFS_LSN(PhysicalOffset=NO_LSN),
+                ).dumps(),
+            )
+        )
+        container_symbols.append(
+            _Symbol(
+                container.name,
+                c_clfs.CLFS_CONTAINER_CONTEXT(
+                    NodeId=c_clfs.CLFS_NODE_ID(
+                        Type=c_clfs.CLFS_NODE_TYPE.CONTAINER_CONTEXT, Node=CONTAINER_CONTEXT_NODE_SIZE
+                    ),
+                    Container=container.size,
+                    ContainerId=container.id,
+                    QueueId=container.id,
+                    CurrentUsn=1,
+                ).dumps(),
+            )
+        )
+
+    zone_start = _align(len(c_clfs.CLFS_BASE_RECORD_HEADER))
+    client_zone, client_table, client_offsets = _symbol_zone(client_symbols, zone_start)
+    container_zone, container_table, container_offsets = _symbol_zone(container_symbols, zone_start + len(client_zone))
+
+    header = c_clfs.CLFS_BASE_RECORD_HEADER(
+        RecordHeader=c_clfs.CLFS_METADATA_RECORD_HEADER(DumpCount=dump_count),
+        IdLog=list(zlib.crc32(name.encode()).to_bytes(4, "little") * 4),
+        ClientSymbolTable=client_table,
+        ContainerSymbolTable=container_table,
+        SecuritySymbolTable=[0] * SYMBOL_TABLE_SIZE,
+        NextClient=len(containers),
+        ActiveContainers=len(containers),
+        ClientContainers=(client_offsets + [0] * 124)[:124],
+        ContainerArray=(container_offsets + [0] * 1024)[:1024],
+        SymbolZone=len(client_zone) + len(container_zone),
+        Usn=1,
+        Clients=len(containers),
+    ).dumps()
+
+    return header.ljust(zone_start, b"\x00") + client_zone + container_zone
+
+
+def build_truncate_record(dump_count: int = 1) -> bytes:
+    """Build an empty truncate record.
+
+    Args:
+        dump_count: The ``DumpCount`` of the record.
+    """
+    return c_clfs.CLFS_TRUNCATE_RECORD_HEADER(
+        RecordHeader=c_clfs.CLFS_METADATA_RECORD_HEADER(DumpCount=dump_count),
+    ).dumps()
+
+
+def write_blf(
+    fh: BinaryIO,
+    name: str,
+    containers: Iterable[ContainerInfo],
+    shadow: Iterable[ContainerInfo] | None = None,
+    checksum: bool = True,
+) -> None:
+    """Write a BLF file describing the given containers and their streams.
+
+    All metadata blocks of :data:`METADATA_BLOCKS` are written. Like in logs written by Windows, the shadow blocks have
+    a higher ``DumpCount``, which makes the shadow base record the active one.
+
+    Args:
+        fh: A writable file-like object to write the BLF to.
+        name: The name of the log.
+        containers: The containers and streams of the log.
+        shadow: The containers and streams of the shadow base record, defaults to the same as the base record. A
+                different set of containers lets the base record and its shadow diverge.
+        checksum: Whether to calculate the checksums of the metadata blocks.
+    """
+    containers = list(containers)
+    shadow = containers if shadow is None else list(shadow)
+
+    for block_type, offset, sectors in METADATA_BLOCKS:
+        is_shadow = block_type.value % 2
+        dump_count = 1 + is_shadow
+
+        if block_type.value < 2:
+            record = build_control_record(dump_count)
+        elif block_type.value < 4:
+            record = build_base_record(name, shadow if is_shadow else containers, dump_count)
+        else:
+            record = build_truncate_record(dump_count)
+
+        fh.seek(offset)
+        fh.write(build_block(record, sectors=sectors, sector_type=SECTOR_TYPE_METADATA, checksum=checksum))
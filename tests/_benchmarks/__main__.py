@@ -0,0 +1,77 @@
+"""Generate a synthetic log and benchmark dissect.clfs on it.
+
+Example:
+    Benchmark a log of 1 GB, spread over 4 streams, and compare the results with an earlier run::
+
+        python -m tests._benchmarks --streams 4 --records 250000 --record-size 1024 \\
+            --output current.json --compare baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from tests._benchmarks.generate import CHAIN_SHAPES, generate
+from tests._benchmarks.run import BENCHMARKS, compare, run, save
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m tests._benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--directory", type=Path, help="directory for the generated log (default: temporary)")
+    parser.add_argument("--keep", action="store_true", help="keep the generated log")
+    parser.add_argument("--streams", type=int, default=1, help="number of streams, each in its own container")
+    parser.add_argument("--records", type=int, default=100_000, help="number of records per stream")
+    parser.add_argument("--record-size", type=int, default=256, help="payload size of every record")
+    parser.add_argument("--chain", choices=CHAIN_SHAPES, default="linear", help="shape of the record chain")
+    parser.add_argument("--container-size", type=int, help="size of every container file")
+    parser.add_argument("--checksum", action="store_true", help="store checksums in the container log blocks")
+    parser.add_argument("--benchmark", action="append", choices=list(BENCHMARKS), help="benchmark to run (repeatable)")
+    parser.add_argument("--no-trace", action="store_true", help="don't measure the allocations")
+    parser.add_argument("--output", type=Path, default=Path("benchmark.json"), help="file to save the results to")
+    parser.add_argument("--compare", type=Path, help="results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    parameters = {
+        "streams": args.streams,
+        "records": args.records,
+        "record_size": args.record_size,
+        "chain": args.chain,
+        "container_size": args.container_size,
+        "checksum": args.checksum,
+    }
+
+    directory = args.directory or Path(tempfile.mkdtemp(prefix="dissect.clfs-benchmark-"))
+    try:
+        log = generate(directory, **parameters)
+        print(f"Generated {log.records} records in {log.size / 1e6:.1f} MB at {directory}")
+
+        results = run(log, args.benchmark, trace=not args.no_trace)
+    finally:
+        if not args.keep and args.directory is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{'benchmark':<28} {'seconds':>9} {'records/s':>12} {'MB/s':>9} {'peak RSS MB':>12} {'alloc MB':>9}")
+    for result in results:
+        peak_rss = f"{result.peak_rss / 1e6:.1f}" if result.peak_rss is not None else "-"
+        alloc_peak = f"{result.alloc_peak / 1e6:.1f}" if result.alloc_peak is not None else "-"
+        print(
+            f"{result.name:<28} {result.seconds:>9.3f} {result.records_per_second:>12.0f} "
+            f"{result.mb_per_second:>9.1f} {peak_rss:>12} {alloc_peak:>9}"
+        )
+
+    document = save(args.output, results, parameters)
+    print(f"Saved results to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        print(f"\n{'benchmark':<28} {'baseline/s':>12} {'current/s':>12} {'speedup':>8}")
+        for name, before, after, speedup in compare(baseline, document):
+            print(f"{name:<28} {before:>12.0f} {after:>12.0f} {speedup:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
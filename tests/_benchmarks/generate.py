@@ -0,0 +1,161 @@
+"""Generator of synthetic, but structurally valid, BLF and container files for the benchmarks.
+
+Every log consists of a BLF file and one container per stream, written with :mod:`dissect.clfs.writer`. Every record
+is stored in a log block of its own. The log blocks are streamed to disk one by one, so logs of several GB can be
+generated without holding them in memory.
+"""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from dissect.clfs.writer import ContainerInfo, ContainerWriter, write_blf
+
+if TYPE_CHECKING:
+    import os
+
+CHAIN_SHAPES = ("linear", "interleaved")
+
+
+class GeneratedContainer(NamedTuple):
+    """A generated container and the stream that is stored in it.
+
+    Attributes:
+        path: The path of the container file.
+        name: The symbol name of the container.
+        stream: The symbol name of the stream.
+        id: The container id.
+        offset: The offset of the most recent log block of the stream, where the ``LsnPrevious`` chain starts.
+        size: The size of the container file.
+        records: The number of records on the ``LsnPrevious`` chain.
+        blocks: The total number of log blocks in the container.
+    """
+
+    path: Path
+    name: str
+    stream: str
+    id: int
+    offset: int
+    size: int
+    records: int
+    blocks: int
+
+    @property
+    def info(self) -> ContainerInfo:
+        return ContainerInfo(self.name, self.stream, self.id, self.offset, self.size)
+
+
+class GeneratedLog(NamedTuple):
+    blf: Path
+    containers: list[GeneratedContainer]
+
+    @property
+    def size(self) -> int:
+        return sum(container.size for container in self.containers)
+
+    @property
+    def records(self) -> int:
+        return sum(container.records for container in self.containers)
+
+
+def write_container(
+    path: str | os.PathLike,
+    records: int,
+    record_size: int,
+    chain: str = "linear",
+    container_size: int | None = None,
+    checksum: bool = False,
+    seed: int = 0,
+) -> tuple[int, int, int]:
+    """Write a container file with a single chain of records.
+
+    Args:
+        path: The path of the container file.
+        records: The number of records on the ``LsnPrevious`` chain.
+        record_size: The size of the payload of every record.
+        chain: The shape of the chain, ``linear`` to put every log block on the chain, or ``interleaved`` to write a log
+               block that's not on the chain after every log block that is.
+        container_size: The size of the container file, defaults to the size of the written log blocks.
+        checksum: Whether to calculate the checksums of the log blocks.
+        seed: The seed of the pseudo-random payloads.
+
+    Returns:
+        The offset of the most recent log block on the chain, the size of the container file and the number of blocks.
+    """
+    if chain not in CHAIN_SHAPES:
+        raise ValueError(f"Unknown chain shape {chain!r}, expected one of {', '.join(CHAIN_SHAPES)}")
+
+    # Pseudo-random payloads are slices at varying offsets of a single random buffer
+    pool = random.Random(seed).randbytes(record_size + 4096)
+
+    with Path(path).open("wb") as fh:
+        writer = ContainerWriter(fh, checksum=checksum)
+        writer.write_restart_area()
+
+        for idx in range(records):
+            start = idx % 4096
+            payload = pool[start : start + record_size]
+
+            writer.append(payload)
+            if chain == "interleaved":
+                writer.append_unlinked(payload)
+
+        size = writer.finish(container_size)
+
+    return writer.head, size, writer.blocks
+
+
+def generate(
+    directory: str | os.PathLike,
+    name: str = "synthetic",
+    streams: int = 1,
+    records: int = 1000,
+    record_size: int = 256,
+    chain: str = "linear",
+    container_size: int | None = None,
+    checksum: bool = False,
+    seed: int = 0,
+) -> GeneratedLog:
+    """Generate a BLF file and its containers, with one container per stream.
+
+    Args:
+        directory: The directory to write the files to.
+        name: The name of the log, used for the file names.
+        streams: The number of streams (and containers).
+        records: The number of records per stream.
+        record_size: The size of the payload of every record.
+        chain: The shape of the chain in every container, see :func:`write_container`.
+        container_size: The size of every container file, defaults to the size of the written log blocks.
+        checksum: Whether to calculate the checksums of the container log blocks.
+        seed: The seed of the pseudo-random payloads.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    containers = []
+    for container_id in range(streams):
+        filename = f"{name}Container{container_id + 1:020d}"
+        path = directory / filename
+
+        offset, size, blocks = write_container(
+            path, records, record_size, chain, container_size, checksum, seed + container_id
+        )
+        containers.append(
+            GeneratedContainer(
+                path=path,
+                name=f"%BLF%\\{filename}",
+                stream=f"{name}::stream{container_id}",
+                id=container_id,
+                offset=offset,
+                size=size,
+                records=records,
+                blocks=blocks,
+            )
+        )
+
+    blf = directory / f"{name}.blf"
+    with blf.open("wb") as fh:
+        write_blf(fh, name, [container.info for container in containers])
+    return GeneratedLog(blf, containers)
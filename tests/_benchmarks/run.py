@@ -0,0 +1,285 @@
+"""Benchmarks of the public API of dissect.clfs over a generated log.
+
+Every benchmark runs in a fresh process, so the peak RSS that is reported belongs to that benchmark alone. The
+allocations are measured in a second run of the benchmark with ``tracemalloc`` enabled, as tracing slows down the code
+under test considerably.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import multiprocessing
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from dissect.clfs.blf import BLF
+from dissect.clfs.container import Container
+from dissect.clfs.logset import LogSet
+
+if TYPE_CHECKING:
+    import os
+    from collections.abc import Callable
+
+    from tests._benchmarks.generate import GeneratedLog
+
+RESULTS_VERSION = 1
+
+# Parsing a BLF takes far less time than the timer resolution allows to measure reliably
+BLF_ITERATIONS = 100
+
+
+class BenchmarkResult(NamedTuple):
+    name: str
+    seconds: float
+    records: int
+    bytes: int
+    peak_rss: int | None
+    alloc_peak: int | None
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes / self.seconds / 1e6 if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            **self._asdict(),
+            "records_per_second": self.records_per_second,
+            "mb_per_second": self.mb_per_second,
+        }
+
+
+def _containers(log: GeneratedLog, **kwargs) -> list[Container]:
+    return [Container(container.path.open("rb"), container.offset, **kwargs) for container in log.containers]
+
+
+def bench_blf_parse(log: GeneratedLog) -> tuple[int, int]:
+    """Parse the BLF and its streams and containers."""
+    data = log.blf.read_bytes()
+    for _ in range(BLF_ITERATIONS):
+        with log.blf.open("rb") as fh:
+            blf = BLF(fh)
+            assert len(blf.streams) == len(log.containers)
+    return BLF_ITERATIONS * len(log.containers), BLF_ITERATIONS * len(data)
+
+
+def bench_blf_verify_all(log: GeneratedLog) -> tuple[int, int]:
+    """Verify the checksums of all metadata blocks of the BLF."""
+    size = 0
+    for _ in range(BLF_ITERATIONS):
+        with log.blf.open("rb") as fh:
+            result = BLF(fh).verify_all()
+            assert result.valid
+            size += result.bytes_read
+    return BLF_ITERATIONS * len(result.blocks), size
+
+
+def bench_container_records(log: GeneratedLog) -> tuple[int, int]:
+    """Walk the ``LsnPrevious`` chain of every container with :meth:`Container.records`."""
+    records = sum(sum(1 for _ in container.records()) for container in _containers(log))
+    return records, log.size
+
+
+def bench_container_records_zero_copy(log: GeneratedLog) -> tuple[int, int]:
+    """Walk the ``LsnPrevious`` chain of every container with :meth:`Container.records`, without copying the data."""
+    records = sum(sum(1 for _ in container.records(zero_copy=True)) for container in _containers(log))
+    return records, log.size
+
+
+def bench_container_records_mmap(log: GeneratedLog) -> tuple[int, int]:
+    """Walk the ``LsnPrevious`` chain of every memory-mapped container with :meth:`Container.records`."""
+    containers = [Container.mmap(container.path, container.offset) for container in log.containers]
+    records = sum(sum(1 for _ in container.records()) for container in containers)
+    return records, log.size
+
+
+def bench_container_scan(log: GeneratedLog) -> tuple[int, int]:
+    """Scan every container sequentially with :meth:`Container.scan`, without resolving the chain."""
+    records = sum(sum(1 for _ in container.scan(chain=False)) for container in _containers(log))
+    return records, log.size
+
+
+def bench_container_scan_chain(log: GeneratedLog) -> tuple[int, int]:
+    """Scan every container sequentially with :meth:`Container.scan`, resolving which records are live."""
+    records = sum(sum(1 for _ in container.scan()) for container in _containers(log))
+    return records, log.size
+
+
+def bench_container_records_parallel(log: GeneratedLog) -> tuple[int, int]:
+    """Scan every container with :meth:`Container.records_parallel`."""
+    records = sum(sum(1 for _ in container.records_parallel()) for container in _containers(log))
+    return records, log.size
+
+
+def bench_container_header_table(log: GeneratedLog) -> tuple[int, int]:
+    """Decode all record headers of every container with :meth:`Container.header_table`."""
+    records = sum(len(container.header_table()) for container in _containers(log))
+    return records, log.size
+
+
+def bench_container_follow(log: GeneratedLog) -> tuple[int, int]:
+    """Read every container from the oldest record with :meth:`Container.follow`."""
+    records = sum(sum(1 for _ in container.follow()) for container in _containers(log))
+    return records, log.size
+
+
+def bench_container_build_index(log: GeneratedLog) -> tuple[int, int]:
+    """Build a record index of every container."""
+    records = sum(len(container.build_index()) for container in _containers(log))
+    return records, log.size
+
+
+def bench_container_verify_all(log: GeneratedLog) -> tuple[int, int]:
+    """Verify the checksums of all log blocks of every container."""
+    blocks = 0
+    for container in _containers(log):
+        result = container.verify_all()
+        assert result.valid
+        blocks += len(result.blocks)
+    return blocks, log.size
+
+
+def bench_block_fixup(log: GeneratedLog) -> tuple[int, int]:
+    """Decode and fix up every log block of every container."""
+    blocks = 0
+    for container in _containers(log, block_cache_size=0):
+        for log_block in container.blocks():
+            log_block.view  # noqa: B018
+            blocks += 1
+    return blocks, log.size
+
+
+def bench_logset_records(log: GeneratedLog) -> tuple[int, int]:
+    """Read the records of all streams, merged in LSN order, with :meth:`LogSet.records`."""
+    logset = LogSet.open(log.blf)
+    try:
+        records = sum(1 for _ in logset.records())
+    finally:
+        logset.close()
+    return records, log.size
+
+
+BENCHMARKS: dict[str, Callable[[GeneratedLog], tuple[int, int]]] = {
+    "blf_parse": bench_blf_parse,
+    "blf_verify_all": bench_blf_verify_all,
+    "block_fixup": bench_block_fixup,
+    "container_records": bench_container_records,
+    "container_records_zero_copy": bench_container_records_zero_copy,
+    "container_records_mmap": bench_container_records_mmap,
+    "container_scan": bench_container_scan,
+    "container_scan_chain": bench_container_scan_chain,
+    "container_records_parallel": bench_container_records_parallel,
+    "container_header_table": bench_container_header_table,
+    "container_follow": bench_container_follow,
+    "container_build_index": bench_container_build_index,
+    "container_verify_all": bench_container_verify_all,
+    "logset_records": bench_logset_records,
+}
+
+if importlib.util.find_spec("numpy") is None:
+    del BENCHMARKS["container_header_table"]
+
+
+def _peak_rss() -> int | None:
+    """Return the peak resident set size of the current process in bytes, if available."""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports the peak RSS in kilobytes, macOS in bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run(name: str, log: GeneratedLog, trace: bool) -> BenchmarkResult:
+    """Run a single benchmark, this is executed in a fresh process."""
+    benchmark = BENCHMARKS[name]
+
+    start = time.perf_counter()
+    records, size = benchmark(log)
+    seconds = time.perf_counter() - start
+    peak_rss = _peak_rss()
+
+    alloc_peak = None
+    if trace:
+        tracemalloc.start()
+        try:
+            benchmark(log)
+            _, alloc_peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return BenchmarkResult(name, seconds, records, size, peak_rss, alloc_peak)
+
+
+def run(log: GeneratedLog, names: list[str] | None = None, trace: bool = True) -> list[BenchmarkResult]:
+    """Run the given benchmarks, or all of them, over a generated log.
+
+    Args:
+        log: The log to run the benchmarks on.
+        names: The names of the benchmarks to run, defaults to all of them.
+        trace: Whether to measure the allocations of every benchmark.
+    """
+    results = []
+    context = multiprocessing.get_context("spawn")
+
+    for name in names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            raise ValueError(f"Unknown benchmark {name!r}")
+
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results.append(executor.submit(_run, name, log, trace).result())
+
+    return results
+
+
+def _version() -> str | None:
+    try:
+        return version("dissect.clfs")
+    except PackageNotFoundError:
+        return None
+
+
+def save(path: str | os.PathLike, results: list[BenchmarkResult], parameters: dict) -> dict:
+    """Save the benchmark results as JSON, with the parameters of the generated log and a description of the system."""
+    document = {
+        "version": RESULTS_VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "dissect.clfs": _version(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "benchmarks": {result.name: result.to_dict() for result in results},
+    }
+
+    Path(path).write_text(json.dumps(document, indent=2) + "\n")
+    return document
+
+
+def compare(baseline: dict, current: dict) -> list[tuple[str, float, float, float]]:
+    """Compare the records/s of two saved benchmark runs.
+
+    Returns:
+        The name, baseline records/s, current records/s and the speedup of every benchmark in both runs.
+    """
+    rows = []
+    for name, result in current["benchmarks"].items():
+        if (previous := baseline["benchmarks"].get(name)) is None:
+            continue
+
+        before, after = previous["records_per_second"], result["records_per_second"]
+        rows.append((name, before, after, after / before if before else 0.0))
+    return rows
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import io
+from typing import BinaryIO
+
+import pytest
+
+from dissect.clfs.aio import AsyncContainer, AsyncFileReader, ChunkCache, read_blf
+from dissect.clfs.blf import BLF
+from dissect.clfs.container import Container
+from dissect.clfs.exceptions import ChecksumError
+from dissect.clfs.writer import ContainerInfo, ContainerWriter, write_blf
+
+
+class SlowReader:
+    """Reader that simulates network latency and keeps track of the reads in flight."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.reads = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def read_at(self, offset: int, size: int) -> bytes:
+        self.reads.append(offset)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            return self.data[offset : offset + size]
+        finally:
+            self.in_flight -= 1
+
+
+async def _collect(iterator: object) -> list:
+    return [item async for item in iterator]
+
+
+def test_async_container_records(dummy_container: BinaryIO) -> None:
+    expected_records = list(Container(dummy_container, offset=36864).records())
+    expected_scan = list(Container(dummy_container, offset=36864).scan())
+
+    container = AsyncContainer(AsyncFileReader(dummy_container), offset=36864)
+    assert asyncio.run(_collect(container.records())) == expected_records
+    assert asyncio.run(_collect(container.records(start_lsn=0x9000, end_lsn=0xB000))) == list(
+        Container(dummy_container, offset=36864).records(start_lsn=0x9000, end_lsn=0xB000)
+    )
+
+    container = AsyncContainer(AsyncFileReader(dummy_container), offset=36864, read_size=4096)
+    assert asyncio.run(_collect(container.scan())) == expected_scan
+
+
+def test_async_container_in_flight(dummy_container: BinaryIO) -> None:
+    reader = SlowReader(dummy_container.read())
+    container = AsyncContainer(reader, offset=36864, read_size=1024, readahead=4)
+
+    assert len(asyncio.run(_collect(container.records()))) == 12
+    # Reads were issued ahead of the walk, and every chunk was read only once
+    assert reader.max_in_flight > 1
+    assert len(reader.reads) == len(set(reader.reads))
+
+
+def test_chunk_cache_eviction(dummy_container: BinaryIO) -> None:
+    data = dummy_container.read()
+    cache = ChunkCache(SlowReader(data), read_size=512, max_chunks=2)
+
+    async def prefetch() -> list[asyncio.Future]:
+        # The reads in flight are kept beyond the maximum number of chunks, so they can all be cancelled
+        cache.prefetch(0, 8)
+        futures = list(cache._chunks.values())
+        cache.close()
+        await asyncio.sleep(0)
+        return futures
+
+    futures = asyncio.run(prefetch())
+    assert len(futures) == 8
+    assert all(future.cancelled() for future in futures)
+
+    async def read() -> bytearray:
+        buf = await cache.read(0, 8 * 512)
+        await cache.read(8 * 512, 512)
+        return buf
+
+    # The completed chunks are evicted down to the maximum
+    assert asyncio.run(read()) == data[: 8 * 512]
+    assert len(cache._chunks) == 2
+
+
+def test_async_container_checksum() -> None:
+    fh = io.BytesIO()
+    writer = ContainerWriter(fh, checksum=True)
+    writer.write_restart_area()
+    for idx in range(10):
+        writer.append(bytes([idx]) * 600)
+
+    data = bytearray(fh.getvalue())
+    data[writer.head + 0x200] ^= 0xFF
+
+    container = AsyncContainer(SlowReader(bytes(data)), offset=writer.head, checksum="skip")
+    assert len(asyncio.run(_collect(container.scan(chain=False)))) == 2 * 9 + 1
+
+    container = AsyncContainer(SlowReader(bytes(data)), offset=writer.head, checksum="raise")
+    with pytest.raises(ChecksumError):
+        asyncio.run(_collect(container.records()))
+
+
+def test_read_blf(dummy_blf: BinaryIO) -> None:
+    blf = asyncio.run(read_blf(AsyncFileReader(dummy_blf)))
+    expected = BLF(dummy_blf)
+
+    assert blf.streams == expected.streams
+    assert blf.containers == expected.containers
+
+    fh = io.BytesIO()
+    write_blf(fh, "test", [ContainerInfo("%BLF%\\testContainer", "test::stream", 0, 0x200, 0x10000)])
+    blf = asyncio.run(read_blf(SlowReader(fh.getvalue()), checksum="raise"))
+    assert [stream.name for stream in blf.streams] == ["test::stream"]
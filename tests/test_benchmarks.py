@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+
+from dissect.clfs.blf import BLF
+from dissect.clfs.container import Container
+from dissect.clfs.logset import LogSet
+from tests._benchmarks.generate import generate
+from tests._benchmarks.run import BENCHMARKS, _run, compare, save
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.mark.parametrize(("chain", "blocks"), [("linear", 11), ("interleaved", 21)])
+def test_generate(tmp_path: Path, chain: str, blocks: int) -> None:
+    log = generate(tmp_path, streams=2, records=10, record_size=700, chain=chain, container_size=0x10000)
+
+    with log.blf.open("rb") as fh:
+        blf = BLF(fh, checksum="raise")
+        assert blf.verify_all().valid
+        assert sorted(stream.name for stream in blf.streams) == ["synthetic::stream0", "synthetic::stream1"]
+        assert sorted(container.id for container in blf.containers) == [0, 1]
+
+    for generated in log.containers:
+        assert generated.blocks == blocks
+        assert generated.path.stat().st_size == 0x10000
+
+        with generated.path.open("rb") as fh:
+            container = Container(fh, generated.offset, strict=True)
+            records = list(container.records())
+            assert len(records) == 10
+            assert all(len(block_data) == 700 for _, _, block_data in records)
+
+            scanned = list(container.scan())
+            assert sum(record.live for record in scanned) == 20
+            assert len(list(container.blocks())) == blocks
+
+    logset = LogSet.open(log.blf)
+    try:
+        assert len(list(logset.records())) == 20
+    finally:
+        logset.close()
+
+
+def test_run_benchmarks(tmp_path: Path) -> None:
+    log = generate(tmp_path / "log", records=20)
+
+    results = [_run(name, log, trace=name == "container_records") for name in BENCHMARKS]
+    by_name = {result.name: result for result in results}
+    assert by_name["container_records"].records == 20
+    assert by_name["container_records"].alloc_peak > 0
+    assert by_name["container_scan"].records == 41
+    assert by_name["container_scan"].bytes == log.size
+    assert all(result.seconds > 0 for result in results)
+
+    document = save(tmp_path / "results.json", results, {"records": 20})
+    assert json.loads((tmp_path / "results.json").read_text()) == document
+    assert document["benchmarks"]["container_records"]["records_per_second"] > 0
+
+    assert [row[0] for row in compare(document, document)] == list(BENCHMARKS)
+    assert all(row[3] == 1.0 for row in compare(document, document))
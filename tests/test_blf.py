@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import gc
+import io
+import weakref
+from typing import BinaryIO
+
+import pytest
+
+from dissect.clfs.blf import BLF, BaseRecord
+from dissect.clfs.c_clfs import c_clfs
+from dissect.clfs.exceptions import InvalidSymbolTableError
+
+# Offsets in the general base record block of the test data: the record starts at 0x70 in the block at 0x800
+BASE_RECORD = 0x800 + 0x70
+CONTAINER_BUCKET_10 = BASE_RECORD + 8 + 16 + 88 + 10 * 8
+CONTAINER_SYM_1 = BASE_RECORD + 5744
+CONTAINER_SYM_2 = BASE_RECORD + 5456
+SYM_BELOW = 16
+SYM_ABOVE = 24
+
+
+class CountingFile(io.BytesIO):
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.reads = 0
+
+    def read(self, size: int | None = -1) -> bytes:
+        self.reads += 1
+        return super().read(size)
+
+    def readinto(self, buf: bytearray | memoryview) -> int:
+        self.reads += 1
+        return super().readinto(buf)
+
+
+def test_blf_metadata_cached(dummy_blf: BinaryIO) -> None:
+    fh = CountingFile(dummy_blf.read())
+    blf = BLF(fh)
+    reads = fh.reads
+
+    base_records = list(blf.base_records())
+    assert len(base_records) == 2
+    assert [r.block_type for r in base_records] == [
+        c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockGeneral,
+        c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockGeneralShadow,
+    ]
+
+    # All metadata blocks are read at once
+    assert fh.reads == reads + 1
+
+    # And parsed only once
+    assert list(blf.base_records()) == base_records
+    assert next(blf.truncate_records()).logblock.offset == 0xFC00
+    assert next(blf.control_records()) is blf.c_record
+    assert fh.reads == reads + 1
+
+    # The memoized records don't keep the BLF alive through a reference cycle
+    ref = weakref.ref(blf)
+    del base_records
+    gc.disable()
+    try:
+        del blf
+        assert ref() is None
+    finally:
+        gc.enable()
+
+
+def test_blf_containers_streams(dummy_blf: BinaryIO) -> None:
+    blf = BLF(dummy_blf)
+
+    # The shadow base record is the most recently written one in the test data
+    assert blf.base_record.block_type == c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockGeneralShadow
+    assert blf.base_record.record.RecordHeader.DumpCount == 34
+
+    assert len(blf.streams) == 1
+    assert blf.streams[0].offset == 36864
+    assert blf.streams[0].lsn_base.PhysicalOffset == 0x9001
+
+    assert sorted(c.id for c in blf.containers) == [0, 1]
+    assert {c.name.rsplit("\\", 1)[-1] for c in blf.containers} == {
+        "DRIVERS{53b39e70-18c4-11ea-a811-000d3aa4692b}.TMContainer00000000000000000001.regtrans-ms",
+        "DRIVERS{53b39e70-18c4-11ea-a811-000d3aa4692b}.TMContainer00000000000000000002.regtrans-ms",
+    }
+    assert blf.containers is blf.containers
+
+
+def test_base_record_symbol_tree(dummy_blf: BinaryIO) -> None:
+    buf = bytearray(dummy_blf.read())
+    general = c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockGeneral
+    expected = [c.name for c in BaseRecord(io.BytesIO(buf), 0x800, general).containers]
+    assert len(expected) == 2
+
+    # Move the second container symbol from its own bucket to below the first one
+    buf[CONTAINER_BUCKET_10 : CONTAINER_BUCKET_10 + 8] = bytes(8)
+    buf[CONTAINER_SYM_1 + SYM_BELOW : CONTAINER_SYM_1 + SYM_BELOW + 8] = (5456).to_bytes(8, "little")
+    assert [c.name for c in BaseRecord(io.BytesIO(buf), 0x800, general).containers] == expected
+
+    # A cyclic link back to the first symbol doesn't visit it again
+    buf[CONTAINER_SYM_2 + SYM_ABOVE : CONTAINER_SYM_2 + SYM_ABOVE + 8] = (5744).to_bytes(8, "little")
+    assert [c.name for c in BaseRecord(io.BytesIO(buf), 0x800, general).containers] == expected
+
+    # A link outside of the log block
+    buf[CONTAINER_SYM_2 + SYM_ABOVE : CONTAINER_SYM_2 + SYM_ABOVE + 8] = (0x100000).to_bytes(8, "little")
+    with pytest.raises(InvalidSymbolTableError):
+        BaseRecord(io.BytesIO(buf), 0x800, general)
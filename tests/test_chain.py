@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+
+import pytest
+
+from dissect.clfs.aio import AsyncContainer
+from dissect.clfs.c_clfs import SECTOR_SIZE
+from dissect.clfs.chain import ChainGuard, ChainPolicy
+from dissect.clfs.container import Container
+from dissect.clfs.exceptions import ChainError, InvalidRecordBlockError, TraversalLimitError
+from dissect.clfs.writer import DATA_RECORD, RESTART_RECORD, ContainerWriter, build_record
+from tests.test_aio import SlowReader
+
+
+def _wrapped() -> tuple[io.BytesIO, int]:
+    fh = io.BytesIO()
+    writer = ContainerWriter(fh)
+    writer.write_restart_area()
+    for idx in range(6):
+        writer.append(bytes([idx]) * 100)
+
+    writer.wrap()
+    for idx in range(6, 8):
+        writer.append(bytes([idx]) * 100)
+
+    return fh, writer.head
+
+
+def _linked(*blocks: tuple[int, int]) -> io.BytesIO:
+    """Return a container with a log block for every given LSN, whose restart record links to the given ``LsnPrevious``.
+
+    The log blocks are written one after the other, starting at the second sector.
+    """
+    fh = io.BytesIO()
+    writer = ContainerWriter(fh)
+    writer.write_restart_area()
+    for lsn, lsn_previous in blocks:
+        writer.lsn = lsn
+        writer.write_block(
+            build_record(lsn, DATA_RECORD.value, b"data")
+            + build_record(lsn | 1, RESTART_RECORD.value, bytes(32), 0, lsn_previous)
+        )
+    return fh
+
+
+def test_chain_wraparound(caplog: pytest.LogCaptureFixture) -> None:
+    fh, head = _wrapped()
+
+    # The oldest record links to the overwritten log block at offset 0x200, which the walk has already visited. That's
+    # the normal end of a circular log, not a corrupt chain
+    with caplog.at_level(logging.WARNING, logger="dissect.clfs.chain"):
+        records = list(Container(fh, head).records())
+        assert [block_data[0] for _, _, block_data in records] == list(range(7, 0, -1))
+        assert len(list(Container(fh, head, chain_policy="stop").records())) == 7
+        assert len(list(Container(fh, head, chain_policy="raise").records())) == 7
+    assert not caplog.text
+
+
+def test_chain_wraparound_restart_area(caplog: pytest.LogCaptureFixture) -> None:
+    fh = io.BytesIO()
+    writer = ContainerWriter(fh)
+    writer.write_restart_area()
+    for idx in range(6):
+        writer.append(bytes([idx]) * 100)
+
+    writer.wrap()
+    writer.write_restart_area()
+    for idx in range(6, 9):
+        writer.append(bytes([idx]) * 100)
+
+    # The oldest record links to the log block at offset 0x600, which is overwritten and already visited
+    with caplog.at_level(logging.WARNING, logger="dissect.clfs.chain"):
+        records = list(Container(fh, writer.head, chain_policy="raise").records())
+        assert [block_data[0] for _, _, block_data in records] == list(range(8, 2, -1))
+        assert [block_data[0] for _, _, block_data in Container(fh, writer.head).records()] == list(range(8, 2, -1))
+    assert not caplog.text
+
+    # A link into a newer log block that wasn't visited yet ends the walk as well: the walk from the log block at offset
+    # 0x800 links to the overwritten log block at offset 0x600
+    container = Container(fh, 4 * SECTOR_SIZE, chain_policy="raise")
+    assert [block_data[0] for _, _, block_data in container.records()] == [3]
+
+
+def test_chain_corrupt_links() -> None:
+    # A log block that links to itself
+    fh = _linked((SECTOR_SIZE, SECTOR_SIZE | 1))
+    assert len(list(Container(fh, SECTOR_SIZE).records())) == 1
+    with pytest.raises(ChainError, match="non-decreasing LSN"):
+        list(Container(fh, SECTOR_SIZE, chain_policy="raise").records())
+
+    # A log block that links beyond the end of the container
+    fh = _linked((0x100000, 0x80000 | 1))
+    assert len(list(Container(fh, SECTOR_SIZE).records())) == 1
+    with pytest.raises(ChainError, match="invalid log block offset 0x80000"):
+        list(Container(fh, SECTOR_SIZE, chain_policy="raise").records())
+
+    # A log block that links into the middle of a sector
+    fh = _linked((0x100000, 0x100))
+    with pytest.raises(ChainError, match="invalid log block offset 0xff"):
+        list(Container(fh, SECTOR_SIZE, chain_policy="raise").records())
+
+
+def test_chain_loop(caplog: pytest.LogCaptureFixture) -> None:
+    # Two log blocks that link to each other, within the same wrap of the log, so neither was overwritten
+    fh = _linked((0x1000, 2 * SECTOR_SIZE | 1), (0x800, SECTOR_SIZE | 1))
+
+    with caplog.at_level(logging.WARNING, logger="dissect.clfs.chain"):
+        assert len(list(Container(fh, SECTOR_SIZE).records())) == 2
+    assert "loops back to log block at offset 0x200" in caplog.text
+
+    assert len(list(Container(fh, SECTOR_SIZE, chain_policy="stop").records())) == 2
+    with pytest.raises(ChainError, match="loops back to log block at offset 0x200"):
+        list(Container(fh, SECTOR_SIZE, chain_policy="raise").records())
+
+    # The same loop, after the log wrapped around: the log block at offset 0x200 is newer and ends the chain silently
+    fh = _linked((1 << 32 | 0x1000, 2 * SECTOR_SIZE | 1), (0x800, SECTOR_SIZE | 1))
+    assert len(list(Container(fh, SECTOR_SIZE, chain_policy="raise").records())) == 2
+
+
+def test_chain_invalid_start() -> None:
+    # The offset to start at isn't a link, so it's an invalid log block regardless of the chain policy
+    for fh, offset in ((io.BytesIO(), 0), (_linked((SECTOR_SIZE, 0)), 0x100), (_linked((SECTOR_SIZE, 0)), 0x1000)):
+        for policy in ChainPolicy:
+            with pytest.raises(InvalidRecordBlockError, match="possibly corrupt/empty"):
+                list(Container(fh, offset, chain_policy=policy).records())
+
+
+def test_chain_limits(dummy_container: io.BufferedReader) -> None:
+    assert len(list(Container(dummy_container, offset=36864).records())) == 12
+    assert len(list(Container(dummy_container, offset=36864, max_records=5, chain_policy="stop").records())) == 5
+    with pytest.raises(TraversalLimitError, match="limit of 5 records"):
+        list(Container(dummy_container, offset=36864, max_records=5, chain_policy="raise").records())
+
+    container = Container(dummy_container, offset=36864, max_bytes=4 * SECTOR_SIZE, chain_policy="stop")
+    records = list(container.records())
+    assert 0 < len(records) < 12
+    with pytest.raises(TraversalLimitError, match="bytes"):
+        list(Container(dummy_container, offset=36864, max_bytes=4 * SECTOR_SIZE, chain_policy="raise").records())
+
+    # A guard only bounds the offsets by the largest possible offset if the size of the container is unknown
+    guard = ChainGuard(None, ChainPolicy.RAISE)
+    assert guard.visit(0x100000)
+    with pytest.raises(ChainError, match="invalid"):
+        guard.visit(1 << 32)
+
+
+def test_chain_async() -> None:
+    fh, head = _wrapped()
+
+    async def collect(container: AsyncContainer) -> list:
+        return [record async for record in container.records()]
+
+    container = AsyncContainer(SlowReader(fh.getvalue()), offset=head)
+    assert len(asyncio.run(collect(container))) == 7
+
+    container = AsyncContainer(SlowReader(fh.getvalue()), offset=head, chain_policy="raise")
+    assert len(asyncio.run(collect(container))) == 7
+
+    # A log block that links to itself
+    reader = SlowReader(_linked((SECTOR_SIZE, SECTOR_SIZE | 1)).getvalue())
+    container = AsyncContainer(reader, offset=SECTOR_SIZE, chain_policy="raise")
+    with pytest.raises(ChainError, match="non-decreasing LSN"):
+        asyncio.run(collect(container))
+
+    # A loop in the chain
+    reader = SlowReader(_linked((0x1000, 2 * SECTOR_SIZE | 1), (0x800, SECTOR_SIZE | 1)).getvalue())
+    container = AsyncContainer(reader, offset=SECTOR_SIZE, chain_policy="raise")
+    with pytest.raises(ChainError, match="loops back"):
+        asyncio.run(collect(container))
+
+    for offset in (0, 0x100):
+        container = AsyncContainer(SlowReader(b""), offset=offset, chain_policy="raise")
+        with pytest.raises(InvalidRecordBlockError, match="possibly corrupt/empty"):
+            asyncio.run(collect(container))
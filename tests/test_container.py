@@ -1,8 +1,21 @@
 from __future__ import annotations
 
-from typing import BinaryIO, NamedTuple
+import gc
+import io
+import os
+import subprocess
+import sys
+import weakref
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
 
-from dissect.clfs.container import Container
+import pytest
+
+from dissect.clfs.c_clfs import RECORD_HEADER_SIZE, SECTOR_SIZE, c_clfs
+from dissect.clfs.container import Checkpoint, Container
+from dissect.clfs.writer import ContainerWriter, build_record
+
+if TYPE_CHECKING:
+    from pathlib import Path
 
 
 class Data(NamedTuple):
@@ -58,3 +71,325 @@ def test_container_records(dummy_container: BinaryIO) -> None:
         """
     )
     assert records[-1].b_data == expected_last_block_data
+
+
+def test_container_block_cache(dummy_container: BinaryIO) -> None:
+    trans = Container(fh=dummy_container, offset=36864)
+
+    first = list(trans.records())
+    info = trans.cache_info()
+    assert info.misses == info.currsize
+    assert info.hits == 0
+
+    # A second walk over the same container is served from the block cache
+    second = list(trans.records())
+    assert second == first
+    assert trans.cache_info().misses == info.misses
+    assert trans.cache_info().hits == info.misses
+
+
+def test_container_block_cache_size(dummy_container: BinaryIO) -> None:
+    trans = Container(fh=dummy_container, offset=36864, block_cache_size=2)
+
+    assert len(list(trans.records())) == 12
+    assert trans.cache_info().maxsize == 2
+    assert trans.cache_info().currsize == 2
+
+
+def test_container_block_cache_release(dummy_container: BinaryIO) -> None:
+    trans = Container(fh=dummy_container, offset=36864)
+    assert len(list(trans.records())) == 12
+    ref = weakref.ref(trans)
+
+    # The block cache doesn't keep the container alive through a reference cycle
+    gc.disable()
+    try:
+        del trans
+        assert ref() is None
+    finally:
+        gc.enable()
+
+    trans = Container(fh=dummy_container, offset=36864)
+    list(trans.records())
+    trans.close()
+    assert trans.cache_info().currsize == 0
+    assert not dummy_container.closed
+
+
+def test_container_records_zero_copy(dummy_container: BinaryIO) -> None:
+    expected = list(Container(fh=dummy_container, offset=36864).records())
+
+    # The slices keep their log block alive after it's evicted from the block cache
+    trans = Container(fh=dummy_container, offset=36864, block_cache_size=0)
+    records = list(trans.records(zero_copy=True))
+    assert records == expected
+
+    for _, r_data, b_data in records:
+        assert isinstance(r_data, memoryview)
+        assert isinstance(b_data, memoryview)
+        assert r_data.readonly
+        assert r_data.obj is b_data.obj
+
+    r_data.release()
+    assert b_data.tobytes() == expected[-1][2]
+
+
+def test_container_select(dummy_container: BinaryIO) -> None:
+    records = list(Container(fh=dummy_container, offset=36864).scan(chain=False))
+
+    # Without filters, all records are selected, without decoding any log block
+    trans = Container(fh=dummy_container, offset=36864)
+    handles = list(trans.select())
+    assert trans.cache_info().currsize == 0
+    assert [handle.to_record() for handle in handles] == records
+
+    trans = Container(fh=dummy_container, offset=36864)
+
+    data_type = c_clfs.RecordType.ClfsDataRecord | c_clfs.RecordType.ClfsStartRecord
+    handles = list(trans.select(record_type=data_type, start_lsn=0x2000, end_lsn=0x6000, min_size=1000))
+    expected = [
+        r
+        for r in records
+        if r.header.Type & data_type == data_type and 0x2000 <= r.lsn <= 0x6000 and r.header.DataSize >= 1000
+    ]
+    assert handles
+    assert [handle.lsn for handle in handles] == [r.lsn for r in expected]
+    assert trans.cache_info().currsize == 0
+
+    # The data is only read on access
+    assert handles[0].data == expected[0].data
+    assert bytes(handles[0].read(zero_copy=True)) == expected[0].data
+    assert trans.cache_info().currsize == 1
+
+    assert [h.lsn for h in trans.select(predicate=lambda header: header.LsnPrevious == 0)] == [
+        r.lsn for r in records if r.header.LsnPrevious == 0
+    ]
+    assert [h.to_record() for h in Container(fh=dummy_container, offset=36864, strict=True).select()] == records
+
+
+def test_container_select_fixups() -> None:
+    fh = io.BytesIO()
+    writer = ContainerWriter(fh)
+    # The header of the second record spans the end of the first sector, which is stored in the fixup array
+    writer.write_block(build_record(0, 1, bytes(300)) + build_record(1, 0x21, b"second"))
+
+    trans = Container(fh, offset=0)
+    handles = list(trans.select())
+    assert [handle.offset for handle in handles] == [0x70, 0x70 + RECORD_HEADER_SIZE + 300]
+    assert [handle.to_record() for handle in handles] == list(trans.scan(chain=False))
+    assert handles[1].data == b"second"
+
+
+def test_container_scan(dummy_container: BinaryIO) -> None:
+    trans = Container(fh=dummy_container, offset=36864)
+
+    records = list(trans.scan())
+    assert len(records) == 49
+    assert len(list(trans.blocks())) == 37
+
+    # The scan is sequential and includes records that are not reachable through the chain
+    assert [r.block_offset for r in records] == sorted(r.block_offset for r in records)
+    assert sum(r.live for r in records) == 24
+    assert not records[0].live
+    assert records[0].lsn == 0
+    assert records[1].header.Type & c_clfs.RecordType.ClfsDataRecord
+    assert len(records[1].data) == 960
+
+    # Every record returned by the chain walk is marked as live by the scan
+    chained = {offset: (r_data, b_data) for offset, r_data, b_data in trans.records()}
+    for i, record in enumerate(records):
+        if record.block_offset + record.offset in chained:
+            assert record.live
+            assert records[i + 1].live
+            assert (records[i + 1].data, record.data) == chained[record.block_offset + record.offset]
+
+    assert all(r.live is None for r in trans.scan(chain=False))
+
+
+def test_container_numpy_import() -> None:
+    # NumPy is only imported by header_table(), not by importing the package
+    code = "import sys, dissect.clfs.container; assert 'numpy' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_container_header_table(dummy_container: BinaryIO) -> None:
+    np = pytest.importorskip("numpy")
+
+    container = Container(dummy_container, offset=36864)
+    table = container.header_table()
+    records = list(container.scan(chain=False))
+
+    assert len(table) == len(records) == 49
+    assert table.dtype.names == (
+        "LsnVirtual",
+        "LsnUndoNext",
+        "LsnPrevious",
+        "DataSize",
+        "RecordFlags",
+        "Offset",
+        "Type",
+        "FileOffset",
+    )
+
+    for row, record in zip(table, records, strict=True):
+        assert row["FileOffset"] == record.block_offset + record.offset
+        for name in table.dtype.names[:-1]:
+            assert row[name] == getattr(record.header, name)
+
+    assert np.count_nonzero(table["Type"] & c_clfs.RecordType.ClfsStartRecord) == sum(
+        bool(record.header.Type & c_clfs.RecordType.ClfsStartRecord) for record in records
+    )
+
+
+def test_container_records_parallel(dummy_container: BinaryIO) -> None:
+    trans = Container(fh=dummy_container, offset=36864)
+
+    expected = list(trans.scan(chain=False))
+    records = list(trans.records_parallel(workers=2, chunk_size=4096))
+    assert records == expected
+    assert all(r.live is None for r in records)
+
+    records = list(trans.records_parallel(workers=2, chain=True))
+    assert records == list(trans.scan())
+    assert [r.lsn for r in records] == sorted(r.lsn for r in records)
+
+
+def test_container_records_parallel_no_path() -> None:
+    trans = Container(fh=io.BytesIO(), offset=0)
+
+    with pytest.raises(ValueError, match="requires the path"):
+        list(trans.records_parallel())
+
+
+def test_container_records_parallel_fd(dummy_container: BinaryIO) -> None:
+    expected = list(Container(fh=dummy_container, offset=36864).scan(chain=False))
+
+    # A file opened from a file descriptor is named by the descriptor, which can't be reopened by the workers
+    with os.fdopen(os.dup(dummy_container.fileno()), "rb") as fh:
+        trans = Container(fh=fh, offset=36864)
+        with pytest.raises(ValueError, match="requires the path"):
+            list(trans.records_parallel())
+
+        records = trans.records_parallel(workers=2, chunk_size=512, path=dummy_container.name)
+        assert next(records) == expected[0]
+        # Stopping early doesn't wait for the ranges that are still queued
+        records.close()
+
+
+def test_container_follow(dummy_container: BinaryIO) -> None:
+    trans = Container(fh=dummy_container, offset=36864)
+    records = list(trans.scan(chain=False))
+
+    tail = trans.follow()
+    assert list(tail) == records
+    assert tail.checkpoint == Checkpoint(0x9001, 0x9000, 0x9000)
+
+    # Nothing was appended since the last run
+    tail = trans.follow(tail.checkpoint)
+    assert list(tail) == []
+    assert tail.checkpoint == Checkpoint(0x9001, 0x9000, 0x9000)
+
+    tail = trans.follow(Checkpoint(0x6001, 0x6000, 0x6000))
+    new_records = list(tail)
+    assert new_records == [r for r in records if r.lsn > 0x6001]
+    assert not tail.overwritten
+
+    # Only the blocks from the checkpoint onwards are decoded
+    trans.cache_clear()
+    list(trans.follow(Checkpoint(0x8401, 0x8400, 0x8400)))
+    assert trans.cache_info().misses == 4
+
+
+def test_container_follow_growing(tmp_path: Path) -> None:
+    path = tmp_path / "container"
+    with path.open("wb") as out, path.open("rb") as fh:
+        writer = ContainerWriter(out)
+        writer.write_restart_area()
+        writer.append(b"first")
+        out.flush()
+
+        trans = Container(fh, offset=writer.head)
+        tail = trans.follow()
+        assert [r.data for r in tail][-2:] == [b"first", bytes(32)]
+        index = trans.build_index()
+
+        # The records appended since the previous run are read, beyond the size of the container at that time
+        writer.append(b"second")
+        writer.append(b"third")
+        out.flush()
+
+        tail = trans.follow(tail.checkpoint)
+        assert [r.data for r in tail][::2] == [b"second", b"third"]
+        assert trans.size == writer.end
+        assert index.is_stale(trans)
+
+
+def test_container_follow_torn() -> None:
+    fh = io.BytesIO()
+    writer = ContainerWriter(fh)
+    writer.write_restart_area()
+    writer.append(b"first")
+
+    trans = Container(fh, offset=writer.head, strict=True)
+    tail = trans.follow()
+    assert [r.data for r in tail][-2:] == [b"first", bytes(32)]
+    checkpoint = tail.checkpoint
+
+    torn = writer.offset
+    writer.append(b"second")
+    writer.append(b"third")
+
+    # A torn block in the middle of the new data ends the run, the next run retries it
+    data = fh.getbuffer()
+    data[torn + SECTOR_SIZE - 1] ^= 0xFF
+    tail = trans.follow(checkpoint)
+    assert list(tail) == []
+    assert tail.checkpoint == checkpoint
+
+    data[torn + SECTOR_SIZE - 1] ^= 0xFF
+    del data
+    tail = trans.follow(checkpoint)
+    assert [r.data for r in tail][::2] == [b"second", b"third"]
+
+
+def test_container_size_per_pass(dummy_container: BinaryIO) -> None:
+    trans = Container(fh=dummy_container, offset=36864)
+    reader = trans.reader
+    sizes = []
+
+    class CountingReader:
+        @property
+        def size(self) -> int:
+            sizes.append(reader.size)
+            return sizes[-1]
+
+        def __getattr__(self, name: str) -> object:
+            return getattr(reader, name)
+
+    # The size of the container is determined once per pass over the block headers
+    trans.reader = CountingReader()
+    assert len(list(trans.select())) == len(list(Container(fh=dummy_container, offset=36864).scan(chain=False)))
+    assert len(sizes) == 1
+
+
+def test_container_follow_overwritten(dummy_container: BinaryIO) -> None:
+    trans = Container(fh=dummy_container, offset=36864)
+    records = list(trans.scan(chain=False))
+
+    tail = trans.follow(Checkpoint(0x6001, 0x6000, 0x1000))
+    assert list(tail) == [r for r in records if r.lsn > 0x6001]
+    assert tail.overwritten
+
+
+def test_container_follow_wraparound(dummy_container: BinaryIO) -> None:
+    data = dummy_container.read()
+
+    # Lay out the last blocks of the test container circularly: the most recent block wrapped to the start
+    wrapped = io.BytesIO(data[0x9000:0x9200] + data[0x8400:0x9000])
+    trans = Container(fh=wrapped, offset=0)
+
+    tail = trans.follow(Checkpoint(0x8401, 0x200, 0x8400))
+    assert [r.lsn for r in tail] == [0x8600, 0x8C00, 0x9000, 0x9001]
+    assert [r.block_offset for r in trans.follow(Checkpoint(0x8401, 0x200, 0x8400))] == [0x400, 0xA00, 0x0, 0x0]
+    assert tail.checkpoint == Checkpoint(0x9001, 0x0, 0x9000)
+    assert list(trans.follow(tail.checkpoint)) == []
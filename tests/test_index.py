@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import io
+import shutil
+from array import array
+from typing import TYPE_CHECKING, BinaryIO
+
+import pytest
+
+from dissect.clfs.c_clfs import SECTOR_SIZE
+from dissect.clfs.container import Container
+from dissect.clfs.exceptions import InvalidIndexError
+from dissect.clfs.index import BlockDirectory, RecordIndex
+from dissect.clfs.metrics import Metrics
+from dissect.clfs.writer import ContainerWriter
+from tests.conftest import absolute_path
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+CONTAINER_PATH = absolute_path(
+    "data/DRIVERS{53b39e70-18c4-11ea-a811-000d3aa4692b}.TMContainer00000000000000000001.regtrans-ms"
+)
+
+
+def test_index_roundtrip(dummy_container: BinaryIO, tmp_path: Path) -> None:
+    trans = Container(fh=dummy_container, offset=36864)
+    index = trans.build_index()
+
+    records = sorted(trans.scan(), key=lambda record: record.lsn)
+    assert len(index) == len(records) == 49
+    assert [entry.lsn for entry in index] == [record.lsn for record in records]
+    assert [entry.live for entry in index] == [record.live for record in records]
+
+    index.save(tmp_path / "container.idx")
+    assert (tmp_path / "container.idx").stat().st_size == 40 + 49 * (8 + 8 + 4 + 4 + 4 + 1)
+
+    loaded = Container(fh=dummy_container, offset=36864).load_index(tmp_path / "container.idx")
+    assert list(loaded) == list(index)
+    assert loaded.fingerprint == index.fingerprint
+
+
+def test_index_record_at(dummy_container: BinaryIO) -> None:
+    trans = Container(fh=dummy_container, offset=36864)
+    records = list(trans.scan())
+
+    # Without an index the location is derived from the LSN
+    assert [trans.record_at(record.lsn) for record in records] == [r._replace(live=None) for r in records]
+
+    trans.build_index()
+    assert [trans.record_at(record.lsn) for record in records] == records
+
+    with pytest.raises(KeyError):
+        trans.record_at(0x9002)
+
+
+def test_index_records_range(dummy_container: BinaryIO) -> None:
+    expected = list(Container(fh=dummy_container, offset=36864).records())
+    trans = Container(fh=dummy_container, offset=36864)
+    trans.build_index()
+
+    assert list(trans.records(end_lsn=0x9000)) == expected
+    assert list(trans.records(start_lsn=0x3000, end_lsn=0x6000)) == expected[4:9]
+    assert list(trans.records(start_lsn=0x3001)) == expected[:8]
+
+    # The walk starts straight at the most recent record within the range and only reads one block beyond it
+    trans.cache_clear()
+    assert list(trans.records(start_lsn=0x3000, end_lsn=0x3000)) == expected[8:9]
+    assert trans.cache_info().misses == 2
+
+    assert list(Container(fh=dummy_container, offset=36864).records(0x3000, 0x6000)) == expected[4:9]
+
+
+def test_index_stale(tmp_path: Path) -> None:
+    path = tmp_path / "container.regtrans-ms"
+    shutil.copyfile(CONTAINER_PATH, path)
+
+    with path.open("rb") as fh:
+        RecordIndex.build(Container(fh, offset=36864)).save(tmp_path / "container.idx")
+
+    with path.open("r+b") as fh:
+        fh.seek(0x9000 + 0x20)
+        fh.write(b"\xff")
+
+    with path.open("rb") as fh, pytest.raises(InvalidIndexError, match="stale"):
+        Container(fh, offset=36864).load_index(tmp_path / "container.idx")
+
+
+def test_index_invalid(tmp_path: Path) -> None:
+    (tmp_path / "empty.idx").write_bytes(b"")
+    with pytest.raises(InvalidIndexError):
+        RecordIndex.load(tmp_path / "empty.idx")
+
+    (tmp_path / "magic.idx").write_bytes(b"\x00" * 64)
+    with pytest.raises(InvalidIndexError):
+        RecordIndex.load(tmp_path / "magic.idx")
+
+
+def test_block_directory() -> None:
+    # Wrapped around twice, the most recent blocks are at the start
+    directory = BlockDirectory(array("Q", [70, 80, 30, 40, 50, 60]), array("Q", range(0, 6 * SECTOR_SIZE, SECTOR_SIZE)))
+    assert directory.pivot == 2
+    assert [lsn for lsn, _ in directory] == [30, 40, 50, 60, 70, 80]
+
+    assert directory.find(10) is None
+    assert directory.find(30) == 2 * SECTOR_SIZE
+    assert directory.find(65) == 5 * SECTOR_SIZE
+    assert directory.find(75) == 0
+    assert directory.find(1000) == SECTOR_SIZE
+
+    assert list(directory.range(45, 71)) == [3 * SECTOR_SIZE, 4 * SECTOR_SIZE, 5 * SECTOR_SIZE, 0]
+    assert list(directory.range(None, 35)) == [2 * SECTOR_SIZE]
+    assert list(directory.range(75)) == [0, SECTOR_SIZE]
+    assert list(directory.range(1, 5)) == []
+
+    # Blocks that don't form two sorted runs are sorted
+    directory = BlockDirectory(array("Q", [50, 10, 40, 20]), array("Q", [0, 1, 2, 3]))
+    assert directory.pivot == 0
+    assert list(directory) == [(10, 1), (20, 3), (40, 2), (50, 0)]
+    assert list(directory.range(15, 45)) == [1, 3, 2]
+
+
+def test_records_between(dummy_container: BinaryIO) -> None:
+    metrics = Metrics()
+    trans = Container(fh=dummy_container, offset=36864, metrics=metrics)
+    records = sorted(trans.scan(chain=False), key=lambda record: record.lsn)
+    start_lsn, end_lsn = records[10].lsn, records[20].lsn
+
+    trans.cache_clear()
+    metrics.reset()
+    assert list(trans.records_between(start_lsn, end_lsn)) == records[10:21]
+    # Only the log blocks holding the range are decoded
+    assert metrics.snapshot()["blocks_decoded"] == len({record.block_offset for record in records[10:21]})
+    assert len(trans.directory) == len(list(trans.blocks()))
+
+    assert list(trans.records_between(0, records[-1].lsn)) == records
+    assert list(trans.records_between(end_lsn, start_lsn)) == []
+
+
+def test_records_between_wraparound() -> None:
+    fh = io.BytesIO()
+    writer = ContainerWriter(fh)
+    writer.write_restart_area()
+    lsns = [writer.append(bytes([idx]) * 100) for idx in range(6)]
+    writer.wrap()
+    lsns += [writer.append(bytes([idx]) * 100) for idx in range(6, 8)]
+
+    trans = Container(fh, writer.head)
+    directory = trans.build_directory()
+    assert directory.pivot == 2
+    assert [offset for _, offset in directory] == [SECTOR_SIZE * idx for idx in (2, 3, 4, 5, 6, 0, 1)]
+
+    # The range crosses the point where the container wrapped around
+    records = list(trans.records_between(lsns[4], lsns[7]))
+    assert [record.data[0] for record in records if len(record.data) == 100] == [4, 5, 6, 7]
+    assert [record.block_offset for record in records][::2] == [5 * SECTOR_SIZE, 6 * SECTOR_SIZE, 0, SECTOR_SIZE]
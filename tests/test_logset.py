@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, BinaryIO
+
+import pytest
+
+from dissect.clfs.blf import BLF
+from dissect.clfs.container import Container
+from dissect.clfs.logset import LogSet, PooledFile, container_filename
+from dissect.clfs.writer import ContainerInfo, ContainerWriter, write_blf
+from tests._benchmarks.generate import generate
+from tests.conftest import absolute_path
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+BLF_PATH = absolute_path("data/DRIVERS{53b39e70-18c4-11ea-a811-000d3aa4692b}.TM.blf")
+
+
+def test_container_filename() -> None:
+    assert container_filename("%BLF%\\log.TMContainer00000000000000000001.regtrans-ms") == (
+        "log.TMContainer00000000000000000001.regtrans-ms"
+    )
+    assert container_filename("C:\\Windows\\log.TMContainer1") == "log.TMContainer1"
+
+
+def test_logset(dummy_blf: BinaryIO, dummy_container: BinaryIO) -> None:
+    expected = list(Container(fh=dummy_container, offset=36864).records())
+
+    logset = LogSet(BLF(dummy_blf), absolute_path("data"))
+    records = list(logset.records())
+    logset.close()
+
+    assert len(records) == len(expected)
+    assert [(r.offset, r.record_data, r.block_data) for r in records] == expected
+    assert [r.lsn for r in records] == sorted((r.lsn for r in records), reverse=True)
+    assert records[0].stream.name.endswith("DRIVERS{53b39e70-18c4-11ea-a811-000d3aa4692b}.TM.blf")
+
+
+def test_logset_open() -> None:
+    logset = LogSet.open(BLF_PATH, max_open=1)
+    assert len(list(logset.records())) == 12
+    assert len(logset.pool.handles) == 1
+    logset.close()
+    assert not logset.pool.handles
+
+
+def test_logset_opener(dummy_blf: BinaryIO) -> None:
+    opened = []
+
+    def opener(name: str) -> BinaryIO:
+        opened.append(name)
+        return absolute_path("data").joinpath(name.split("\\")[-1]).open("rb")
+
+    logset = LogSet(dummy_blf, opener, max_open=1)
+    assert not opened
+
+    stream = logset.streams[0]
+    assert logset.container(stream) is logset.container(stream)
+
+    # Evicting the handle from the pool in the middle of a walk reopens it transparently
+    records = logset.records()
+    next(records)
+    logset.pool.close()
+    assert len(list(records)) == 11
+    assert (
+        opened
+        == ["%BLF%\\DRIVERS{53b39e70-18c4-11ea-a811-000d3aa4692b}.TMContainer00000000000000000001.regtrans-ms"] * 2
+    )
+    logset.close()
+
+
+def test_logset_missing_container(dummy_blf: BinaryIO, tmp_path: str) -> None:
+    logset = LogSet(dummy_blf, tmp_path)
+
+    with pytest.raises(FileNotFoundError):
+        list(logset.records())
+
+
+def test_logset_concurrent(tmp_path: Path) -> None:
+    log = generate(tmp_path, streams=4, records=50)
+
+    logset = LogSet.open(log.blf)
+    expected = list(logset.records())
+    logset.close()
+    assert len(expected) == log.records
+
+    # Many threads merge the streams through a single open file handle, which is evicted on every switch of container
+    logset = LogSet.open(log.blf, max_open=1)
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: list(logset.records()), range(8)))
+    assert all(records == expected for records in results)
+
+    def read(container: int) -> bytes:
+        fh = PooledFile(logset.pool, log.containers[container].name)
+        chunks = []
+        while chunk := fh.read(512):
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(read, [idx % 4 for idx in range(16)]))
+    assert results == [log.containers[idx % 4].path.read_bytes() for idx in range(16)]
+    logset.close()
+
+
+def test_logset_single_container(tmp_path: Path) -> None:
+    # The older records of the stream are in container 1, the newer ones in container 0
+    with (tmp_path / "Container1").open("wb") as fh:
+        older = ContainerWriter(fh)
+        older.write_restart_area()
+        older.append(b"older")
+
+    with (tmp_path / "Container0").open("wb") as fh:
+        newer = ContainerWriter(fh)
+        newer.write_restart_area()
+        # Link the first record to the most recent record in container 1
+        newer.head, newer.records = (1 << 32) | older.head, 1
+        newer.append(b"newer")
+        newer.append(b"newest")
+
+    with (tmp_path / "test.blf").open("wb") as fh:
+        write_blf(
+            fh,
+            "test",
+            [
+                ContainerInfo("%BLF%\\Container0", "test::stream", 0, newer.head, newer.end),
+                ContainerInfo("%BLF%\\Container1", "test::other", 1, older.head, older.end),
+            ],
+        )
+
+    # A stream is only read from the container of its LsnPhysicalBase, the walk doesn't cross into container 1
+    logset = LogSet.open(tmp_path / "test.blf")
+    stream = next(stream for stream in logset.streams if stream.name == "test::stream")
+    assert [record.block_data for record in logset._stream_records(stream)] == [b"newest", b"newer"]
+    logset.close()
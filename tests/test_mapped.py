@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import BinaryIO
+
+import pytest
+
+from dissect.clfs.blf import BLF
+from dissect.clfs.c_clfs import BlockHeader
+from dissect.clfs.container import Container
+from dissect.clfs.mapped import MappedFile
+from tests.conftest import absolute_path
+
+CONTAINER_PATH = absolute_path(
+    "data/DRIVERS{53b39e70-18c4-11ea-a811-000d3aa4692b}.TMContainer00000000000000000001.regtrans-ms"
+)
+BLF_PATH = absolute_path("data/DRIVERS{53b39e70-18c4-11ea-a811-000d3aa4692b}.TM.blf")
+
+
+def test_mapped_block_header(control_record_blf: BinaryIO) -> None:
+    expected = BlockHeader(fh=control_record_blf, offset=0)
+
+    with MappedFile(absolute_path("data/control_record.blf")) as fh:
+        logblock = BlockHeader(fh=fh, offset=0)
+        assert logblock.header == expected.header
+        assert logblock.buf.obj is fh.map
+        assert logblock.data == expected.data
+
+        # The fixups are applied to the mapping only once
+        assert BlockHeader(fh=fh, offset=0).data == expected.data
+        del logblock
+
+    # The copy-on-write mapping never writes back to the file
+    control_record_blf.seek(0)
+    assert control_record_blf.read(1024) == absolute_path("data/control_record.blf").read_bytes()
+
+
+def test_mapped_container(dummy_container: BinaryIO) -> None:
+    expected = list(Container(fh=dummy_container, offset=36864).records())
+
+    container = Container.mmap(CONTAINER_PATH, offset=36864)
+    assert list(container.records()) == expected
+
+    container = Container.mmap(dummy_container.fileno(), offset=36864)
+    assert list(container.records()) == expected
+
+
+def test_mapped_container_zero_copy(dummy_container: BinaryIO) -> None:
+    expected = list(Container(fh=dummy_container, offset=36864).records())
+
+    container = Container.mmap(CONTAINER_PATH, offset=36864)
+    records = list(container.records(zero_copy=True))
+    assert records == expected
+    assert all(b_data.obj is container.fh.map for _, _, b_data in records)
+
+    # The mapping can only be closed once the slices and the cached log blocks are gone
+    with pytest.raises(BufferError):
+        container.fh.close()
+
+    del records
+    container.close()
+    assert container.cache_info().currsize == 0
+
+
+def test_mapped_blf(dummy_blf: BinaryIO) -> None:
+    expected = BLF(fh=dummy_blf)
+
+    blf = BLF.mmap(BLF_PATH)
+    assert blf.c_record.record == expected.c_record.record
+    assert [r.containers for r in blf.base_records()] == [r.containers for r in expected.base_records()]
+    assert [r.streams for r in blf.base_records()] == [r.streams for r in expected.base_records()]
+
+    blf.close()
+    assert blf.fh.map.closed
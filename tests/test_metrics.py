@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import BinaryIO
+
+from dissect.clfs.blf import BLF
+from dissect.clfs.c_clfs import BlockHeader
+from dissect.clfs.container import Container
+from dissect.clfs.mapped import MappedFile
+from dissect.clfs.metrics import COUNTERS, PHASES, Metrics
+from tests.conftest import absolute_path
+
+
+def test_metrics_container(dummy_container: BinaryIO) -> None:
+    updates = []
+    metrics = Metrics(callbacks=[lambda name, value: updates.append((name, value))])
+    container = Container(dummy_container, offset=36864, metrics=metrics)
+
+    assert len(list(container.records())) == 12
+    assert len(list(container.records())) == 12
+
+    snapshot = metrics.snapshot()
+    info = container.cache_info()
+    assert snapshot["records_yielded"] == 24
+    assert snapshot["cache_lookups"] == info.hits + info.misses
+    assert snapshot["cache_misses"] == info.misses
+    assert snapshot["cache_hits"] == info.hits
+    assert snapshot["blocks_decoded"] == snapshot["fixups"] == info.misses
+    # Every block is read with one read for its header and one for the rest, walking backwards through the file
+    assert snapshot["read_calls"] == 2 * info.misses
+    assert snapshot["seeks"] == info.misses
+    # The log blocks on the chain are a single sector each
+    assert snapshot["bytes_read"] == info.misses * 512
+    assert snapshot["read_seconds"] > 0
+    assert snapshot["decode_seconds"] > 0
+
+    # The callbacks receive every update
+    totals = {}
+    for name, value in updates:
+        totals[name] = totals.get(name, 0) + value
+    assert all(snapshot[name] == totals.get(name, 0) for name in COUNTERS)
+
+    metrics.reset()
+    assert set(metrics.snapshot().values()) == {0}
+    assert set(metrics.snapshot()) == {*COUNTERS, *(f"{phase}_seconds" for phase in PHASES), "cache_hits"}
+
+
+def test_metrics_select(dummy_container: BinaryIO) -> None:
+    metrics = Metrics()
+    container = Container(dummy_container, offset=36864, metrics=metrics)
+
+    assert len(list(container.select())) == 49
+    snapshot = metrics.snapshot()
+    assert snapshot["records_yielded"] == 49
+    assert snapshot["blocks_decoded"] == 0
+    assert snapshot["read_calls"] > 0
+
+
+def test_metrics_verify(dummy_blf: BinaryIO, dummy_container: BinaryIO) -> None:
+    metrics = Metrics()
+    result = Container(dummy_container, offset=36864, metrics=metrics).verify_all()
+    assert metrics.snapshot()["bytes_read"] == result.bytes_read > 0
+
+    metrics = Metrics()
+    blf = BLF(dummy_blf, metrics=metrics)
+    metrics.reset()
+    result = blf.verify_all()
+    assert metrics.snapshot()["bytes_read"] == result.bytes_read > 0
+
+
+def test_metrics_blf(dummy_blf: BinaryIO) -> None:
+    metrics = Metrics()
+    blf = BLF(dummy_blf, metrics=metrics)
+    assert blf.streams
+
+    snapshot = metrics.snapshot()
+    assert snapshot["blocks_decoded"] == snapshot["fixups"] > 1
+    assert snapshot["parse_seconds"] > 0
+    assert snapshot["symbols_seconds"] > 0
+    assert snapshot["bytes_read"] >= blf._metadata_fh.size
+
+    # Blocks of a memory mapping aren't read
+    metrics = Metrics()
+    with MappedFile(absolute_path("data/DRIVERS{53b39e70-18c4-11ea-a811-000d3aa4692b}.TM.blf")) as fh:
+        BlockHeader(fh, offset=0, metrics=metrics).view.release()
+    assert metrics.snapshot()["blocks_decoded"] == 1
+    assert metrics.snapshot()["bytes_read"] == 0
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, BinaryIO
+
+import pytest
+
+from dissect.clfs.blf import BLF
+from dissect.clfs.container import Container
+from dissect.clfs.mapped import MappedFile
+from dissect.clfs.pread import PositionalReader, positional
+from tests.conftest import absolute_path
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+CONTAINER_PATH = absolute_path(
+    "data/DRIVERS{53b39e70-18c4-11ea-a811-000d3aa4692b}.TMContainer00000000000000000001.regtrans-ms"
+)
+
+
+class RacyFile(io.BytesIO):
+    """File-like object that gives other threads the chance to move the file position between a seek and a read."""
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        pos = super().seek(offset, whence)
+        time.sleep(0)
+        return pos
+
+
+def test_positional_reader(dummy_container: BinaryIO) -> None:
+    data = CONTAINER_PATH.read_bytes()
+
+    # Regular files are read with os.pread, which doesn't move the file position
+    dummy_container.seek(100)
+    reader = PositionalReader(dummy_container)
+    assert reader.fd is not None
+    assert reader.read_at(0x1000, 16) == data[0x1000:0x1010]
+    assert reader.read_at(len(data) - 4, 16) == data[-4:]
+    assert reader.size == len(data)
+    assert dummy_container.tell() == 100
+
+    # Other file-like objects share a lock per object, and keep their file position
+    fh = io.BytesIO(data)
+    fh.seek(100)
+    assert PositionalReader(fh).fd is None
+    assert PositionalReader(fh).lock is PositionalReader(fh).lock
+    assert PositionalReader(fh).read_at(0x1000, 16) == data[0x1000:0x1010]
+    assert PositionalReader(fh).size == len(data)
+    assert fh.tell() == 100
+
+    with MappedFile(CONTAINER_PATH) as mapped:
+        assert positional(mapped) is mapped
+        assert mapped.read_at(0x1000, 16) == data[0x1000:0x1010]
+
+
+@pytest.mark.parametrize("buffering", [0, -1])
+def test_positional_reader_writable(tmp_path: Path, buffering: int) -> None:
+    path = tmp_path / "container"
+    path.write_bytes(bytes(0x1000))
+
+    # Writable files may hold writes that haven't been flushed to the file descriptor yet
+    with path.open("r+b", buffering=buffering) as fh:
+        fh.seek(0x800)
+        fh.write(b"unflushed")
+
+        reader = PositionalReader(fh)
+        assert reader.fd is None
+        assert reader.read_at(0x800, 9) == b"unflushed"
+
+
+@pytest.mark.parametrize("opener", ["file", "racy", "mmap"])
+def test_container_threads(opener: str) -> None:
+    expected_records = list(Container(RacyFile(CONTAINER_PATH.read_bytes()), offset=36864).records())
+    expected_scan = list(Container(RacyFile(CONTAINER_PATH.read_bytes()), offset=36864).scan())
+
+    if opener == "file":
+        fh = CONTAINER_PATH.open("rb")
+    elif opener == "racy":
+        fh = RacyFile(CONTAINER_PATH.read_bytes())
+    else:
+        fh = MappedFile(CONTAINER_PATH)
+
+    # A small block cache, so the threads keep reading and decoding the same log blocks at the same time
+    container = Container(fh, offset=36864, block_cache_size=4)
+
+    def work(idx: int) -> bool:
+        if idx % 3 == 0:
+            return list(container.records()) == expected_records
+        if idx % 3 == 1:
+            return list(container.scan()) == expected_scan
+        return [handle.to_record() for handle in container.select()] == [
+            record._replace(live=None) for record in expected_scan
+        ]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(work, range(48)))
+
+    container.cache_clear()
+    fh.close()
+
+
+def test_blf_threads(dummy_blf: BinaryIO) -> None:
+    data = dummy_blf.read()
+    expected = BLF(io.BytesIO(data))
+
+    fh = RacyFile(data)
+
+    def work(_: int) -> bool:
+        blf = BLF(fh)
+        return blf.streams == expected.streams and blf.containers == expected.containers
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(work, range(32)))
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import io
+from typing import TYPE_CHECKING, BinaryIO
+
+from dissect.clfs.blf import BLF
+from dissect.clfs.c_clfs import c_clfs
+from dissect.clfs.probe import MetadataBlock, probe, probe_paths
+from tests.conftest import absolute_path
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+BLF_PATH = absolute_path("data/DRIVERS{53b39e70-18c4-11ea-a811-000d3aa4692b}.TM.blf")
+
+
+def test_probe(dummy_blf: BinaryIO) -> None:
+    result = probe(dummy_blf)
+    assert result.valid
+    assert result.reason is None
+    assert result.path == str(BLF_PATH)
+    assert result.block_count == 6
+    assert result.metadata[2] == MetadataBlock(c_clfs.CLFS_METADATA_BLOCK_TYPE.ClfsMetaBlockGeneral, 0x800, 0x7A00)
+    assert result.containers is None
+
+    # Only the control record block is read
+    assert probe(io.BytesIO(dummy_blf.read()[:1024])).valid
+
+    result = probe(dummy_blf, containers=True)
+    assert result.containers == tuple(container.name for container in BLF(dummy_blf).containers)
+
+
+def test_probe_invalid(bad_control_record_blf: BinaryIO, invalid_control_record_blf: BinaryIO) -> None:
+    assert probe(io.BytesIO(b"")).reason == "File is too small"
+    assert probe(io.BytesIO(bytes(4096))).reason == "Unsupported log block version 0.0"
+
+    result = probe(invalid_control_record_blf)
+    assert not result.valid
+    assert result.reason.startswith("Invalid control record magic")
+
+    assert not probe(bad_control_record_blf).valid
+
+    # A valid control record block, of which the base record is missing
+    data = BLF_PATH.read_bytes()
+    result = probe(io.BytesIO(data[:1024]), containers=True)
+    assert result.valid
+    assert result.containers is None
+    assert result.reason.startswith("Invalid base record")
+
+
+def test_probe_paths(tmp_path: Path) -> None:
+    data = BLF_PATH.read_bytes()
+    paths = []
+    for idx in range(20):
+        path = tmp_path / f"{idx}.blf"
+        path.write_bytes(data if idx % 2 == 0 else data[1:])
+        paths.append(path)
+    paths.append(tmp_path / "missing.blf")
+
+    results = list(probe_paths(iter(paths), workers=4))
+    assert [result.path for result in results] == [str(path) for path in paths]
+    assert [result.valid for result in results] == [idx % 2 == 0 for idx in range(20)] + [False]
+    assert "No such file" in results[-1].reason
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import io
 from typing import BinaryIO
 
-from dissect.clfs.c_clfs import BlockHeader, c_clfs
+import pytest
+
+from dissect.clfs.c_clfs import SECTOR_SIZE, BlockHeader, LogBlockHeader, RecordHeader, SectorError, c_clfs
+from dissect.clfs.container import Container
+from dissect.clfs.exceptions import TornBlockError
+from dissect.clfs.mapped import BufferFile
 
 
 def test_record_header_c_definitions(control_record_blf: BinaryIO) -> None:
@@ -41,3 +47,128 @@ def test_record_header(control_record_blf: BinaryIO) -> None:
     assert logblock.header.NextLsn.PhysicalOffset == 0xFFFFFFFF00000000
     assert logblock.header.RecordOffsets[0] == 0x70
     assert logblock.header.FixupOffset == 0x3F8
+
+
+def test_block_header_fixup(control_record_blf: BinaryIO) -> None:
+    logblock = BlockHeader(fh=control_record_blf, offset=0)
+
+    control_record_blf.seek(0)
+    raw = control_record_blf.read(logblock.header.TotalSectors * SECTOR_SIZE)
+
+    # The last two bytes of every sector are restored from the fixup array
+    assert raw[SECTOR_SIZE - 2 : SECTOR_SIZE] == b"\x50\x01"
+    assert logblock.view[SECTOR_SIZE - 2 : SECTOR_SIZE] == raw[0x3F8:0x3FA]
+    assert logblock.view[2 * SECTOR_SIZE - 2 : 2 * SECTOR_SIZE] == raw[0x3FA:0x3FC]
+    assert logblock.data[: SECTOR_SIZE - 2] == raw[: SECTOR_SIZE - 2]
+
+
+def test_block_header_zero_copy(control_record_blf: BinaryIO) -> None:
+    logblock = BlockHeader(fh=control_record_blf, offset=0)
+
+    reader = logblock.open()
+    reader.seek(logblock.header.RecordOffsets[0])
+    view = reader.read_view(16)
+
+    assert isinstance(view, memoryview)
+    assert view.obj is logblock.buf
+    assert reader.tell() == logblock.header.RecordOffsets[0] + 16
+    assert reader.seek(-8, io.SEEK_END) == len(logblock.buf) - 8
+    assert reader.read() == logblock.data[-8:]
+    assert reader.read(8) == b""
+
+
+def test_block_header_truncated(control_record_blf: BinaryIO) -> None:
+    data = control_record_blf.read()
+
+    with pytest.raises(EOFError):
+        BlockHeader(fh=io.BytesIO(data[:SECTOR_SIZE]), offset=0)
+
+
+def _assert_parity(fast: tuple, reference: object) -> None:
+    for name, value in fast._asdict().items():
+        expected = getattr(reference, name)
+
+        if name in ("CurrentLsn", "NextLsn"):
+            assert value.PhysicalOffset == expected.PhysicalOffset
+            assert value.Offset.RecordIndex == expected.Offset.RecordIndex
+            assert value.Offset.ContainerId == expected.Offset.ContainerId
+        elif name == "RecordOffsets":
+            assert list(value) == list(expected)
+        else:
+            assert value == expected, name
+
+
+def test_fast_header_parity(dummy_blf: BinaryIO, dummy_container: BinaryIO) -> None:
+    assert list(LogBlockHeader._fields) == list(c_clfs.CLFS_LOG_BLOCK_HEADER.fields)
+    assert list(RecordHeader._fields) == list(c_clfs.RECORD_HEADER.fields)
+
+    blocks = 0
+    records = 0
+    for fh in (dummy_blf, dummy_container):
+        data = fh.read()
+
+        for offset in range(0, len(data), SECTOR_SIZE):
+            header = LogBlockHeader.from_buffer(data, offset)
+            _assert_parity(header, c_clfs.CLFS_LOG_BLOCK_HEADER(data[offset:]))
+            blocks += 1
+
+            if not header.TotalSectors or header.MajorVersion != 0x15:
+                continue
+
+            record_offset = offset + header.RecordOffsets[0]
+            while record_offset + len(c_clfs.RECORD_HEADER) <= offset + header.TotalSectors * SECTOR_SIZE:
+                record = RecordHeader.from_buffer(data, record_offset)
+                _assert_parity(record, c_clfs.RECORD_HEADER(data[record_offset:]))
+                records += 1
+
+                if record.DataSize < len(c_clfs.RECORD_HEADER):
+                    break
+                record_offset += record.DataSize
+
+    assert blocks == 1152
+    assert records == 90
+
+
+def test_fast_header_eof() -> None:
+    with pytest.raises(EOFError):
+        LogBlockHeader.from_buffer(b"\x00" * 0x10)
+
+    with pytest.raises(EOFError):
+        RecordHeader.from_buffer(b"\x00" * 0x70, 0x50)
+
+
+def test_block_header_sectors(dummy_blf: BinaryIO, dummy_container: BinaryIO) -> None:
+    for fh in (dummy_blf, dummy_container):
+        container = Container(fh, offset=0, strict=True)
+        blocks = list(container.blocks())
+        assert blocks
+        assert all(block.sector_errors == () for block in blocks)
+
+
+@pytest.mark.parametrize(
+    ("signature", "expected"),
+    [
+        (b"\x30\x02", SectorError(1, 0x30, 0x02, "torn")),
+        (b"\x00\x00", SectorError(1, 0x00, 0x00, "unwritten")),
+        (b"\x10\x01", SectorError(1, 0x10, 0x01, "bounds")),
+    ],
+)
+def test_block_header_invalid_sector(control_record_blf: BinaryIO, signature: bytes, expected: SectorError) -> None:
+    data = bytearray(control_record_blf.read())
+    assert data[2 * SECTOR_SIZE - 2 : 2 * SECTOR_SIZE] == b"\x30\x01"
+    data[2 * SECTOR_SIZE - 2 : 2 * SECTOR_SIZE] = signature
+
+    # Lenient mode reports the sector, and still applies the fixups
+    logblock = BlockHeader(io.BytesIO(data), offset=0)
+    assert logblock.sector_errors == (expected,)
+    assert logblock.view[2 * SECTOR_SIZE - 2 : 2 * SECTOR_SIZE] == data[0x3FA:0x3FC]
+
+    with pytest.raises(TornBlockError, match="1 \\(" + expected.reason):
+        BlockHeader(io.BytesIO(data), offset=0, strict=True)
+
+    # Once fixed up in a shared buffer, the signatures are gone but the result is remembered
+    buf = BufferFile(data)
+    BlockHeader(buf, offset=0).data  # noqa: B018
+    assert BlockHeader(buf, offset=0).sector_errors == (expected,)
+    with pytest.raises(TornBlockError):
+        BlockHeader(buf, offset=0, strict=True)
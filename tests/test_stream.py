@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import io
+import tarfile
+from typing import TYPE_CHECKING, BinaryIO
+
+from dissect.clfs.container import Container
+from dissect.clfs.stream import ContainerStream, ForwardReader
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class Pipe:
+    """File-like object that can only be read, in small pieces."""
+
+    def __init__(self, data: bytes):
+        self.fh = io.BytesIO(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self.fh.read(min(size, 1000))
+
+
+def test_container_stream(dummy_container: BinaryIO) -> None:
+    container = Container(dummy_container, offset=36864)
+    dummy_container.seek(0)
+    stream = ContainerStream(Pipe(dummy_container.read()), offset=36864, buffer_size=4096)
+
+    # Read part of the stream, then continue where it stopped
+    blocks = [next(stream.blocks()).offset]
+    records = list(stream.scan())
+    assert blocks == [0]
+    assert records == list(container.scan(chain=False))[1:]
+    assert stream.size == container.size
+
+    assert [entry.offset for entry in stream.chain()] == [offset for offset, _, _ in container.records()]
+    assert stream.live() == container.chain()
+
+
+def test_container_stream_tar(tmp_path: Path, dummy_container: BinaryIO) -> None:
+    data = dummy_container.read()
+    with tarfile.open(tmp_path / "evidence.tar.gz", "w:gz") as tar:
+        info = tarfile.TarInfo("container.regtrans-ms")
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+
+    with tarfile.open(tmp_path / "evidence.tar.gz", "r|gz") as tar:
+        member = tar.next()
+        stream = ContainerStream(tar.extractfile(member), offset=36864)
+        assert len(stream.chain()) == 12
+        assert list(stream.scan()) == []
+
+
+def test_forward_reader() -> None:
+    reader = ForwardReader(Pipe(bytes(range(256)) * 16), buffer_size=512)
+
+    assert reader.peek(4) == b"\x00\x01\x02\x03"
+    reader.skip(1000)
+    assert reader.offset == 1000
+    assert reader.peek(2000)[:2] == bytes([1000 % 256, 1001 % 256])
+    assert len(reader.peek(5000)) == 4096 - 1000
+
+    reader.skip(5000)
+    assert reader.offset == 4096
+    assert reader.peek(1) == b""
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import io
+import logging
+from typing import BinaryIO
+
+import pytest
+
+from dissect.clfs.blf import BLF
+from dissect.clfs.c_clfs import BlockHeader, block_checksum
+from dissect.clfs.container import Container
+from dissect.clfs.exceptions import ChecksumError, InvalidRecordBlockError
+from dissect.clfs.verify import BlockChecksum, ChecksumPolicy
+
+
+def test_block_header_checksum(control_record_blf: BinaryIO, bad_control_record_blf: BinaryIO) -> None:
+    logblock = BlockHeader(control_record_blf, offset=0, verify_checksum=True)
+    assert logblock.checksum == logblock.header.Checksum == 0xC64C824B
+    assert logblock.checksum_valid
+
+    control_record_blf.seek(0)
+    assert block_checksum(control_record_blf.read(len(logblock.buf))) == logblock.checksum
+
+    # The checksum is calculated over the raw block, also when the fixups are already applied
+    logblock = BlockHeader(control_record_blf, offset=0)
+    logblock.data  # noqa: B018
+    assert logblock.checksum == 0xC64C824B
+
+    logblock = BlockHeader(bad_control_record_blf, offset=0)
+    assert not logblock.checksum_valid
+
+    with pytest.raises(ChecksumError):
+        BlockHeader(bad_control_record_blf, offset=0, verify_checksum=True)
+
+
+def test_blf_verify_all(dummy_blf: BinaryIO) -> None:
+    result = BLF(dummy_blf).verify_all()
+
+    assert result.valid
+    assert [block.offset for block in result.blocks] == [0x0, 0x800, 0x8200, 0xFC00]
+    assert result.bytes_read == dummy_blf.seek(0, io.SEEK_END)
+    assert result.bytes_per_second > 0
+
+
+def test_blf_invalid_checksum(dummy_blf: BinaryIO, caplog: pytest.LogCaptureFixture) -> None:
+    data = bytearray(dummy_blf.read())
+    # Corrupt the general base record, its shadow is still valid
+    data[0x1000] ^= 0xFF
+
+    result = BLF(io.BytesIO(data)).verify_all(chunk_size=4096)
+    assert not result.valid
+    assert [block.offset for block in result.invalid] == [0x800]
+    assert len(result.blocks) == 4
+
+    with caplog.at_level(logging.WARNING, logger="dissect.clfs.verify"):
+        assert not BLF(io.BytesIO(data)).verify_all(policy="warn").valid
+    assert "offset 0x800 has an invalid checksum" in caplog.text
+
+    with pytest.raises(ChecksumError):
+        BLF(io.BytesIO(data)).verify_all(policy=ChecksumPolicy.RAISE)
+
+    # Without verification, the corrupt base record is parsed as usual
+    assert len(list(BLF(io.BytesIO(data)).base_records())) == 2
+
+    blf = BLF(io.BytesIO(data), checksum="skip")
+    assert [record.logblock.offset for record in blf.base_records()] == [0x8200]
+    assert len(blf.containers) == 2
+
+    with pytest.raises(ChecksumError):
+        list(BLF(io.BytesIO(data), checksum="raise").base_records())
+
+
+def test_container_checksum(dummy_container: BinaryIO) -> None:
+    container = Container(dummy_container, offset=36864)
+    result = container.verify_all(chunk_size=4096)
+
+    # The container blocks in the test data don't have a checksum
+    assert len(result.blocks) == 37
+    assert result.valid
+    assert all(block.expected == 0 for block in result.blocks)
+    assert result.blocks == container.verify_all().blocks
+
+    dummy_container.seek(0)
+    data = bytearray(dummy_container.read())
+    offset = result.blocks[0].offset
+    data[offset + 0x0C : offset + 0x10] = b"\x01\x02\x03\x04"
+
+    result = Container(io.BytesIO(data), offset=36864).verify_all()
+    assert result.invalid == [BlockChecksum(offset, result.blocks[0].size, 0x04030201, result.blocks[0].actual)]
+
+    records = list(Container(io.BytesIO(data), offset=36864).scan(chain=False))
+    assert len(records) == 49
+
+    container = Container(io.BytesIO(data), offset=36864, checksum="skip")
+    with pytest.raises(InvalidRecordBlockError):
+        container.block(offset)
+    assert len(list(container.scan(chain=False))) < len(records)
+
+    container = Container(io.BytesIO(data), offset=36864, checksum="raise")
+    with pytest.raises(ChecksumError):
+        list(container.scan(chain=False))
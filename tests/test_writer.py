@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+
+from dissect.clfs.blf import BLF
+from dissect.clfs.c_clfs import SECTOR_SIZE, BlockHeader
+from dissect.clfs.container import Container
+from dissect.clfs.writer import NO_LSN, ContainerInfo, ContainerWriter, write_blf
+
+
+def test_container_writer() -> None:
+    fh = io.BytesIO()
+    writer = ContainerWriter(fh, checksum=True)
+    writer.write_restart_area()
+
+    lsns = [writer.append(bytes([idx]) * 100) for idx in range(3)]
+    writer.append_unlinked(b"unlinked")
+    # A record that spans multiple sectors
+    lsns.append(writer.append(b"large" * 400, restart_data=b"restart"))
+
+    assert writer.blocks == 6
+    assert writer.finish(0x4000) == 0x4000
+    assert len(fh.getvalue()) == 0x4000
+
+    container = Container(fh, writer.head, strict=True, checksum="raise")
+    assert container.block(writer.head).header.TotalSectors == 5
+    assert container.verify_all().valid
+
+    records = list(container.records())
+    assert [block_data for _, _, block_data in records] == [b"large" * 400] + [bytes([idx]) * 100 for idx in (2, 1, 0)]
+    assert records[0][1] == b"restart"
+    assert records[-1][1] == bytes(32)
+
+    scanned = list(container.scan())
+    assert [record.lsn for record in scanned if record.data != b"unlinked"][1::2] == lsns
+    assert [record.live for record in scanned] == [False] + [True] * 6 + [False] + [True] * 2
+
+    with pytest.raises(ValueError, match="too small"):
+        writer.finish(SECTOR_SIZE)
+
+
+def test_container_writer_wraparound() -> None:
+    fh = io.BytesIO()
+    writer = ContainerWriter(fh)
+    writer.write_restart_area()
+    for idx in range(6):
+        writer.append(bytes([idx]) * 100)
+
+    writer.wrap()
+    for idx in range(6, 8):
+        writer.append(bytes([idx]) * 100)
+
+    assert writer.head == SECTOR_SIZE
+    assert writer.finish() == 7 * SECTOR_SIZE
+
+    container = Container(fh, writer.head)
+    # The restart area and the oldest record are overwritten, the LSNs keep increasing
+    records = [record for record in container.follow() if record.header.LsnPrevious != NO_LSN]
+    assert [record.data[0] for record in records] == list(range(1, 8))
+    assert [record.block_offset for record in records][-3:] == [6 * SECTOR_SIZE, 0, SECTOR_SIZE]
+    # The wrap shows in the container id part of the LSN, the offset part stays the physical offset
+    assert BlockHeader(fh, 0).header.CurrentLsn.PhysicalOffset == 1 << 32
+
+
+def test_container_writer_wraparound_record_at() -> None:
+    fh = io.BytesIO()
+    writer = ContainerWriter(fh)
+    writer.write_restart_area()
+    lsns = [writer.append(bytes([idx]) * 100) for idx in range(4)]
+
+    writer.wrap()
+    lsns.append(writer.append(b"wrapped"))
+    assert lsns[-1] == 1 << 32
+    assert writer.head == 0
+
+    # Without an index, the log block of a record is derived from the offset part of its LSN
+    container = Container(fh, writer.head)
+    assert container.record_at(lsns[-1]).data == b"wrapped"
+    assert container.record_at(lsns[-1]).block_offset == 0
+    assert [container.record_at(lsn).data for lsn in lsns[:-1]] == [bytes([idx]) * 100 for idx in range(4)]
+    assert next(container.records())[2] == b"wrapped"
+
+
+def test_write_blf() -> None:
+    containers = [
+        ContainerInfo(f"%BLF%\\testContainer{idx:020d}", f"test::stream{idx}", idx, SECTOR_SIZE, 0x10000)
+        for idx in range(20)
+    ]
+
+    fh = io.BytesIO()
+    write_blf(fh, "test", containers[:2], shadow=containers)
+
+    blf = BLF(fh, checksum="raise")
+    assert blf.verify_all().valid
+    assert len(list(blf.control_records())) == 2
+    assert len(list(blf.truncate_records())) == 2
+
+    # The base record and its shadow diverge, the shadow is the active one
+    primary, shadow = blf.base_records()
+    assert primary.record.RecordHeader.DumpCount < shadow.record.RecordHeader.DumpCount
+    assert sorted(stream.name for stream in primary.streams) == ["test::stream0", "test::stream1"]
+    assert blf.base_record is shadow
+    assert sorted(container.id for container in blf.containers) == list(range(20))
+    assert all(stream.offset == SECTOR_SIZE for stream in blf.streams)